@@ -0,0 +1,310 @@
+"""
+Engine Benchmark Suite
+Times JukeboxEngine start-up, library pipeline, queue and statistics operations on synthetic
+libraries and reports the results as JSON so regressions show up between versions.
+
+Usage:
+    python benchmarks/engine_benchmarks.py --sizes 1000,10000 --output results.json
+    python benchmarks/engine_benchmarks.py --sizes 1000 --compare results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS_DIR: str = os.path.dirname(os.path.realpath(__file__))
+REPO_ROOT: str = os.path.dirname(BENCHMARKS_DIR)
+ENGINE_DIR: str = os.path.join(REPO_ROOT, 'convergence_jukebox_2026_player_renewal')
+sys.path.insert(0, ENGINE_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from audio_backend_module import FakeAudioBackend  # noqa: E402
+from main_jukebox_engine_2026 import JukeboxEngine  # noqa: E402
+from library_health_module import HealthScan  # noqa: E402
+from song_library_module import Library  # noqa: E402
+from synthetic_library import write_library  # noqa: E402
+
+DEFAULT_SIZES: List[int] = [1000, 10000, 100000, 500000]
+BENCHMARK_CONFIG: Dict[str, Any] = {
+    "audio": {"backend": "fake"},
+    "console": {"colors_enabled": False, "show_system_info": False, "verbose": False},
+    "startup": {"progressive": False}
+}
+
+
+class BootstrapOnlyEngine(JukeboxEngine):
+    """JukeboxEngine whose run() returns where the first song would start playing"""
+
+    def jukebox_engine(self) -> bool:
+        return True
+
+
+def _new_engine(base_dir: str) -> BootstrapOnlyEngine:
+    """Create a headless engine on base_dir with console output swallowed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BootstrapOnlyEngine(audio_backend=FakeAudioBackend(), dir_path=base_dir)
+
+
+def _run_and_close(base_dir: str) -> None:
+    engine = _new_engine(base_dir)
+    engine.run()
+    engine.close()
+
+
+def _finish_progressive(engine: Optional[BootstrapOnlyEngine]) -> None:
+    """Let a progressive start's background scan finish, then close the engine"""
+    if engine is None:
+        return
+    if engine.library_scan is not None:
+        engine.library_scan.wait()
+    engine.close()
+
+
+def _time_call(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Time func() repeat times (setup() runs untimed before each call)
+
+    Returns:
+        Dict[str, Any]: min/median/mean seconds and the raw runs
+    """
+    runs: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+    return {
+        'min_s': min(runs),
+        'median_s': statistics.median(runs),
+        'mean_s': statistics.mean(runs),
+        'runs': runs
+    }
+
+
+def _remove_song_list(base_dir: str, scan_cache: bool = True) -> None:
+    for name in ('MusicMasterSongList.txt', 'MusicMasterSongListCheck.txt'):
+        path = os.path.join(base_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    if scan_cache:
+        shutil.rmtree(os.path.join(base_dir, 'library_cache'), ignore_errors=True)
+
+
+def _retained_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by what build() returns, once its temporaries are freed"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained
+
+
+def benchmark_library_memory(songs: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """Memory and load time of MusicMasterSongList as a list of dicts and as a columnar Library"""
+    song_list_json = json.dumps(songs)
+    dicts_bytes = _retained_bytes(lambda: json.loads(song_list_json))
+    library_bytes = _retained_bytes(lambda: Library(json.loads(song_list_json)))
+    return {
+        'library_memory': {
+            'list_of_dicts_bytes': dicts_bytes,
+            'library_bytes': library_bytes,
+            'list_of_dicts_bytes_per_song': round(dicts_bytes / max(1, len(songs)), 1),
+            'library_bytes_per_song': round(library_bytes / max(1, len(songs)), 1),
+            'saving': round(1 - library_bytes / max(1, dicts_bytes), 3)
+        },
+        'library_load_list_of_dicts': _time_call(lambda: json.loads(song_list_json), repeat),
+        'library_load_columnar': _time_call(lambda: Library(json.loads(song_list_json)), repeat)
+    }
+
+
+def benchmark_size(base_dir: str, track_count: int, repeat: int) -> Dict[str, Any]:
+    """Run every benchmark against one synthetic library
+
+    Args:
+        base_dir (str): Scratch directory for this library
+        track_count (int): Number of tracks
+        repeat (int): Timed repetitions per benchmark
+
+    Returns:
+        Dict[str, Any]: Timings keyed by benchmark name
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, 'jukebox_config.json'), 'w') as config_file:
+        json.dump(BENCHMARK_CONFIG, config_file)
+
+    generate_start = time.perf_counter()
+    songs = write_library(base_dir, track_count)
+    results: Dict[str, Any] = {'fixture_generation_s': time.perf_counter() - generate_start}
+
+    # run() warm start: master list on disk and file count matches
+    results['run_warm'] = _time_call(lambda: _run_and_close(base_dir), repeat)
+
+    # run() cold start: no master list or scan cache, full metadata scan of the music folder
+    results['run_cold'] = _time_call(lambda: _run_and_close(base_dir), repeat,
+                                     setup=lambda: _remove_song_list(base_dir))
+
+    # run() cold start in progressive mode: time until the first song would start (first scan batch)
+    progressive: Dict[str, Any] = {}
+
+    def start_cold_progressive() -> None:
+        _finish_progressive(progressive.get('engine'))
+        _remove_song_list(base_dir)
+        progressive['engine'] = _new_engine(base_dir)
+        progressive['engine'].config['startup']['progressive'] = True
+    results['run_cold_progressive_first_song'] = _time_call(lambda: progressive['engine'].run(), repeat,
+                                                            setup=start_cold_progressive)
+    _finish_progressive(progressive['engine'])
+
+    # run() rebuild from the per-root scan cache: walk the folder, read no tags
+    results['run_rescan_cached'] = _time_call(lambda: _run_and_close(base_dir), repeat,
+                                              setup=lambda: _remove_song_list(base_dir, scan_cache=False))
+    # Health check of every file, without the verdict cache from an earlier report
+    results['library_health_scan'] = _time_call(lambda: HealthScan(songs, workers=2, niceness=0).run(), repeat)
+    write_library(base_dir, track_count, with_mp3_files=False)
+
+    engine = _new_engine(base_dir)
+
+    def reset_metadata() -> None:
+        engine.music_id3_metadata_list = []
+        shutil.rmtree(engine.library_cache_dir, ignore_errors=True)
+    results['generate_mp3_metadata'] = _time_call(engine.generate_mp3_metadata, repeat, setup=reset_metadata)
+
+    def reset_song_ids() -> None:
+        engine.music_master_song_list = Library({field: value for field, value in song.items() if field != 'id'}
+                                                for song in songs)
+    results['index_song_ids'] = _time_call(engine.index_song_ids, repeat, setup=reset_song_ids)
+    song_ids = [song['id'] for song in engine.music_master_song_list]
+    results.update(benchmark_library_memory(engine.music_master_song_list.to_list(), repeat))
+
+    # Duplicate detection without the fingerprint cache from an earlier report
+    results['detect_duplicates'] = _time_call(
+        engine.detect_duplicates, repeat,
+        setup=lambda: os.path.exists(engine.duplicate_report_file) and os.remove(engine.duplicate_report_file))
+    results['assign_genres_to_random_play'] = _time_call(engine.assign_genres_to_random_play, repeat)
+
+    def reset_random_playlist() -> None:
+        engine.random_music_playlist = []
+    results['generate_random_song_list'] = _time_call(engine.generate_random_song_list, repeat,
+                                                      setup=reset_random_playlist)
+
+    # Queue operations
+    queue_ops = min(track_count, 1000)
+
+    def rotate_random_playlist() -> None:
+        for _ in range(queue_ops):
+            engine.random_music_playlist.append(engine.random_music_playlist.pop(0))
+    results['queue_random_rotation_x1000'] = _time_call(rotate_random_playlist, repeat)
+
+    def paid_enqueue() -> None:
+        # Mirrors the GUI's read / append / de-duplicate / write cycle
+        for song_id in song_ids[::max(1, track_count // 100)]:
+            success, playlist = engine._read_paid_playlist()
+            playlist.append(song_id)
+            if len(playlist) != len(set(playlist)):
+                playlist = list(set(playlist))
+            engine._write_paid_playlist(playlist)
+    results['queue_paid_enqueue_x100'] = _time_call(paid_enqueue, repeat,
+                                                    setup=lambda: engine._write_paid_playlist([]))
+
+    # Statistics queries
+    def record_plays() -> None:
+        for song_id in song_ids:
+            engine._record_song_play(song_id, 'random')
+    results['statistics_record_all'] = _time_call(record_plays, 1, setup=lambda: setattr(engine, 'song_statistics', {}))
+    results['statistics_top_songs'] = _time_call(lambda: engine._get_top_songs(10), repeat)
+    results['statistics_save'] = _time_call(engine._save_statistics, repeat)
+    results['statistics_load'] = _time_call(engine._load_statistics, repeat)
+    engine.close()
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """List benchmarks whose median got slower than max_regression times the baseline"""
+    regressions: List[str] = []
+    for size, benchmarks in current['results'].items():
+        for name, timing in benchmarks.items():
+            old = baseline.get('results', {}).get(size, {}).get(name)
+            if not isinstance(timing, dict) or not isinstance(old, dict) or not old.get('median_s'):
+                continue
+            ratio = timing['median_s'] / old['median_s']
+            print(f"{size:>7} {name:<32} {old['median_s']:>10.4f}s -> {timing['median_s']:>10.4f}s  x{ratio:.2f}",
+                  file=sys.stderr)
+            if ratio > max_regression:
+                regressions.append(f'{size}/{name}')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Convergence Jukebox engine benchmarks')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma separated library sizes (default: 1000,10000,100000,500000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per benchmark')
+    parser.add_argument('--workdir', help='Keep fixtures in this directory instead of a temporary one')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', help='Baseline JSON report to compare medians against')
+    parser.add_argument('--max-regression', type=float, default=1.25,
+                        help='Fail when a median is this many times slower than the baseline')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    workdir = args.workdir or tempfile.mkdtemp(prefix='jukebox_bench_')
+    report: Dict[str, Any] = {
+        'meta': {
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat
+        },
+        'results': {}
+    }
+    try:
+        for size in sizes:
+            print(f'Benchmarking {size} tracks...', file=sys.stderr)
+            report['results'][str(size)] = benchmark_size(os.path.join(workdir, f'tracks_{size}'), size, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    if args.compare:
+        with open(args.compare, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(report, baseline, args.max_regression)
+        if regressions:
+            print(f"Regressions over x{args.max_regression}: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,443 @@
+"""
+Night Simulator
+Discrete-event simulation of a night of jukebox traffic against the real JukeboxEngine.
+
+Coin-in and selection arrivals are generated (or replayed) on a virtual clock. Selections are
+queued exactly as the GUI does it - read PaidMusicPlayList.txt, append, apply the duplicate
+policy, write it back - and the engine loop decides what plays next. Eight hours of traffic
+finish in seconds, and the report covers queue wait times, starvation, repeat rates and
+revenue per hour so scheduling policies can be compared before deployment: the duplicate
+policy, the order paid and random songs are played in and how random songs are picked.
+
+Usage:
+    python benchmarks/night_simulator.py --hours 8 --coins-per-hour 20
+    python benchmarks/night_simulator.py --schedule alternate --rotation shuffle
+    python benchmarks/night_simulator.py --compare-policies
+    python benchmarks/night_simulator.py --replay events.json
+"""
+import argparse
+import bisect
+import contextlib
+import heapq
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR: str = os.path.dirname(os.path.realpath(__file__))
+REPO_ROOT: str = os.path.dirname(BENCHMARKS_DIR)
+ENGINE_DIR: str = os.path.join(REPO_ROOT, 'convergence_jukebox_2026_player_renewal')
+sys.path.insert(0, ENGINE_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from audio_backend_module import FakeAudioBackend, VirtualClock  # noqa: E402
+from log_segments_module import iter_log_lines  # noqa: E402
+from main_jukebox_engine_2026 import JukeboxEngine  # noqa: E402
+from song_library_module import Library  # noqa: E402
+from synthetic_library import generate_song_list, write_mp3_fixtures  # noqa: E402
+
+# How PaidMusicPlayList.txt reacts to a song that is already queued
+#   reject            - current GUI behaviour: list(set(...)) drops the duplicate (and reorders the queue)
+#   reject_keep_order - drop the duplicate, keep queue order
+#   allow             - queue the song again
+DUPLICATE_POLICIES: List[str] = ['reject', 'reject_keep_order', 'allow']
+
+# When paid and random songs play
+#   paid_first     - the engine's loop: every queued paid song, then one random song
+#   shortest_first - as paid_first, with the queue kept shortest song first
+#   alternate      - one paid song, then one random song
+SCHEDULES: List[str] = ['paid_first', 'shortest_first', 'alternate']
+
+# How the random song is picked
+#   rotate  - the engine's rotation: the head of RandomMusicPlayList, then moved to the end
+#   shuffle - any song in the rotation, uniformly at random
+ROTATIONS: List[str] = ['rotate', 'shuffle']
+
+# Relative traffic for each hour of the night (scaled by --coins-per-hour)
+DEFAULT_HOURLY_PROFILE: List[float] = [0.5, 0.8, 1.0, 1.3, 1.5, 1.4, 1.0, 0.6]
+
+SIMULATION_CONFIG: Dict[str, Any] = {
+    "audio": {"backend": "fake"},
+    "console": {"colors_enabled": False, "show_system_info": False, "verbose": False}
+}
+
+
+class SimulationClock(VirtualClock):
+    """VirtualClock that fires scheduled events as sleep() moves time past them"""
+
+    def __init__(self, start_time: float) -> None:
+        super().__init__(start_time=start_time)
+        self._events: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence: int = 0
+
+    def schedule(self, at_time: float, callback: Callable[[], None]) -> None:
+        """Run callback once the clock reaches at_time"""
+        heapq.heappush(self._events, (at_time, self._sequence, callback))
+        self._sequence += 1
+
+    def sleep(self, seconds: float) -> None:
+        target = self._now + max(seconds, 0)
+        while self._events and self._events[0][0] <= target:
+            at_time, _, callback = heapq.heappop(self._events)
+            self._now = max(self._now, at_time)
+            callback()
+        self._now = target
+
+
+class SimulatedEngine(JukeboxEngine):
+    """JukeboxEngine that records every play with its virtual start time
+
+    Args:
+        schedule (str): One of SCHEDULES
+        rotation (str): One of ROTATIONS
+    """
+
+    def __init__(self, *args: Any, schedule: str = 'paid_first', rotation: str = 'rotate', **kwargs: Any) -> None:
+        self.plays: List[Dict[str, Any]] = []
+        self.schedule: str = schedule
+        self.rotation: str = rotation
+        self.rotation_rng: random.Random = random.Random()
+        super().__init__(*args, **kwargs)
+
+    def _remove_from_paid_playlist(self, song_id: int) -> bool:
+        # False makes jukebox_engine() leave its paid loop and play a random song next
+        return super()._remove_from_paid_playlist(song_id) and self.schedule != 'alternate'
+
+    def assign_song_data(self, kind: str) -> bool:
+        if kind == 'random' and self.rotation == 'shuffle' and self.random_music_playlist:
+            pick = self.rotation_rng.randrange(len(self.random_music_playlist))
+            self.random_music_playlist.insert(0, self.random_music_playlist.pop(pick))
+        return super().assign_song_data(kind)
+
+    def _log_song_play(self, artist: str, title: str, play_type: str, song_index: Optional[int] = None,
+                       song_id: Optional[int] = None) -> None:
+        self.plays.append({'time': self.clock.now(), 'song': song_id, 'type': play_type})
+        super()._log_song_play(artist, title, play_type, song_index, song_id)
+
+
+def _duration_seconds(duration: str) -> float:
+    minutes, _, seconds = duration.partition(':')
+    return int(minutes) * 60 + int(seconds or 0)
+
+
+def generate_arrivals(hours: float, coins_per_hour: float, track_count: int, seed: int,
+                      hourly_profile: Optional[List[float]] = None, zipf_exponent: float = 1.1,
+                      select_probability: float = 0.95) -> List[Dict[str, Any]]:
+    """Generate coin and selection arrivals as a non-homogeneous Poisson process
+
+    Each coin is followed 5-45 seconds later (with select_probability) by a selection. Song
+    popularity follows a Zipf distribution over a shuffled library.
+
+    Returns:
+        List[Dict[str, Any]]: Events {'t': seconds from start, 'type': 'coin'|'select', 'song': index}
+    """
+    rng = random.Random(seed)
+    profile = hourly_profile or DEFAULT_HOURLY_PROFILE
+    popularity_order = list(range(track_count))
+    rng.shuffle(popularity_order)
+    cumulative: List[float] = []
+    total = 0.0
+    for rank in range(track_count):
+        total += 1.0 / (rank + 1) ** zipf_exponent
+        cumulative.append(total)
+
+    events: List[Dict[str, Any]] = []
+    t = 0.0
+    end = hours * 3600
+    peak_rate = coins_per_hour * max(profile) / 3600
+    while True:
+        # Thinning: draw at the peak rate, keep with probability rate(t) / peak
+        t += rng.expovariate(peak_rate)
+        if t >= end:
+            break
+        hour_rate = coins_per_hour * profile[min(int(t // 3600), len(profile) - 1)] / 3600
+        if rng.random() > hour_rate / peak_rate:
+            continue
+        events.append({'t': t, 'type': 'coin'})
+        if rng.random() < select_probability:
+            rank = bisect.bisect_left(cumulative, rng.random() * total)
+            events.append({'t': t + rng.uniform(5, 45), 'type': 'select', 'song': popularity_order[rank]})
+    events.sort(key=lambda event: event['t'])
+    return events
+
+
+def load_replay(path: str, songs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load arrivals from a JSON event list, a GUI log.txt or a log segment directory
+
+    JSON files hold a list of {'t', 'type', 'song'} events. Log files are scanned for the GUI's
+    'coin_inserted' and 'song_selected' JSON-lines records, and for the older
+    'HH:MM:SS Quarter Added,' and 'HH:MM:SS Artist - Title Selected For Play,' lines.
+    """
+    if not os.path.isdir(path):
+        with open(path, 'r') as replay_file:
+            content = replay_file.read()
+        if content.lstrip().startswith('['):
+            return sorted(json.loads(content), key=lambda event: event['t'])
+
+    song_lookup = {f"{song['artist']} - {song['title']}": index for index, song in enumerate(songs)}
+    events: List[Dict[str, Any]] = []
+    first_seconds: Optional[int] = None
+    day_offset = 0
+    last_seconds = -1
+    first_timestamp: Optional[float] = None
+    for line in iter_log_lines(path):
+        line = line.strip().rstrip(',')
+        if line.startswith('{'):
+            try:
+                record = json.loads(line)
+                timestamp = datetime.strptime(record['ts'], '%Y-%m-%d %H:%M:%S').timestamp()
+            except (ValueError, KeyError):
+                continue
+            if record.get('source') != 'gui':
+                continue
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            if record.get('event') == 'coin_inserted':
+                events.append({'t': timestamp - first_timestamp, 'type': 'coin'})
+            elif record.get('event') == 'song_selected' and isinstance(record.get('song_number'), int):
+                events.append({'t': timestamp - first_timestamp, 'type': 'select', 'song': record['song_number']})
+            continue
+        try:
+            clock_time = datetime.strptime(line[:8], '%H:%M:%S')
+        except ValueError:
+            continue
+        seconds = clock_time.hour * 3600 + clock_time.minute * 60 + clock_time.second
+        if seconds < last_seconds:
+            day_offset += 86400  # passed midnight
+        last_seconds = seconds
+        if first_seconds is None:
+            first_seconds = seconds
+        t = seconds + day_offset - first_seconds
+        text = line[9:]
+        if text == 'Quarter Added':
+            events.append({'t': t, 'type': 'coin'})
+        elif text.endswith(' Selected For Play') and text[:-len(' Selected For Play')] in song_lookup:
+            events.append({'t': t, 'type': 'select', 'song': song_lookup[text[:-len(' Selected For Play')]]})
+    return events
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def simulate(songs: List[Dict[str, Any]], events: List[Dict[str, Any]], hours: float, workdir: str,
+             duplicate_policy: str = 'reject', coin_value: float = 0.25, starvation_minutes: float = 30.0,
+             repeat_window_minutes: float = 60.0, seed: int = 2026, schedule: str = 'paid_first',
+             rotation: str = 'rotate') -> Dict[str, Any]:
+    """Run one simulated night and return its report
+
+    Args:
+        songs (List[Dict[str, Any]]): Library in MusicMasterSongList format (locations inside workdir/music)
+        events (List[Dict[str, Any]]): Coin and selection arrivals
+        hours (float): Length of the night
+        workdir (str): Engine directory for this run
+        duplicate_policy (str): One of DUPLICATE_POLICIES
+        coin_value (float): Revenue per coin
+        starvation_minutes (float): Waits longer than this count as starved
+        repeat_window_minutes (float): A play repeats if the song played within this window
+        seed (int): Seed for the engine's random rotation
+        schedule (str): One of SCHEDULES
+        rotation (str): One of ROTATIONS
+
+    Returns:
+        Dict[str, Any]: Report
+    """
+    if duplicate_policy not in DUPLICATE_POLICIES:
+        raise ValueError(f'Unknown duplicate policy: {duplicate_policy}')
+    if schedule not in SCHEDULES:
+        raise ValueError(f'Unknown schedule: {schedule}')
+    if rotation not in ROTATIONS:
+        raise ValueError(f'Unknown rotation: {rotation}')
+    os.makedirs(workdir, exist_ok=True)
+    for name in ('PaidMusicPlayList.txt', 'log.txt', 'song_statistics.json'):
+        if os.path.exists(os.path.join(workdir, name)):
+            os.remove(os.path.join(workdir, name))
+    shutil.rmtree(os.path.join(workdir, 'logs'), ignore_errors=True)
+    with open(os.path.join(workdir, 'jukebox_config.json'), 'w') as config_file:
+        json.dump(SIMULATION_CONFIG, config_file)
+
+    start_time = datetime(2026, 1, 2, 20, 0, 0).timestamp()
+    end_time = start_time + hours * 3600
+    clock = SimulationClock(start_time)
+    durations = {song['location']: _duration_seconds(song['duration']) for song in songs}
+    backend = FakeAudioBackend(clock=clock, durations=durations)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = SimulatedEngine(audio_backend=backend, dir_path=workdir, schedule=schedule, rotation=rotation)
+    engine.rotation_rng.seed(seed)
+    engine.music_master_song_list = Library(songs)
+    paid_file = engine.paid_music_playlist_file
+
+    state: Dict[str, Any] = {'credits': 0, 'coins': [], 'pending': {}, 'accepted': 0,
+                             'rejected_duplicates': 0, 'no_credit': 0}
+
+    def on_coin(at_time: float) -> None:
+        state['credits'] += 1
+        state['coins'].append(at_time)
+
+    def queued_seconds(song_id: int) -> float:
+        return durations[engine.music_master_song_list[engine.song_id_to_row[song_id]]['location']]
+
+    def on_select(at_time: float, song_index: int) -> None:
+        if state['credits'] == 0:
+            state['no_credit'] += 1
+            return
+        song_id = engine.music_master_song_list[song_index]['id']
+        with open(paid_file, 'r') as paid_list_file:
+            playlist = json.load(paid_list_file)
+        if song_id in playlist and duplicate_policy != 'allow':
+            state['rejected_duplicates'] += 1
+            if duplicate_policy == 'reject':
+                with open(paid_file, 'w') as paid_list_file:
+                    json.dump(list(set(playlist)), paid_list_file)
+            return
+        if schedule == 'shortest_first':
+            # after every queued song as short as it, and never ahead of the song playing
+            first = 1 if playlist and playlist[0] == engine.current_song_id else 0
+            position = len(playlist)
+            while position > first and queued_seconds(playlist[position - 1]) > queued_seconds(song_id):
+                position -= 1
+            playlist.insert(position, song_id)
+        else:
+            playlist.append(song_id)
+        with open(paid_file, 'w') as paid_list_file:
+            json.dump(playlist, paid_list_file)
+        state['credits'] -= 1
+        state['accepted'] += 1
+        state['pending'].setdefault(song_id, []).append(at_time)
+
+    for event in events:
+        at_time = start_time + event['t']
+        if at_time >= end_time:
+            continue
+        if event['type'] == 'coin':
+            clock.schedule(at_time, lambda at_time=at_time: on_coin(at_time))
+        elif event['type'] == 'select':
+            clock.schedule(at_time, lambda at_time=at_time, song=event['song']: on_select(at_time, song))
+    clock.schedule(end_time, engine.stop)
+
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.index_song_ids()
+        engine.detect_duplicates()
+        engine.load_audio_analysis()
+        engine.assign_genres_to_random_play()
+        engine.generate_random_song_list()
+        engine.jukebox_engine()
+    engine.close()
+
+    # Match paid plays to the requests that caused them (oldest request first)
+    waits: List[float] = []
+    for play in engine.plays:
+        if play['type'] == 'Paid' and state['pending'].get(play['song']):
+            waits.append(play['time'] - state['pending'][play['song']].pop(0))
+    unserved = [end_time - requested for requests in state['pending'].values() for requested in requests]
+    # Requests neither played nor still in PaidMusicPlayList.txt were overwritten by a stale write
+    with open(paid_file, 'r') as paid_list_file:
+        still_queued = json.load(paid_list_file)
+    lost = sum(max(0, len(requests) - still_queued.count(song_id))
+               for song_id, requests in state['pending'].items())
+    starvation_limit = starvation_minutes * 60
+
+    repeat_window = repeat_window_minutes * 60
+    last_played: Dict[int, float] = {}
+    repeats = {'Paid': 0, 'Random': 0}
+    plays_by_type = {'Paid': 0, 'Random': 0}
+    for play in engine.plays:
+        plays_by_type[play['type']] += 1
+        previous = last_played.get(play['song'])
+        if previous is not None and play['time'] - previous < repeat_window:
+            repeats[play['type']] += 1
+        last_played[play['song']] = play['time']
+
+    hour_count = max(1, int(-(-hours // 1)))
+    revenue_per_hour = [0.0] * hour_count
+    for coin_time in state['coins']:
+        revenue_per_hour[min(int((coin_time - start_time) // 3600), hour_count - 1)] += coin_value
+    total_plays = len(engine.plays)
+
+    return {
+        'duplicate_policy': duplicate_policy,
+        'schedule': schedule,
+        'rotation': rotation,
+        'hours': hours,
+        'library_size': len(songs),
+        'arrivals': {'coins': len(state['coins']), 'selections_accepted': state['accepted'],
+                     'rejected_duplicates': state['rejected_duplicates'], 'no_credit': state['no_credit']},
+        'plays': {'total': total_plays, 'paid': plays_by_type['Paid'], 'random': plays_by_type['Random']},
+        'wait_seconds': {
+            'mean': statistics.mean(waits) if waits else 0.0,
+            'median': statistics.median(waits) if waits else 0.0,
+            'p95': _percentile(waits, 0.95) if waits else 0.0,
+            'max': max(waits) if waits else 0.0
+        },
+        'starvation': {
+            'threshold_minutes': starvation_minutes,
+            'served_after_threshold': sum(1 for wait in waits if wait > starvation_limit),
+            'unserved_at_close': len(unserved),
+            'lost_from_queue': lost,
+            'unserved_over_threshold': sum(1 for wait in unserved if wait > starvation_limit)
+        },
+        'repeat_rate': {
+            'window_minutes': repeat_window_minutes,
+            'overall': (repeats['Paid'] + repeats['Random']) / total_plays if total_plays else 0.0,
+            'paid': repeats['Paid'] / plays_by_type['Paid'] if plays_by_type['Paid'] else 0.0,
+            'random': repeats['Random'] / plays_by_type['Random'] if plays_by_type['Random'] else 0.0
+        },
+        'revenue_per_hour': revenue_per_hour,
+        'revenue_total': sum(revenue_per_hour)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Simulate a night of jukebox traffic on a virtual clock')
+    parser.add_argument('--hours', type=float, default=8.0, help='Length of the night in hours')
+    parser.add_argument('--tracks', type=int, default=2000, help='Synthetic library size')
+    parser.add_argument('--coins-per-hour', type=float, default=20.0, help='Average coin arrivals per hour')
+    parser.add_argument('--coin-value', type=float, default=0.25, help='Revenue per coin')
+    parser.add_argument('--seed', type=int, default=2026, help='Random seed')
+    parser.add_argument('--policy', default='reject', choices=DUPLICATE_POLICIES, help='Duplicate selection policy')
+    parser.add_argument('--schedule', default='paid_first', choices=SCHEDULES, help='When paid and random songs play')
+    parser.add_argument('--rotation', default='rotate', choices=ROTATIONS, help='How the random song is picked')
+    parser.add_argument('--compare-policies', action='store_true',
+                        help='Run every duplicate policy, schedule and rotation on the same arrivals, '
+                             'changing one at a time from the chosen ones')
+    parser.add_argument('--replay', help='Replay arrivals from a JSON event list, a GUI log.txt or a logs/ segment directory')
+    parser.add_argument('--starvation-minutes', type=float, default=30.0, help='Wait that counts as starvation')
+    parser.add_argument('--repeat-window-minutes', type=float, default=60.0, help='Window for repeat detection')
+    parser.add_argument('--workdir', help='Keep the simulated engine directory here')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='jukebox_sim_')
+    try:
+        songs = generate_song_list(args.tracks, os.path.join(workdir, 'music'), args.seed)
+        write_mp3_fixtures(songs, frames=1)
+        if args.replay:
+            events = load_replay(args.replay, songs)
+        else:
+            events = generate_arrivals(args.hours, args.coins_per_hour, len(songs), args.seed)
+        baseline = (args.policy, args.schedule, args.rotation)
+        runs = [baseline]
+        if args.compare_policies:
+            runs += [(policy, args.schedule, args.rotation) for policy in DUPLICATE_POLICIES if policy != args.policy]
+            runs += [(args.policy, schedule, args.rotation) for schedule in SCHEDULES if schedule != args.schedule]
+            runs += [(args.policy, args.schedule, rotation) for rotation in ROTATIONS if rotation != args.rotation]
+        reports = [simulate(songs, events, args.hours, workdir, policy, args.coin_value,
+                            args.starvation_minutes, args.repeat_window_minutes, args.seed, schedule, rotation)
+                   for policy, schedule, rotation in runs]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(reports if args.compare_policies else reports[0], indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Search Benchmark
+Times the GUI search window's indexes on synthetic libraries: building them at start-up and
+answering each keystroke of simulated patron searches, and fails when a keystroke's p99
+latency is over budget.
+
+Each session types a query one key at a time, as on the search window's keypad, with a fresh
+search per session:
+    title_prefix     the start of a title (PrefixIndex)
+    artist_prefix    the start of an artist (PrefixIndex)
+    song_substring   a few words from inside a title, artist or album (NgramIndex)
+    artist_fuzzy     an artist with a typo in one word (FuzzyIndex)
+
+Titles are made unique with a number, like the mostly distinct titles of a real library. The
+synthetic library's artists share a couple of dozen words, so artist_fuzzy searches a separate
+list of artists made of invented words (--artists of them, 50,000 by default).
+
+Usage:
+    python benchmarks/search_benchmarks.py
+    python benchmarks/search_benchmarks.py --sizes 200000 --budget title_prefix=0.5 --output search.json
+    python benchmarks/search_benchmarks.py --artists 100000 --budget artist_fuzzy=10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+BENCHMARKS_DIR: str = os.path.dirname(os.path.realpath(__file__))
+REPO_ROOT: str = os.path.dirname(BENCHMARKS_DIR)
+GUI_DIR: str = os.path.join(REPO_ROOT, 'convergence_jukebox_2026_gui_renewal')
+sys.path.insert(0, GUI_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from song_library_module import Library  # noqa: E402
+from song_search_module import (FuzzyIndex, FuzzySearch, NgramIndex, NgramSearch, PrefixIndex,  # noqa: E402
+                                PrefixSearch)
+from synthetic_library import generate_song_list  # noqa: E402
+
+DEFAULT_SIZES: List[int] = [10000, 200000]
+DEFAULT_ARTISTS: int = 50000
+# p99 per keystroke, in milliseconds
+DEFAULT_BUDGETS: Dict[str, float] = {
+    'title_prefix': 1.0,
+    'artist_prefix': 1.0,
+    'song_substring': 50.0,
+    'artist_fuzzy': 20.0
+}
+KEYPAD: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890 -'"
+SYLLABLES: List[str] = [consonant + vowel for consonant in 'bcdfghklmnprstvwz' for vowel in 'aeiou'] + ['th', 'st', 'ng']
+
+
+def _typed(text: str, max_keys: int) -> str:
+    """What a patron would type for text on the keypad (upper case, keypad characters only)"""
+    return ''.join(char for char in text.upper() if char in KEYPAD)[:max_keys]
+
+
+def _substring_query(rng: random.Random, song: Dict[str, Any], max_keys: int) -> str:
+    """A run of words from inside a song's title, artist or album"""
+    words = song[rng.choice(('title', 'artist', 'album'))].split()
+    start = rng.randrange(len(words))
+    return _typed(' '.join(words[start:]), max_keys)
+
+
+def _invented_artists(rng: random.Random, count: int) -> List[str]:
+    """Distinct artist names of one to three invented words, like a large real library's"""
+    artists: set = set()
+    while len(artists) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                 for _ in range(rng.randint(1, 3))]
+        artists.add(' '.join(words))
+    return sorted(artists)
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    """text with one wrong, missing, extra or swapped letter in one of its longer words"""
+    words = text.split()
+    long_words = [number for number, word in enumerate(words) if len(word) >= 4] or [0]
+    number = rng.choice(long_words)
+    word = words[number]
+    position = rng.randrange(1, len(word))
+    letter = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    words[number] = rng.choice([
+        word[:position] + letter + word[position + 1:],
+        word[:position] + word[position + 1:],
+        word[:position] + letter + word[position:],
+        word[:position - 1] + word[position] + word[position - 1] + word[position + 1:]
+    ])
+    return ' '.join(words)
+
+
+def _keystroke_latencies(new_search: Callable[[], Any], queries: List[str]) -> List[float]:
+    """Seconds taken by each keystroke of each query, typed one key at a time"""
+    latencies: List[float] = []
+    for query in queries:
+        search = new_search()
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            search.search(query[:length])
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        'keystrokes': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000.0, 4),
+        'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000.0, 4),
+        'max_ms': round(ordered[-1] * 1000.0, 4)
+    }
+
+
+def _timed(build: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    built = build()
+    return built, round((time.perf_counter() - start) * 1000.0, 2)
+
+
+def benchmark_fuzzy(artist_count: int, sessions: int, seed: int) -> Dict[str, Any]:
+    """Index build time and keystroke latency of typo-tolerant artist search"""
+    rng = random.Random(seed)
+    artists = _invented_artists(rng, artist_count)
+    queries = [_typed(_typo(rng, rng.choice(artists)), 16) for _ in range(sessions)]
+    artist_index, _ = _timed(lambda: PrefixIndex(artists))
+    fuzzy_index, fuzzy_build_ms = _timed(lambda: FuzzyIndex(artists))
+    found = sum(1 for query in queries if FuzzySearch(fuzzy_index, PrefixSearch(artist_index)).search(query)[1])
+    return {
+        'artists': artist_count,
+        'build_ms': {'artist_fuzzy': fuzzy_build_ms},
+        'found_percent': round(100.0 * found / max(1, len(queries)), 1),
+        'keystroke': {
+            'artist_fuzzy': _latency_summary(_keystroke_latencies(
+                lambda: FuzzySearch(fuzzy_index, PrefixSearch(artist_index)), queries))
+        }
+    }
+
+
+def benchmark_size(track_count: int, sessions: int, seed: int) -> Dict[str, Any]:
+    """Index build times and keystroke latencies for one library size"""
+    songs = generate_song_list(track_count, 'music', seed=seed)
+    for song in songs:
+        song['title'] = f"{song['title']} {song['number']}"
+    library = Library(songs)
+    titles = library.column('title')
+    artists = sorted(library.distinct('artist'))
+    rng = random.Random(seed)
+    title_queries = [_typed(rng.choice(titles), 12) for _ in range(sessions)]
+    artist_queries = [_typed(rng.choice(artists), 12) for _ in range(sessions)]
+    substring_queries = [_substring_query(rng, rng.choice(songs), 12) for _ in range(sessions)]
+
+    # the GUI reads the title order from MusicMasterSongList.bin
+    title_order = library.sort_order('title')
+    title_index, title_build_ms = _timed(lambda: PrefixIndex(titles, title_order))
+    artist_index, artist_build_ms = _timed(lambda: PrefixIndex(artists))
+    song_index, song_build_ms = _timed(lambda: NgramIndex(library))
+    return {
+        'tracks': track_count,
+        'artists': len(artists),
+        'build_ms': {'title_prefix': title_build_ms, 'artist_prefix': artist_build_ms,
+                     'song_substring': song_build_ms},
+        'keystroke': {
+            'title_prefix': _latency_summary(_keystroke_latencies(lambda: PrefixSearch(title_index), title_queries)),
+            'artist_prefix': _latency_summary(_keystroke_latencies(lambda: PrefixSearch(artist_index), artist_queries)),
+            'song_substring': _latency_summary(_keystroke_latencies(
+                lambda: NgramSearch(song_index, PrefixSearch(title_index)), substring_queries))
+        }
+    }
+
+
+def check_budgets(results: Dict[str, Any], budgets: Dict[str, float]) -> List[str]:
+    """List the searches whose p99 keystroke latency is over budget"""
+    failures: List[str] = []
+    for size, result in results.items():
+        for name, latency in result['keystroke'].items():
+            status = 'ok'
+            budget_ms = budgets[name]
+            if latency['p99_ms'] > budget_ms:
+                status = 'OVER BUDGET'
+                failures.append(f"{name} at {size} tracks p99 {latency['p99_ms']}ms > {budget_ms}ms")
+            print(f"{size:>14} {name:<16} p99 {latency['p99_ms']:>8.4f}ms  max {latency['max_ms']:>8.4f}ms  {status}",
+                  file=sys.stderr)
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Convergence Jukebox search benchmark')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma separated library sizes (default: 10000,200000)')
+    parser.add_argument('--artists', type=int, default=DEFAULT_ARTISTS,
+                        help='Invented artists for the typo-tolerant search (0 to skip)')
+    parser.add_argument('--sessions', type=int, default=500, help='Searches typed per library size')
+    parser.add_argument('--seed', type=int, default=2026, help='Random seed for the library and the searches')
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=MS',
+                        help='Override a p99 keystroke budget, e.g. title_prefix=0.5 (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS)
+    for override in args.budget:
+        name, _, value = override.partition('=')
+        if name not in budgets:
+            parser.error(f'unknown budget {name}')
+        budgets[name] = float(value)
+
+    results: Dict[str, Any] = {}
+    for size in (int(size) for size in args.sizes.split(',') if size):
+        print(f'Benchmarking search at {size} tracks...', file=sys.stderr)
+        results[str(size)] = benchmark_size(size, args.sessions, args.seed)
+    if args.artists:
+        print(f'Benchmarking typo-tolerant search of {args.artists} artists...', file=sys.stderr)
+        results[f'{args.artists} artists'] = benchmark_fuzzy(args.artists, args.sessions, args.seed)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sessions': args.sessions,
+            'budgets_ms': budgets
+        },
+        'results': results
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    failures = check_budgets(results, budgets)
+    if failures:
+        print(f"Search budget exceeded: {'; '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Startup Benchmark
+Tracks how long the engine and the GUI take to start, using `python -X importtime`, and
+fails when a start-up budget is exceeded or a heavy dependency is imported before it is used.
+
+Each measurement runs in a fresh interpreter:
+    engine_import      import of main_jukebox_engine_2026 (-X importtime cumulative time)
+    engine_first_note  process start to the first play_song() call on a warm start of a
+                       synthetic library with the fake audio backend (wall time)
+    gui_imports        the GUI's top-level imports, i.e. everything loaded before the first
+                       window is built (-X importtime). Skipped when FreeSimpleGUI or another
+                       GUI dependency is not installed
+
+Heavy modules (libvlc, Pillow, psutil, TinyTag, NumPy, multiprocessing, urllib.request) must
+not be loaded at the engine's first note or by the GUI's imports; they are imported on first
+use.
+
+Usage:
+    python benchmarks/startup_benchmarks.py
+    python benchmarks/startup_benchmarks.py --budget engine_first_note=800 --output startup.json
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR: str = os.path.dirname(os.path.realpath(__file__))
+REPO_ROOT: str = os.path.dirname(BENCHMARKS_DIR)
+ENGINE_DIR: str = os.path.join(REPO_ROOT, 'convergence_jukebox_2026_player_renewal')
+GUI_DIR: str = os.path.join(REPO_ROOT, 'convergence_jukebox_2026_gui_renewal')
+GUI_FILE: str = os.path.join(GUI_DIR, '0.67 - main_jukebox_GUI_2026.py')
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from synthetic_library import write_library  # noqa: E402
+
+# Budgets in milliseconds (medians)
+DEFAULT_BUDGETS: Dict[str, float] = {
+    'engine_import': 250.0,
+    'engine_first_note': 1500.0,
+    'gui_imports': 600.0
+}
+
+HEAVY_MODULES: List[str] = ['vlc', 'PIL', 'psutil', 'tinytag', 'numpy', 'multiprocessing', 'urllib.request']
+
+STARTUP_CONFIG: Dict[str, Any] = {
+    "audio": {"backend": "fake"},
+    "console": {"colors_enabled": False, "show_system_info": False, "verbose": False},
+    "health": {"check": False}
+}
+
+FIRST_NOTE_SCRIPT: str = '''
+import contextlib, io, json, os, sys
+sys.path.insert(0, {engine_dir!r})
+from audio_backend_module import FakeAudioBackend
+from main_jukebox_engine_2026 import JukeboxEngine
+
+class FirstNoteEngine(JukeboxEngine):
+    def play_song(self, song_file_name, song_id=None):
+        sys.__stdout__.write(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+        sys.__stdout__.flush()
+        os._exit(0)
+
+with contextlib.redirect_stdout(io.StringIO()):
+    FirstNoteEngine(audio_backend=FakeAudioBackend(), dir_path={base_dir!r}).run()
+os._exit(1)
+'''
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int, int]]:
+    """Parse -X importtime output into {module: (depth, self_us, cumulative_us)}, depth 0 being top level"""
+    timings: Dict[str, Tuple[int, int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        timings[name.strip()] = (depth, int(self_us), int(cumulative_us))
+    return timings
+
+
+def _import_statements(file_path: str) -> List[str]:
+    """The top-level import statements of a script, in order"""
+    with open(file_path, 'r', encoding='utf-8') as script_file:
+        tree = ast.parse(script_file.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def _run_importtime(code: str, cwd: str) -> Tuple[Optional[float], Dict[str, Tuple[int, int, int]], str]:
+    """Run code with -X importtime in a fresh interpreter
+
+    Returns:
+        Tuple: (total milliseconds, per-module timings, stdout), total None if the code failed
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd,
+                            capture_output=True, text=True)
+    timings = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        return None, timings, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+    return sum(cumulative for depth, _, cumulative in timings.values() if depth == 0) / 1000.0, timings, result.stdout
+
+
+def _slowest(timings: Dict[str, Tuple[int, int, int]], depth: int, count: int = 8) -> List[Dict[str, Any]]:
+    """The slowest imports at one nesting depth"""
+    ranked = sorted(((name, cumulative) for name, (module_depth, _, cumulative) in timings.items()
+                     if module_depth == depth), key=lambda item: item[1], reverse=True)[:count]
+    return [{'module': name, 'ms': round(cumulative / 1000.0, 2)} for name, cumulative in ranked]
+
+
+def _summary(runs: List[float]) -> Dict[str, Any]:
+    return {'median_ms': round(statistics.median(runs), 2), 'min_ms': round(min(runs), 2),
+            'runs': [round(run, 2) for run in runs]}
+
+
+def benchmark_engine_import(repeat: int) -> Dict[str, Any]:
+    """-X importtime of the engine module"""
+    runs: List[float] = []
+    timings: Dict[str, Tuple[int, int, int]] = {}
+    for _ in range(repeat):
+        total, timings, error = _run_importtime('import main_jukebox_engine_2026', ENGINE_DIR)
+        if total is None:
+            return {'skipped': error}
+        runs.append(timings.get('main_jukebox_engine_2026', (0, 0, 0))[2] / 1000.0)
+    result = _summary(runs)
+    # The engine's own imports are nested one level under it
+    result['slowest_imports'] = _slowest(timings, depth=1)
+    result['heavy_modules_loaded'] = sorted(name for name in HEAVY_MODULES if name in timings)
+    return result
+
+
+def benchmark_engine_first_note(repeat: int, tracks: int, workdir: str) -> Dict[str, Any]:
+    """Wall time from interpreter start to the first play_song() on a warm start"""
+    base_dir = os.path.join(workdir, f'first_note_{tracks}')
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, 'jukebox_config.json'), 'w') as config_file:
+        json.dump(STARTUP_CONFIG, config_file)
+    write_library(base_dir, tracks)
+    script = FIRST_NOTE_SCRIPT.format(engine_dir=ENGINE_DIR, heavy=HEAVY_MODULES, base_dir=base_dir)
+    # One untimed run turns the cold scan into the warm start being measured
+    subprocess.run([sys.executable, '-c', script], cwd=base_dir, capture_output=True)
+    runs: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', script], cwd=base_dir, capture_output=True, text=True)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if result.returncode != 0:
+            message = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'no song was played'
+            return {'skipped': message}
+        runs.append(elapsed)
+        heavy = json.loads(result.stdout)
+    result_summary = _summary(runs)
+    result_summary['tracks'] = tracks
+    result_summary['heavy_modules_loaded'] = heavy
+    return result_summary
+
+
+def benchmark_gui_imports(repeat: int) -> Dict[str, Any]:
+    """-X importtime of the GUI's top-level imports - what is loaded before its first window"""
+    code = '\n'.join(_import_statements(GUI_FILE))
+    runs: List[float] = []
+    timings: Dict[str, Tuple[int, int, int]] = {}
+    for _ in range(repeat):
+        total, timings, error = _run_importtime(code, GUI_DIR)
+        if total is None:
+            return {'skipped': error}
+        runs.append(total)
+    result = _summary(runs)
+    result['slowest_imports'] = _slowest(timings, depth=0)
+    result['heavy_modules_loaded'] = sorted(name for name in HEAVY_MODULES if name in timings)
+    return result
+
+
+def check_budgets(results: Dict[str, Any], budgets: Dict[str, float]) -> List[str]:
+    """List the measurements over budget or loading heavy modules early"""
+    failures: List[str] = []
+    for name, result in results.items():
+        if 'skipped' in result:
+            print(f"{name:<20} skipped: {result['skipped']}", file=sys.stderr)
+            continue
+        budget = budgets.get(name)
+        status = 'ok'
+        if budget is not None and result['median_ms'] > budget:
+            status = 'OVER BUDGET'
+            failures.append(f"{name} {result['median_ms']}ms > {budget}ms")
+        if result['heavy_modules_loaded']:
+            status = 'HEAVY IMPORTS'
+            failures.append(f"{name} loads {', '.join(result['heavy_modules_loaded'])}")
+        print(f"{name:<20} {result['median_ms']:>9.1f}ms  budget {budget}ms  {status}", file=sys.stderr)
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Convergence Jukebox start-up benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+    parser.add_argument('--tracks', type=int, default=1000, help='Library size for engine_first_note')
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=MS',
+                        help='Override a budget, e.g. engine_first_note=800 (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS)
+    for override in args.budget:
+        name, _, value = override.partition('=')
+        if name not in budgets:
+            parser.error(f'unknown budget {name}')
+        budgets[name] = float(value)
+
+    workdir = tempfile.mkdtemp(prefix='jukebox_startup_')
+    try:
+        results: Dict[str, Any] = {
+            'engine_import': benchmark_engine_import(args.repeat),
+            'engine_first_note': benchmark_engine_first_note(args.repeat, args.tracks, workdir),
+            'gui_imports': benchmark_gui_imports(args.repeat)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+            'budgets_ms': budgets
+        },
+        'results': results
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    failures = check_budgets(results, budgets)
+    if failures:
+        print(f"Start-up budget exceeded: {'; '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Synthetic Library Generator
+Builds deterministic MusicMasterSongList data and tiny MP3 fixtures for engine benchmarks
+"""
+import json
+import os
+import random
+import struct
+from typing import Any, Dict, List
+
+# Word pools used to build artist, title and album names
+ARTIST_WORDS: List[str] = ['Crypts', 'Savage', 'Thread', 'Mae', 'Velvet', 'Daylight', 'Corner', 'Pizza',
+                           'Butter', 'Willow', 'Medusa', 'Claw', 'Borrow', 'Drink', 'Moon', 'Federal',
+                           'Groove', 'Jive', 'Ruby', 'Spark', 'Nimbus', 'Coral', 'Roulette', 'Warwick']
+TITLE_WORDS: List[str] = ['Full', 'Moon', 'In', 'The', 'Sky', 'Ate', 'A', 'Pizza', 'Loose', 'Spend',
+                          'Beer', 'Till', 'Day', 'That', 'Corner', 'Man', 'Claw', 'Willow', 'Night',
+                          'Train', 'Rocket', 'Heart', 'Shake', 'Baby', 'Blue', 'Rain', 'Twist']
+GENRES: List[str] = ['Rock', 'Soul', 'Country', 'Blues', 'Surf', 'Garage', 'Rockabilly', 'Jazz']
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding, stereo: 417 byte frames
+MP3_FRAME_HEADER: bytes = b'\xff\xfb\x90\x00'
+MP3_FRAME_LENGTH: int = 417
+
+
+def _name(rng: random.Random, words: List[str], low: int, high: int) -> str:
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(low, high)))
+
+
+def generate_song_list(track_count: int, music_dir: str, seed: int = 2026) -> List[Dict[str, str]]:
+    """Generate a MusicMasterSongList in the engine's format
+
+    Args:
+        track_count (int): Number of tracks to generate
+        music_dir (str): Directory used for each track's 'location'
+        seed (int): Random seed so every run produces the same library
+
+    Returns:
+        List[Dict[str, str]]: Song dictionaries keyed like the engine's master list
+    """
+    rng = random.Random(seed)
+    artist_count = max(1, track_count // 12)
+    artists = [_name(rng, ARTIST_WORDS, 1, 3) + f' {n}' for n in range(artist_count)]
+    songs: List[Dict[str, str]] = []
+    for number in range(track_count):
+        artist = rng.choice(artists)
+        title = _name(rng, TITLE_WORDS, 1, 5)
+        genres = rng.sample(GENRES, rng.randint(1, 2))
+        if rng.random() < 0.02:
+            genres.append('norandom')
+        seconds = rng.randint(95, 420)
+        songs.append({
+            'number': number,
+            'location': os.path.join(music_dir, f'{artist} - {title} {number}.mp3'),
+            'title': title,
+            'artist': artist,
+            'album': _name(rng, TITLE_WORDS, 1, 3),
+            'year': str(rng.randint(1950, 1999)),
+            'comment': ' '.join(genres),
+            'duration': f'{seconds // 60:02d}:{seconds % 60:02d}'
+        })
+    return songs
+
+
+def _id3_text_frame(frame_id: str, text: str) -> bytes:
+    payload = b'\x00' + text.encode('latin-1', 'replace')
+    return frame_id.encode('ascii') + struct.pack('>I', len(payload)) + b'\x00\x00' + payload
+
+
+def _id3_comment_frame(text: str) -> bytes:
+    payload = b'\x00' + b'eng' + b'\x00' + text.encode('latin-1', 'replace')
+    return b'COMM' + struct.pack('>I', len(payload)) + b'\x00\x00' + payload
+
+
+def _syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7f, (value >> 14) & 0x7f, (value >> 7) & 0x7f, value & 0x7f])
+
+
+def build_mp3_bytes(song: Dict[str, Any], frames: int = 2) -> bytes:
+    """Build a tiny but valid MP3: an ID3v2.3 tag followed by silent MPEG frames
+
+    Args:
+        song (Dict[str, Any]): Song dictionary supplying the tag values
+        frames (int): Number of audio frames to append
+
+    Returns:
+        bytes: The file contents
+    """
+    tag_body = b''.join([
+        _id3_text_frame('TIT2', song['title']),
+        _id3_text_frame('TPE1', song['artist']),
+        _id3_text_frame('TALB', song['album']),
+        _id3_text_frame('TYER', song['year']),
+        _id3_comment_frame(song['comment']),
+    ])
+    header = b'ID3\x03\x00\x00' + _syncsafe(len(tag_body))
+    frame = MP3_FRAME_HEADER + b'\x00' * (MP3_FRAME_LENGTH - len(MP3_FRAME_HEADER))
+    return header + tag_body + frame * frames
+
+
+def write_mp3_fixtures(songs: List[Dict[str, Any]], frames: int = 2) -> int:
+    """Write one tiny MP3 per song at its 'location', skipping files that already exist
+
+    Returns:
+        int: Number of files written
+    """
+    written = 0
+    for song in songs:
+        location = song['location']
+        if os.path.exists(location):
+            continue
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        with open(location, 'wb') as mp3_file:
+            mp3_file.write(build_mp3_bytes(song, frames))
+        written += 1
+    return written
+
+
+def write_library(base_dir: str, track_count: int, seed: int = 2026, with_mp3_files: bool = True,
+                  with_song_list: bool = True) -> List[Dict[str, str]]:
+    """Create a complete engine directory: music folder, master list and check file
+
+    Args:
+        base_dir (str): Engine directory (passed to JukeboxEngine(dir_path=...))
+        track_count (int): Number of tracks
+        seed (int): Random seed
+        with_mp3_files (bool): Write MP3 fixtures into base_dir/music
+        with_song_list (bool): Write MusicMasterSongList.txt and its check file (warm start)
+
+    Returns:
+        List[Dict[str, str]]: The generated song list
+    """
+    music_dir = os.path.join(base_dir, 'music')
+    os.makedirs(music_dir, exist_ok=True)
+    songs = generate_song_list(track_count, music_dir, seed)
+    if with_mp3_files:
+        write_mp3_fixtures(songs)
+    if with_song_list:
+        with open(os.path.join(base_dir, 'MusicMasterSongList.txt'), 'w') as master_list_file:
+            json.dump(songs, master_list_file)
+        with open(os.path.join(base_dir, 'MusicMasterSongListCheck.txt'), 'w') as check_file:
+            json.dump(len(songs), check_file)
+    return songs
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate a synthetic jukebox library')
+    parser.add_argument('base_dir', help='Directory to create the library in')
+    parser.add_argument('--tracks', type=int, default=1000, help='Number of tracks')
+    parser.add_argument('--seed', type=int, default=2026, help='Random seed')
+    parser.add_argument('--no-mp3', action='store_true', help='Only write MusicMasterSongList.txt')
+    args = parser.parse_args()
+    library = write_library(args.base_dir, args.tracks, args.seed, with_mp3_files=not args.no_mp3)
+    print(f'Wrote {len(library)} tracks to {args.base_dir}')
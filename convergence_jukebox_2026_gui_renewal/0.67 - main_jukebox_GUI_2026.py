@@ -1,22 +1,11 @@
-from calendar import c
-from datetime import datetime, timedelta # required for logging timestamp
-from operator import itemgetter
 import json
 import os
-from token import NUMBER
 import random
 import FreeSimpleGUI as sg
 import threading
 import time
 from queue import Queue, Empty
-from gc import disable
-from operator import itemgetter
-from PIL import Image
-from PIL import ImageDraw
-from PIL import ImageFont
-import textwrap
 import sys
-import vlc
 from info_screen_layout_module import create_info_screen_layout
 from font_size_window_updates_module import reset_button_fonts, update_selection_button_text, adjust_button_fonts_by_length, create_font_size_window_updates
 from upcoming_selections_update_module import update_upcoming_selections
@@ -30,33 +19,33 @@ from control_button_screen_layout_module import create_control_button_screen_lay
 from search_window_button_layout_module import create_search_window_button_layout
 from popup_45rpm_song_selection_code_module import display_45rpm_popup
 from popup_45rpm_now_playing_code_module import display_45rpm_now_playing_popup
+from audio_backend_module import create_sound_effect_player
+from buffered_log_writer_module import create_log_writer
+from library_health_module import load_health_report, quarantined_song_ids
+from song_library_module import Library, open_library_snapshot
+from song_search_module import FuzzyIndex, FuzzySearch, NgramIndex, NgramSearch, PrefixIndex, PrefixSearch
 
-# Helper function to create VLC MediaPlayer with suppressed error messages
-def create_vlc_player_silent(file_path):
-    """Create VLC MediaPlayer while suppressing VLC's C-level error/warning messages.
-
-    VLC prints errors at the C library level (not Python level), so we need to redirect
-    file descriptors 2 (stderr) and 1 (stdout) at the OS level to suppress the messages.
-    """
-    # Save original file descriptors
-    old_stdout = os.dup(1)  # stdout file descriptor
-    old_stderr = os.dup(2)  # stderr file descriptor
-
+# Audio backend shared with the engine - set "audio": {"backend": "fake"} in jukebox_config.json
+# to run the GUI without a sound device
+gui_config = {}
+if os.path.exists('jukebox_config.json'):
     try:
-        # Redirect stdout and stderr to /dev/null using file descriptors
-        with open(os.devnull, 'w') as devnull:
-            os.dup2(devnull.fileno(), 1)  # Redirect stdout
-            os.dup2(devnull.fileno(), 2)  # Redirect stderr
-            # Create VLC player (this will now produce no output)
-            player = vlc.MediaPlayer(file_path)
-    finally:
-        # Always restore original file descriptors
-        os.dup2(old_stdout, 1)
-        os.dup2(old_stderr, 2)
-        os.close(old_stdout)
-        os.close(old_stderr)
+        with open('jukebox_config.json', 'r') as gui_config_open:
+            gui_config = json.load(gui_config_open)
+    except (IOError, json.JSONDecodeError):
+        gui_config = {}
+audio_backend_name = gui_config.get('audio', {}).get('backend', 'vlc')
+# Background JSON-lines log writer shared with the engine - log() never blocks the event loop
+gui_log_writer = create_log_writer('log.txt', 'gui', gui_config.get('logging'))
 
-    return player
+# Helper function to create an audio player with suppressed error messages
+def create_audio_player_silent(file_path):
+    """Create an audio backend player loaded with file_path.
+
+    With the VLC backend, libvlc prints errors at the C library level (not Python level),
+    so file descriptors 1 and 2 are redirected at the OS level while the player is created.
+    """
+    return create_sound_effect_player(file_path, audio_backend_name)
 
 global selection_window_number
 global jukebox_selection_window
@@ -73,21 +62,11 @@ active_popup_window = None
 popup_start_time = None
 popup_duration = None
 UpcomingSongPlayList = []
-all_songs_list = []
 all_artists_list = []
 dir_path = os.path.dirname(os.path.realpath(__file__))
 #  Check for files on disk. If they dont exist, create them
-#  Create date and time stamp for log file
-now = datetime.now()
-rounded_now = now + timedelta(seconds=0.5)
-rounded_now = rounded_now.replace(microsecond=0)
-now = rounded_now
-if not os.path.exists('log.txt'):
-    with open('log.txt', 'w') as log:
-        log.write(str(now) + ' Jukebox GUI Started - New Log File Created,')
-else:
-    with open('log.txt', 'a') as log:
-        log.write('\n' + str(now) + ', Jukebox GUI Restarted,')
+#  The log (log.txt or its segments in logs/) is created by the log writer on its first batch
+gui_log_writer.log('INFO', 'gui_started', new_log_file=not gui_log_writer.log_exists())
 if not os.path.exists('the_bands.txt'):
     with open('the_bands.txt', 'w') as TheBandsTextOpen:
         # Band names to have the added to them, in lower case separated by commas in thebands.txt file
@@ -99,30 +78,27 @@ if not os.path.exists('the_exempted_bands.txt'):
         # Band names be exempted from having the added to them, in proper case separated by line return in the_exempted_bands.txt file
         TheExemptedBandsText = "Place Band Names Here In Proper Case With Each Band Placed On Separate Line With No Quotes"
         json.dump(TheExemptedBandsText, TheExemptedBandsTextOpen)
-#  open MusicMasterSongList dictionary
-with open('MusicMasterSongList.txt', 'r') as MusicMasterSongListOpen:
-    MusicMasterSongList = json.load(MusicMasterSongListOpen)
-#  sort MusicMasterSongList dictionary by artist
-MusicMasterSongList = sorted(MusicMasterSongList, key=itemgetter('artist'))
-with open('MusicMasterSongList.txt', 'r') as MusicMasterSongListOpen:
-    MusicMasterSongList = json.load(MusicMasterSongListOpen)
-#  sort MusicMasterSongList dictionary by artist
-MusicMasterSongDict = sorted(MusicMasterSongList, key=itemgetter('artist'))
-# MusicMasterSongList*=0
-master_songlist_number = len(MusicMasterSongDict)
-counter = 0
-for counter in range(master_songlist_number):
-    all_songs_list.append(list(MusicMasterSongDict[counter].values()))
-MusicMasterSongDict*=0    
-artist_songlist_number = len(all_songs_list)
-counter = 0
-for counter in range(artist_songlist_number):
-    all_artists_list.append(all_songs_list[counter][3])
-all_songs_list*=0 
-# Important Delete duplicates from all_artists_list
-all_artists_list = list(set(all_artists_list)) # https://bit.ly/4cZ7A6R
-# Sort all_artists_list
-all_artists_list = sorted(all_artists_list)
+#  open MusicMasterSongList: map the engine's binary snapshot of it when that is up to date,
+#  otherwise parse the JSON into a columnar Library (rows read as song['artist'] either way)
+MusicMasterSongList = open_library_snapshot(gui_config.get('paths', {}).get('library_snapshot_file', 'MusicMasterSongList.bin'),
+                                            'MusicMasterSongList.txt')
+if MusicMasterSongList is None:
+    with open('MusicMasterSongList.txt', 'r') as MusicMasterSongListOpen:
+        MusicMasterSongList = Library(json.load(MusicMasterSongListOpen))
+#  leave songs the engine's health check found unplayable out of the selection grid
+quarantined_songs = quarantined_song_ids(load_health_report(gui_config.get('paths', {}).get('health_report_file', 'HealthReport.json')))
+if quarantined_songs:
+    MusicMasterSongList = MusicMasterSongList.select(row for row, song_id in enumerate(MusicMasterSongList.column('id'))
+                                                     if song_id not in quarantined_songs)
+#  number of songs on the selection grid, for the info screen
+master_songlist_number = len(MusicMasterSongList)
+#  artists are interned in the library, so its distinct artists are the artist list
+all_artists_list = sorted(MusicMasterSongList.distinct('artist'))
+#  row of each song by location, for the now-playing lookup
+song_row_by_location = MusicMasterSongList.row_index('location')
+#  sorted, accent-folded titles and artists for the search window (titles in the snapshot's title order)
+title_search_index = PrefixIndex(MusicMasterSongList.column('title'), MusicMasterSongList.sort_order('title'))
+artist_search_index = PrefixIndex(all_artists_list)
 find_list = all_artists_list
 
 # Queue and thread for handling file I/O operations to prevent event loop freezing
@@ -142,6 +118,8 @@ def file_io_worker_thread():
                 paid_music_file_path = task.get('paid_music_file_path')
                 PaidMusicPlayList = task.get('PaidMusicPlayList')
                 song_info = task.get('song_info')  # tuple of (artist, title)
+                song_number = task.get('song_number')
+                song_id = task.get('song_id')
 
                 try:
                     # Write updated PaidMusicPlayList to disk
@@ -149,10 +127,8 @@ def file_io_worker_thread():
                         json.dump(PaidMusicPlayList, f)
 
                     # Write to log file
-                    now = datetime.now()
-                    current_time = now.strftime("%H:%M:%S")
-                    with open('log.txt', 'a') as log:
-                        log.write('\n' + str(current_time) + ' ' + (str(song_info[0]) + ' - ' + str(song_info[1] + ' Selected For Play,')))
+                    gui_log_writer.log('INFO', 'song_selected', song_id=song_id, song_number=song_number,
+                                       artist=song_info[0], title=song_info[1])
 
                     print(f'Background thread: Successfully saved song selection to {paid_music_file_path}')
                 except IOError as e:
@@ -168,6 +144,19 @@ def file_io_worker_thread():
 file_io_worker = threading.Thread(target=file_io_worker_thread, daemon=True)
 file_io_worker.start()
 
+#  Trigram index for finding the keys entered anywhere in a song's title, artist, album, genre or
+#  year, and typo-tolerant index of the artists. They take a few seconds to build for a very
+#  large library, so they are built in the background and the title and artist searches match
+#  beginnings only until they are ready
+song_search_index = None
+artist_fuzzy_index = None
+def song_search_index_thread():
+    global song_search_index, artist_fuzzy_index
+    song_search_index = NgramIndex(MusicMasterSongList)
+    artist_fuzzy_index = FuzzyIndex(all_artists_list)
+
+threading.Thread(target=song_search_index_thread, daemon=True).start()
+
 def file_lookup_thread(song_playing_lookup_window):
     try:
         while True:
@@ -205,8 +194,8 @@ def main():
         if selection_window_number + 20 >= len(MusicMasterSongList):
             selection_window_number = len(MusicMasterSongList)-21
             right_arrow_selection_window['--selection_right--'].update(disabled=True)
-            #VLC Song Playback Code Begin
-            p = create_vlc_player_silent('jukebox_required_audio_files/buzz.mp3')
+            #Sound Effect Playback Code Begin
+            p = create_audio_player_silent('jukebox_required_audio_files/buzz.mp3')
             p.play()
         else:
             right_arrow_selection_window['--selection_right--'].update(disabled=False)
@@ -214,8 +203,8 @@ def main():
         if selection_window_number + 20 < 0:
             selection_window_number = 0
             left_arrow_selection_window['--selection_left--'].update(disabled=True)
-            #VLC Song Playback Code Begin
-            p = create_vlc_player_silent('jukebox_required_audio_files/buzz.mp3')
+            #Sound Effect Playback Code Begin
+            p = create_audio_player_silent('jukebox_required_audio_files/buzz.mp3')
             p.play()
         else:
             left_arrow_selection_window['--selection_left--'].update(disabled=False)
@@ -223,7 +212,7 @@ def main():
         font_size_window_updates = create_font_size_window_updates()        
         #  Update and restore selection window buttons to standard font size, then update with song data
         reset_button_fonts(jukebox_selection_window, font_size_window_updates)
-        update_selection_button_text(jukebox_selection_window, MusicMasterSongList, selection_window_number)
+        update_selection_button_text(jukebox_selection_window, MusicMasterSongList, selection_window_number, grid_song_rows)
         adjust_button_fonts_by_length(jukebox_selection_window, font_size_window_updates)
         the_bands_name_check()
     def band_names_exemptions(the_band_to_update, exempted_bands, band_to_check):
@@ -346,6 +335,9 @@ def main():
     song_playing_lookup_layout = [[sg.Text()]]
     info_screen_layout = create_info_screen_layout(master_songlist_number)
     jukebox_selection_screen_layout = create_jukebox_selection_screen_layout(MusicMasterSongList, selection_window_number, dir_path)
+    #  MusicMasterSongList row of the song on each grid slot (A1-A7, B1-B7, C1-C7); the first
+    #  screen is laid out two songs apart, later screens by update_selection_button_text()
+    grid_song_rows = [selection_window_number + 2 * slot for slot in range(21)]
     right_arrow_screen_layout = [
         [sg.Button(button_text="", key='--selection_right--', size=(100, 47), image_size=(100, 47),
                    image_filename=dir_path + '/images/lg_arrow_right.png', border_width=0, pad=(0, 0),
@@ -393,6 +385,7 @@ def main():
 
     the_bands_name_check()
     threading.Thread(target=file_lookup_thread, args=(song_playing_lookup_window,), daemon=True).start()
+    upcoming_selections_shown = []
     # Main Jukebox GUI
     while True:
         window, event, values = sg.read_all_windows()
@@ -466,6 +459,15 @@ def main():
             search_window.bind('<Escape>', '--ESC--')
             keys_entered = ''
             search_results = []
+            search_result_rows = []
+            if search_flag == "artist" and artist_fuzzy_index is not None:
+                prefix_search = FuzzySearch(artist_fuzzy_index, PrefixSearch(artist_search_index))
+            elif search_flag == "artist":
+                prefix_search = PrefixSearch(artist_search_index)
+            elif song_search_index is not None:
+                prefix_search = NgramSearch(song_search_index, PrefixSearch(title_search_index))
+            else:
+                prefix_search = PrefixSearch(title_search_index)
             # Set search window to artist if Artist search selected
             if search_flag == "artist":
                 search_window["--search_type--"].update("Search For Artist")
@@ -487,6 +489,7 @@ def main():
                     if event == "--CLEAR--":  # clear keys if clear button
                         keys_entered = ""
                         search_results = []
+                        search_result_rows = []
                         search_window["--letter_entry--"].Update(keys_entered)
                         search_window["--result_one--"].update("", visible=False, disabled=False)
                         search_window["--result_two--"].update("", visible=False)
@@ -512,18 +515,21 @@ def main():
                         if event == "--result_one--" or event == "--result_two--" or event == "--result_three--" or event == "--result_four--" or event == "--result_five--":
                             button_text = search_window[event].get_text()
                             song_search = f'{button_text}'
-                            # Code to search for song number
-                            for i in range(len(MusicMasterSongList)):                            
+                            # Song the result button shows
+                            result_index = ["--result_one--", "--result_two--", "--result_three--", "--result_four--", "--result_five--"].index(event)
+                            for i in search_result_rows[result_index:result_index + 1]:
                                 if song_search == str(MusicMasterSongList[i]['artist'] + ' - ' + str(MusicMasterSongList[i]['title'])):
                                     #Song number found
                                     # Song number assigned to song_selected_number variable
                                     song_selected_number = MusicMasterSongList[i]['number']
                                     # Code to set main jukeox selection window screen for selected song
-                                    selection_window_number = song_selected_number
+                                    # (by row: once quarantined songs are removed, song numbers no longer match rows)
+                                    selection_window_number = i
                                     selection_buttons_update(selection_window_number)
                                     # Code to update the main jukebox selection window position A1 to the selected song
                                     jukebox_selection_window['--button0_top--'].update(text = MusicMasterSongList[i]['title'])
                                     jukebox_selection_window['--button0_bottom--'].update(text = MusicMasterSongList[i]['artist'])
+                                    grid_song_rows[0] = i
                                     # Code to set main main jukebox selection window to selected song
                                     disable_a_selection_buttons()
                                     control_button_window['--A--'].update(disabled=True)
@@ -568,7 +574,8 @@ def main():
                                         # Song number assigned ot song_selected_number variable
                                         song_selected_number = MusicMasterSongList[counter]['number']
                                         # Code to set main jukeox selection window screen for selected song
-                                        selection_window_number = song_selected_number
+                                        # (by row: once quarantined songs are removed, song numbers no longer match rows)
+                                        selection_window_number = counter
                                         selection_buttons_update(selection_window_number) 
                                         # Code to restore main jukebox windows
                                         right_arrow_selection_window.UnHide()
@@ -756,101 +763,93 @@ def main():
                     print(keys_entered)
                     # Code to bring up search results based on keys entered
                     # Code to search for song title based on keys entered
-                    if search_flag == "title":                    
-                        for i, item in enumerate(MusicMasterSongList):                   
-                            find_list_search = MusicMasterSongList[i]['title']
-                            match = find_list_search.lower().find(keys_entered.lower())
-                            if match == 0:  # ensures match is from left of string
-                                search_results.append(str(MusicMasterSongList[i]['artist']) + " - " + str(MusicMasterSongList[i]['title']))
+                    # (songs with the keys in their title, artist, album, genre or year; the best five
+                    # and how many there are in all)
+                    if search_flag == "title":
+                        search_result_rows, search_result_count = prefix_search.search(keys_entered)
+                        search_results = [str(MusicMasterSongList[i]['artist']) + " - " + str(MusicMasterSongList[i]['title'])
+                                          for i in search_result_rows]
                     # Code to search for artist based on keys entered
-                    if search_flag == "artist":                        
+                    if search_flag == "artist":
                         find_list = all_artists_list
                         print(keys_entered)
-                        for i, item in enumerate(find_list):
-                            find_list_search = find_list[i]
-                            match = find_list_search.lower().find(keys_entered.lower())
-                            if match == 0:  # ensures match is from left of string
-                                search_results.append(str(find_list[i]))
+                        result_positions, search_result_count = prefix_search.search(keys_entered)
+                        search_results = [str(find_list[i]) for i in result_positions]
                     # Code to update search results on search window
-                    if len(search_results) <= 5:
+                    if search_result_count <= 5:
                         search_window["--result_one--"].update(visible=True, disabled=False)
                         search_window["--result_two--"].update(visible=True)
                         search_window["--result_three--"].update(visible=True)
                         search_window["--result_four--"].update(visible=True)
                         search_window["--result_five--"].update(visible=True)
-                    if len(search_results) <= 4:
+                    if search_result_count <= 4:
                         search_window["--result_one--"].update(visible=True, disabled=False)
                         search_window["--result_two--"].update(visible=True)
                         search_window["--result_three--"].update(visible=True)
                         search_window["--result_four--"].update(visible=True)
                         search_window["--result_five--"].update(visible=False)
-                    if len(search_results) <= 3:
+                    if search_result_count <= 3:
                         search_window["--result_one--"].update(visible=True, disabled=False)
                         search_window["--result_two--"].update(visible=True)
                         search_window["--result_three--"].update(visible=True)
                         search_window["--result_four--"].update(visible=False)
                         search_window["--result_five--"].update(visible=False)
-                    if len(search_results) <= 2:
+                    if search_result_count <= 2:
                         search_window["--result_one--"].update(visible=True, disabled=False)
                         search_window["--result_two--"].update(visible=True)
                         search_window["--result_three--"].update(visible=False)
                         search_window["--result_four--"].update(visible=False)
                         search_window["--result_five--"].update(visible=False)
-                    if len(search_results) <= 1:
+                    if search_result_count <= 1:
                         search_window["--result_one--"].update(visible=True, disabled=False)
                         search_window["--result_two--"].update(visible=False)
                         search_window["--result_three--"].update(visible=False)
                         search_window["--result_four--"].update(visible=False)
                         search_window["--result_five--"].update(visible=False)
-                    if len(search_results) == 0:
+                    if search_result_count == 0:
                         search_window["--result_one--"].update("Song Title Not On Jukebox", disabled=True)
                         search_window["--result_two--"].update(visible=False)
                         search_window["--result_three--"].update(visible=False)
                         search_window["--result_four--"].update(visible=False)
                         search_window["--result_five--"].update(visible=False)
-                    for x in range(len(search_results)):
-                        if len(search_results) == 0:
-                            search_window["--result_one--"].update("", disabled=False)
-                            search_window["--result_two--"].update("")
-                            search_window["--result_three--"].update("")
-                            search_window["--result_four--"].update("")
-                            search_window["--result_five--"].update("")
-                        if len(search_results) == 1:
+                    if search_result_count > 0:
+                        if search_result_count == 1:
                             search_window["--result_one--"].update(search_results[0], disabled=False)
                             search_window["--result_two--"].update("")
                             search_window["--result_three--"].update("")
                             search_window["--result_four--"].update("")
                             search_window["--result_five--"].update("")
-                        if len(search_results) == 2:
+                        if search_result_count == 2:
                             search_window["--result_one--"].update(search_results[0], disabled=False)
                             search_window["--result_two--"].update(search_results[1])
                             search_window["--result_three--"].update("")
                             search_window["--result_four--"].update("")
                             search_window["--result_five--"].update("")
-                        if len(search_results) == 3:
+                        if search_result_count == 3:
                             search_window["--result_one--"].update(search_results[0], disabled=False)
                             search_window["--result_two--"].update(search_results[1])
                             search_window["--result_three--"].update(search_results[2])
                             search_window["--result_four--"].update("")
                             search_window["--result_five--"].update("")
-                        if len(search_results) == 4:
+                        if search_result_count == 4:
                             search_window["--result_one--"].update(search_results[0], disabled=False)
                             search_window["--result_two--"].update(search_results[1])
                             search_window["--result_three--"].update(search_results[2])
                             search_window["--result_four--"].update(search_results[3])
                             search_window["--result_five--"].update("")
-                        if len(search_results) == 5:
+                        if search_result_count == 5:
                             search_window["--result_one--"].update(search_results[0], disabled=False)
                             search_window["--result_two--"].update(search_results[1])
                             search_window["--result_three--"].update(search_results[2])
                             search_window["--result_four--"].update(search_results[3])
                             search_window["--result_five--"].update(search_results[4])
-                        if len(search_results) > 5:
-                            search_window["--result_one--"].update(keys_entered, disabled=False)
-                            search_window["--result_two--"].update(keys_entered)
-                            search_window["--result_three--"].update(keys_entered)
-                            search_window["--result_four--"].update(keys_entered)
-                            search_window["--result_five--"].update(keys_entered)
+                        if search_result_count > 5:
+                            # more than fit: the five best
+                            search_window["--result_one--"].update(search_results[0], visible=True, disabled=False)
+                            search_window["--result_two--"].update(search_results[1], visible=True)
+                            search_window["--result_three--"].update(search_results[2], visible=True)
+                            search_window["--result_four--"].update(search_results[3], visible=True)
+                            search_window["--result_five--"].update(search_results[4], visible=True)
                 search_results = []
                 search_window["--letter_entry--"].Update(keys_entered)
                 # End of search window event loop code
@@ -875,10 +874,7 @@ def main():
             credit_amount += 1
             info_screen_window['--credits--'].Update('CREDITS ' + str(credit_amount))            
             # Add credit to log file
-            now = datetime.now()
-            current_time = now.strftime("%H:%M:%S")
-            with open('log.txt', 'a') as log:
-                log.write('\n' + str(current_time) + ' Quarter Added,')    
+            gui_log_writer.log('INFO', 'coin_inserted', credits=credit_amount)
         if event == "--1--" or (event) == "1":
             selection_entry_number = "1"
             disable_numbered_selection_buttons()
@@ -1028,8 +1024,8 @@ def main():
         if event == "--select--" or (event) == 'S':
             print("Entering Song Selected")
             if credit_amount == 0:
-                #VLC Song Playback Code Begin
-                p = create_vlc_player_silent('jukebox_required_audio_files/buzz.mp3')
+                #Sound Effect Playback Code Begin
+                p = create_audio_player_silent('jukebox_required_audio_files/buzz.mp3')
                 p.play()
                 enable_all_buttons()
                 selection_entry_letter = ""  # Used for selection entry
@@ -1044,153 +1040,75 @@ def main():
                 # Clear variables no longer needed
                 selection_entry_letter = ""
                 selection_entry_number = ""
-                if song_selected == "A1":
-                    paid_song_selected_title = (jukebox_selection_window['--button0_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button0_bottom--'].get_text())
-                if song_selected == "A2":
-                    paid_song_selected_title = (jukebox_selection_window['--button1_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button1_bottom--'].get_text())
-                if song_selected == "A3":
-                    paid_song_selected_title = (jukebox_selection_window['--button2_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button2_bottom--'].get_text())
-                if song_selected == "A4":
-                    paid_song_selected_title = (jukebox_selection_window['--button3_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button3_bottom--'].get_text())
-                if song_selected == "A5":
-                    paid_song_selected_title = (jukebox_selection_window['--button4_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button4_bottom--'].get_text())
-                if song_selected == "A6":
-                    paid_song_selected_title = (jukebox_selection_window['--button5_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button5_bottom--'].get_text())
-                if song_selected == "A7":
-                    paid_song_selected_title = (jukebox_selection_window['--button6_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button6_bottom--'].get_text())
-                if song_selected == "B1":
-                    paid_song_selected_title = (jukebox_selection_window['--button7_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button7_bottom--'].get_text())
-                if song_selected == "B2":
-                    paid_song_selected_title = (jukebox_selection_window['--button8_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button8_bottom--'].get_text())
-                if song_selected == "B3":
-                    paid_song_selected_title = (jukebox_selection_window['--button9_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button9_bottom--'].get_text())
-                if song_selected == "B4":
-                    paid_song_selected_title = (jukebox_selection_window['--button10_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button10_bottom--'].get_text())
-                if song_selected == "B5":
-                    paid_song_selected_title = (jukebox_selection_window['--button11_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button11_bottom--'].get_text())
-                if song_selected == "B6":
-                    paid_song_selected_title = (jukebox_selection_window['--button12_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button12_bottom--'].get_text())
-                if song_selected == "B7":
-                    paid_song_selected_title = (jukebox_selection_window['--button13_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button13_bottom--'].get_text())
-                if song_selected == "C1":
-                    paid_song_selected_title = (jukebox_selection_window['--button14_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button14_bottom--'].get_text())
-                if song_selected == "C2":
-                    paid_song_selected_title = (jukebox_selection_window['--button15_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button15_bottom--'].get_text())
-                if song_selected == "C3":
-                    paid_song_selected_title = (jukebox_selection_window['--button16_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button16_bottom--'].get_text())
-                if song_selected == "C4":
-                    paid_song_selected_title = (jukebox_selection_window['--button17_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button17_bottom--'].get_text())
-                if song_selected == "C5":
-                    paid_song_selected_title = (jukebox_selection_window['--button18_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button18_bottom--'].get_text())
-                if song_selected == "C6":
-                    paid_song_selected_title = (jukebox_selection_window['--button19_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button19_bottom--'].get_text())
-                if song_selected == "C7":
-                    paid_song_selected_title = (jukebox_selection_window['--button20_top--'].get_text())
-                    paid_song_selected_artist = (jukebox_selection_window['--button20_bottom--'].get_text())
+                #  grid slot of the selection: A1-A7 are slots 0-6, B1-B7 7-13 and C1-C7 14-20
+                selection_slot = None
+                if len(song_selected) == 2 and song_selected[0] in 'ABC' and song_selected[1] in '1234567':
+                    selection_slot = 'ABC'.index(song_selected[0]) * 7 + int(song_selected[1]) - 1
+                selection_made = song_selected
                 song_selected = ""
                 control_button_window['--select--'].update(disabled=True)
                 disable_numbered_selection_buttons()
-                # Check and remove The from artist name
                 try:
-                    print(f"DEBUG: paid_song_selected_title='{paid_song_selected_title}', paid_song_selected_artist='{paid_song_selected_artist}'")
-                    if str(paid_song_selected_artist).startswith('The '):
-                        paid_song_selected_artist_no_the = paid_song_selected_artist.replace('The ', '')
-                        paid_song_selected_artist = paid_song_selected_artist_no_the
-                    print(f"DEBUG: After 'The' removal: title='{paid_song_selected_title}', artist='{paid_song_selected_artist}'")
-
-                    # add selection to paid song list
-                    counter = 0
-                    song_found = False
-                    #  find library number of selected song
-                    print(f"DEBUG: Starting song search in MusicMasterSongList with {len(MusicMasterSongList)} songs")
-                    for i in MusicMasterSongList:
-                        # search for match of song in MusicMasterSongList
-                        # Truncate both sides to 22 characters for consistent matching
-                        button_title_truncated = str(paid_song_selected_title)[:22]
-                        button_artist_truncated = str(paid_song_selected_artist)[:22]
-                        library_title_truncated = str(MusicMasterSongList[counter]['title'][:22])
-                        library_artist_truncated = str(MusicMasterSongList[counter]['artist'][:22])
-
-                        print(f"DEBUG: Comparing '{button_title_truncated}' == '{library_title_truncated}' AND '{button_artist_truncated}' == '{library_artist_truncated}'")
+                    #  the row of the song on that slot, recorded when the grid was drawn
+                    counter = grid_song_rows[selection_slot] if selection_slot is not None else None
+                    song_found = counter is not None
+                    if song_found:
+                        print(f"DEBUG: {selection_made} is row {counter}")
+                        # add song to upcoming list file
+                        # UpcomingSongPlayList
+                        UpcomingSongPlayList.append(str(MusicMasterSongList[counter]['title'][:22]) + ' - ' + str(MusicMasterSongList[counter]['artist'][:22]))
+                        #  add matched song id to variable (PaidMusicPlayList is keyed by stable song id)
+                        # (falls back to the row number, which the engine still accepts, for lists without ids)
+                        song_to_add = (MusicMasterSongList[counter].get('id', MusicMasterSongList[counter]['number']))
+                        #  open PaidMusicPlaylist text file and append song number to list
+                        paid_music_file_path = os.path.join(dir_path, 'PaidMusicPlayList.txt')
 
-                        if button_title_truncated == library_title_truncated and button_artist_truncated == library_artist_truncated:
-                            song_found = True
-                            print(f"DEBUG: FOUND MATCH at counter={counter}")
-                            # add song to upcoming list file
-                            # UpcomingSongPlayList
-                            UpcomingSongPlayList.append(str(MusicMasterSongList[counter]['title'][:22]) + ' - ' + str(MusicMasterSongList[counter]['artist'][:22]))
-                            #  add matched song number to variable
-                            song_to_add = (MusicMasterSongList[counter]['number'])
-                            #  open PaidMusicPlaylist text file and append song number to list
-                            paid_music_file_path = os.path.join(dir_path, 'PaidMusicPlayList.txt')
+                        # Initialize PaidMusicPlayList with existing data or empty list
+                        try:
+                            with open(paid_music_file_path, 'r') as PaidMusicPlayListOpen:
+                                PaidMusicPlayList = json.load(PaidMusicPlayListOpen)
+                        except (FileNotFoundError, json.JSONDecodeError):
+                            # Create new list if file doesn't exist or is invalid
+                            PaidMusicPlayList = []
+                            print(f'Initializing new PaidMusicPlayList at {paid_music_file_path}')
 
-                            # Initialize PaidMusicPlayList with existing data or empty list
-                            try:
-                                with open(paid_music_file_path, 'r') as PaidMusicPlayListOpen:
-                                    PaidMusicPlayList = json.load(PaidMusicPlayListOpen)
-                            except (FileNotFoundError, json.JSONDecodeError):
-                                # Create new list if file doesn't exist or is invalid
-                                PaidMusicPlayList = []
-                                print(f'Initializing new PaidMusicPlayList at {paid_music_file_path}')
-
-                            PaidMusicPlayList.append(int(song_to_add))
-
-                            # Check for duplicate song numbers in PaidMusicPlayList
-                            # Remove duplicate song numbers from PaidMusicPlayList
-                            test_set = set(PaidMusicPlayList)
-                            if len(PaidMusicPlayList) != len(test_set):
-                                PaidMusicPlayList = list(set(PaidMusicPlayList)) # https://bit.ly/4cZ7A6R
-                                UpcomingSongPlayList.pop(-1)
-                                print('Duplicate Song Found')
-                                #VLC Song Playback Code Begin
-                                p = create_vlc_player_silent('jukebox_required_audio_files/buzz.mp3')
-                                p.play()
-                                enable_all_buttons()
-                                selection_entry_letter = ""  # Used for selection entry
-                                selection_entry_number = ""  # Used for selection entry
-                                selection_entry = ""  # Used for selection entry
-                                control_button_window['--select--'].update(disabled=True)
-                                enable_all_buttons()
-                                break
+                        PaidMusicPlayList.append(int(song_to_add))
 
+                        # Check for duplicate song ids in PaidMusicPlayList
+                        # Remove duplicate song ids from PaidMusicPlayList
+                        test_set = set(PaidMusicPlayList)
+                        if len(PaidMusicPlayList) != len(test_set):
+                            PaidMusicPlayList = list(set(PaidMusicPlayList)) # https://bit.ly/4cZ7A6R
+                            UpcomingSongPlayList.pop(-1)
+                            print('Duplicate Song Found')
+                            #Sound Effect Playback Code Begin
+                            p = create_audio_player_silent('jukebox_required_audio_files/buzz.mp3')
+                            p.play()
+                            enable_all_buttons()
+                            selection_entry_letter = ""  # Used for selection entry
+                            selection_entry_number = ""  # Used for selection entry
+                            selection_entry = ""  # Used for selection entry
+                            control_button_window['--select--'].update(disabled=True)
+                            enable_all_buttons()
+                        else:
                             # Queue file I/O operations to background thread to prevent event loop freeze
                             file_io_queue.put({
                                 'operation': 'save_song_selection',
                                 'paid_music_file_path': paid_music_file_path,
                                 'PaidMusicPlayList': PaidMusicPlayList,
-                                'song_info': (MusicMasterSongList[counter]['artist'], MusicMasterSongList[counter]['title'])
+                                'song_info': (MusicMasterSongList[counter]['artist'], MusicMasterSongList[counter]['title']),
+                                'song_number': MusicMasterSongList[counter]['number'],
+                                'song_id': int(song_to_add)
                             })
                             #  end search
                             enable_all_buttons()
                             credit_amount -= 1
                             info_screen_window['--credits--'].Update('CREDITS ' + str(credit_amount))
                             # Call 45rpm popup display function
-                            active_popup_window, popup_start_time, popup_duration = display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window)
-                            break
-                        counter += 1
+                            active_popup_window, popup_start_time, popup_duration = display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window, audio_backend_name=audio_backend_name)
 
                     if not song_found:
-                        print(f"ERROR: Song '{paid_song_selected_title}' by '{paid_song_selected_artist}' not found in music library!")
+                        print(f"ERROR: Selection '{selection_made}' is not a song on the selection grid!")
                         enable_all_buttons()
                         control_button_window['--select--'].update(disabled=True)
 
@@ -1207,50 +1125,44 @@ def main():
             global last_song_check
             with open('CurrentSongPlaying.txt', 'r') as CurrentSongPlayingOpen:
                 song_currently_playing = CurrentSongPlayingOpen.read()
-                #  search MusicMasterSonglist for location string
-                counter=0
-                for x in MusicMasterSongList:
-                    if MusicMasterSongList[counter]['location'] == song_currently_playing:
-                        # Update Jukebox Info Screen
-                        info_screen_window['--song_title--'].Update(
-                            MusicMasterSongList[counter]['title'])
-                        info_screen_window['--song_artist--'].Update(
-                            MusicMasterSongList[counter]['artist'])
-                        info_screen_window['--mini_song_title--'].Update(
-                            '  Title: ' + MusicMasterSongList[counter]['title'])
-                        info_screen_window['--mini_song_artist--'].Update(
-                            '  Artist: ' + MusicMasterSongList[counter]['artist'])
-                        info_screen_window['--year--'].Update(
-                            '  Year: ' + MusicMasterSongList[counter]['year'] + '   Length: ' +
-                            MusicMasterSongList[counter]['duration'])
-                        info_screen_window['--album--'].Update(
-                            '  Album: ' + MusicMasterSongList[counter]['album'])
-                        #  Check to see if curent song playing has changed
-                        with open('CurrentSongPlaying.txt', 'r') as CurrentSongPlayingOpen:
-                            song_currently_playing = CurrentSongPlayingOpen.read()
-                            # Set up first check
-                            if last_song_check == "":
-                                last_song_check = song_currently_playing
-                            #  Check to see if current song has changed
-                            if last_song_check != song_currently_playing:
-                                last_song_check = song_currently_playing
-                                # If song has changed remove first entry on UpcomingSongPlayList
-                                try:
-                                    UpcomingSongPlayList.pop(0)
-                                except IndexError: # Executed if no first entry in list
-                                    pass
-                                active_popup_window, popup_start_time, popup_duration = display_45rpm_now_playing_popup(MusicMasterSongList, counter, jukebox_selection_window, upcoming_selections_update)
-                        if UpcomingSongPlayList != []:
-                            # update upcoming selections on jukebox screens
-                            upcoming_selections_update()
-                        break
-                    counter +=1
+            #  look up the song's row by its location; nothing to redraw while the same song plays
+            counter = song_row_by_location.get(song_currently_playing)
+            if counter is not None and song_currently_playing != last_song_check:
+                # Update Jukebox Info Screen
+                info_screen_window['--song_title--'].Update(
+                    MusicMasterSongList[counter]['title'])
+                info_screen_window['--song_artist--'].Update(
+                    MusicMasterSongList[counter]['artist'])
+                info_screen_window['--mini_song_title--'].Update(
+                    '  Title: ' + MusicMasterSongList[counter]['title'])
+                info_screen_window['--mini_song_artist--'].Update(
+                    '  Artist: ' + MusicMasterSongList[counter]['artist'])
+                info_screen_window['--year--'].Update(
+                    '  Year: ' + MusicMasterSongList[counter]['year'] + '   Length: ' +
+                    MusicMasterSongList[counter]['duration'])
+                info_screen_window['--album--'].Update(
+                    '  Album: ' + MusicMasterSongList[counter]['album'])
+                #  The first song found is only displayed; a change of song after that starts
+                #  the next upcoming selection
+                if last_song_check != "":
+                    # If song has changed remove first entry on UpcomingSongPlayList
+                    try:
+                        UpcomingSongPlayList.pop(0)
+                    except IndexError: # Executed if no first entry in list
+                        pass
+                    active_popup_window, popup_start_time, popup_duration = display_45rpm_now_playing_popup(MusicMasterSongList, counter, jukebox_selection_window, upcoming_selections_update)
+                last_song_check = song_currently_playing
+            if UpcomingSongPlayList != upcoming_selections_shown:
+                # update upcoming selections on jukebox screens
+                upcoming_selections_update()
+                upcoming_selections_shown = list(UpcomingSongPlayList)
     right_arrow_selection_window.close()
     left_arrow_selection_window.close()
     info_screen_window.close()
     jukebox_selection_window.close()
     window_background.close()
     control_button_window.close()
+    gui_log_writer.close()
 
 if __name__ == '__main__':
 
@@ -0,0 +1,206 @@
+"""
+Buffered Log Writer Module
+Asynchronous, batched JSON-lines logging shared by the jukebox engine and the GUI.
+
+Callers hand records to log(), which only does a non-blocking put on a bounded queue. A
+background thread drains the queue, writes whole batches with a single append, and fsyncs
+the file at most every fsync_interval seconds, so neither the engine loop nor the Tk event
+loop waits on the disk. When the queue is full the record is dropped and counted; the count
+is written to the log as a 'log_records_dropped' record once there is room again.
+
+Records go to a single file or, with rotation 'day' or 'size', to indexed segments managed by
+log_segments_module. Every line is one JSON object:
+    {"ts": "2026-01-02 20:14:07", "level": "INFO", "source": "engine", "event": "song_played",
+     "song_number": 42, "artist": "...", "title": "...", "play_type": "Paid"}
+"""
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from log_segments_module import create_log_target
+
+LOG_LEVELS: Dict[str, int] = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+# Sentinel placed on the queue by close()
+_CLOSE = object()
+
+
+class BufferedLogWriter:
+    """Background JSON-lines log writer with a bounded queue
+
+    Both processes may append to the same file: every batch is written with one os.write()
+    on an O_APPEND descriptor, so lines from the engine and the GUI never interleave.
+
+    Args:
+        log_file (str): File to append records to (the segment name prefix when rotating)
+        source (str): Added to every record ('engine' or 'gui')
+        enabled (bool): When False log() discards everything and no thread is started
+        level (str): Minimum level written - DEBUG, INFO, WARNING or ERROR
+        queue_size (int): Records held in memory before new ones are dropped
+        batch_size (int): Most records written per os.write()
+        flush_interval (float): Longest a record waits in the queue, in seconds
+        fsync_interval (float): Least time between fsyncs, in seconds (0 fsyncs every batch)
+        rotation (str): 'none' writes log_file itself, 'day' or 'size' write rotating segments
+        max_segment_bytes (int): Size at which a segment is closed
+        compress (bool): gzip and index closed segments
+        segment_dir (str): Segment directory, relative to log_file's directory
+    """
+
+    def __init__(self, log_file: str, source: str, enabled: bool = True, level: str = 'INFO',
+                 queue_size: int = 1000, batch_size: int = 64, flush_interval: float = 0.5,
+                 fsync_interval: float = 5.0, rotation: str = 'none', max_segment_bytes: int = 5 * 1024 * 1024,
+                 compress: bool = True, segment_dir: str = 'logs') -> None:
+        self.log_file: str = log_file
+        self.source: str = source
+        self.enabled: bool = enabled
+        self.min_level: int = LOG_LEVELS.get(str(level).upper(), LOG_LEVELS['INFO'])
+        self.batch_size: int = max(1, int(batch_size))
+        self.flush_interval: float = flush_interval
+        self.fsync_interval: float = fsync_interval
+
+        # Counters, readable at any time (e.g. by benchmarks)
+        self.records_written: int = 0
+        self.records_dropped: int = 0
+        self.batches_written: int = 0
+        self.fsyncs: int = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._drop_lock: threading.Lock = threading.Lock()
+        self._dropped_unreported: int = 0
+        self._target: Any = create_log_target(log_file, rotation, max_segment_bytes, compress, segment_dir)
+        self._last_fsync: float = time.monotonic()
+        self._unsynced: bool = False  # batches written since the last fsync
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+
+        if self.enabled:
+            self._thread = threading.Thread(target=self._writer_thread, name=f'{source}-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def log_exists(self) -> bool:
+        """Return True if records from an earlier run are already on disk"""
+        return self._target.exists()
+
+    def log(self, level: str, event: str, timestamp: Optional[float] = None, **fields: Any) -> bool:
+        """Queue one record without blocking
+
+        Args:
+            level (str): DEBUG, INFO, WARNING or ERROR
+            event (str): Event type, e.g. 'song_played', 'coin_inserted', 'error'
+            timestamp (Optional[float]): Epoch seconds for the record (defaults to now)
+            **fields: Extra JSON-serialisable values (ids, titles, messages)
+
+        Returns:
+            bool: True if queued, False if filtered out, disabled or dropped
+        """
+        if not self.enabled or self._closed or LOG_LEVELS.get(level, LOG_LEVELS['INFO']) < self.min_level:
+            return False
+        record: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(time.time() if timestamp is None else timestamp).replace(microsecond=0).isoformat(' '),
+            'level': level,
+            'source': self.source,
+            'event': event
+        }
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.records_dropped += 1
+                self._dropped_unreported += 1
+            return False
+
+    def _collect_batch(self) -> List[Any]:
+        """Wait for the first record, then take whatever else is queued up to batch_size"""
+        try:
+            batch: List[Any] = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size and batch[-1] is not _CLOSE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_lines(self, records: List[Dict[str, Any]]) -> None:
+        """Append records as JSON lines with a single write"""
+        with self._drop_lock:
+            dropped, self._dropped_unreported = self._dropped_unreported, 0
+        if dropped:
+            records.append({'ts': datetime.now().replace(microsecond=0).isoformat(' '), 'level': 'WARNING',
+                            'source': self.source, 'event': 'log_records_dropped', 'count': dropped})
+        if not records:
+            return
+        data = ''.join(json.dumps(record, default=str) + '\n' for record in records).encode('utf-8')
+        self._target.write(data)
+        self.records_written += len(records)
+        self.batches_written += 1
+        self._unsynced = True
+
+    def _fsync(self, force: bool = False) -> None:
+        """fsync what was written, at most every fsync_interval; an idle writer never fsyncs"""
+        if force or (self._unsynced and time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._target.fsync()
+            self.fsyncs += 1
+            self._last_fsync = time.monotonic()
+            self._unsynced = False
+
+    def _writer_thread(self) -> None:
+        """Drain the queue until close() is called"""
+        closing = False
+        while not closing:
+            batch = self._collect_batch()
+            if batch and batch[-1] is _CLOSE:
+                closing = True
+                batch.pop()
+            try:
+                self._write_lines(batch)
+                self._fsync(force=closing)
+            except OSError as e:
+                print(f"Log writer error ({self.log_file}): {e}")
+        self._target.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write everything still queued, fsync and stop the writer thread"""
+        if self._closed or self._thread is None:
+            self._closed = True
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        # Blocking put is fine here: the writer thread is still draining
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+
+def create_log_writer(log_file: str, source: str, logging_config: Optional[Dict[str, Any]] = None) -> BufferedLogWriter:
+    """Create a BufferedLogWriter from the 'logging' section of jukebox_config.json
+
+    Args:
+        log_file (str): File to append records to
+        source (str): 'engine' or 'gui'
+        logging_config (Optional[Dict[str, Any]]): The config's 'logging' section
+
+    Returns:
+        BufferedLogWriter: The started writer
+    """
+    logging_config = logging_config or {}
+    return BufferedLogWriter(
+        log_file,
+        source,
+        enabled=logging_config.get('enabled', True),
+        level=logging_config.get('level', 'INFO'),
+        queue_size=logging_config.get('queue_size', 1000),
+        batch_size=logging_config.get('batch_size', 64),
+        flush_interval=logging_config.get('flush_interval', 0.5),
+        fsync_interval=logging_config.get('fsync_interval', 5.0),
+        rotation=logging_config.get('rotation', 'day'),
+        max_segment_bytes=logging_config.get('max_segment_bytes', 5 * 1024 * 1024),
+        compress=logging_config.get('compress', True),
+        segment_dir=logging_config.get('segment_dir', 'logs')
+    )
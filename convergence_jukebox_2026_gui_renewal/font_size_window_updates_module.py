@@ -10,7 +10,8 @@ def reset_button_fonts(jukebox_selection_window, font_size_window_updates):
         jukebox_selection_window[font_size_window].Widget.config(font='Helvetica 12 bold')
 
 
-def update_selection_button_text(jukebox_selection_window, MusicMasterSongList, selection_window_number):
+def update_selection_button_text(jukebox_selection_window, MusicMasterSongList, selection_window_number,
+                                 grid_song_rows=None):
     """
     Update all 21 selection buttons with song titles and artists from the master song list.
 
@@ -21,11 +22,15 @@ def update_selection_button_text(jukebox_selection_window, MusicMasterSongList,
         jukebox_selection_window: The selection window object
         MusicMasterSongList: The master list of songs with title and artist data
         selection_window_number: The starting index in the master list for this window
+        grid_song_rows: Optional list of 21 slots, filled with the master list row shown on
+            each button so a selection can be resolved without reading the button text
     """
     for button_index in range(21):
         offset = selection_window_number + button_index
         jukebox_selection_window[f'--button{button_index}_top--'].update(text=MusicMasterSongList[offset]['title'])
         jukebox_selection_window[f'--button{button_index}_bottom--'].update(text=MusicMasterSongList[offset]['artist'])
+        if grid_song_rows is not None:
+            grid_song_rows[button_index] = offset
 
 
 def adjust_button_fonts_by_length(jukebox_selection_window, font_size_window_updates):
@@ -0,0 +1,361 @@
+"""
+Library Health Module
+Finds music files that cannot be played before the engine tries to play them.
+
+Each track is probed with a few small reads instead of being decoded in full:
+    MP3   the ID3v2 tag fits in the file, and a chain of valid MPEG frame headers (each one
+          starting where the previous frame ends) is found at the start of the audio and
+          again in the middle of the file
+    FLAC  the 'fLaC' marker, a STREAMINFO block with a sample rate, metadata blocks that fit
+          in the file and a frame sync code after them
+    OGG   an 'OggS' page header at the start and another page in the middle of the file
+    M4A   an 'ftyp' box first, then top-level boxes that fit in the file and include both
+          'moov' (the track index) and 'mdat' (the audio)
+A track that fails is 'bad' and is quarantined: left out of random play and the GUI grid.
+Other formats are not probed and always pass.
+
+Verdicts are cached in HealthReport.json under each file's signature (size and modification
+time), so a rescan only probes new or changed files. The scan runs on background worker
+threads at reduced CPU priority, so it never holds up start-up or playback:
+    {"version": 1, "checked": 12, "from_cache": 4988, "bad_songs": 1, ...,
+     "quarantined": [{"id": ..., "location": ".../track.mp3", "artist": "...", "title": "...",
+                      "reason": "no_audio_frames"}],
+     "verdicts": {".../track.mp3": {"signature": [4404013, 1700000000000000000],
+                                    "status": "bad", "reason": "no_audio_frames"}}}
+
+Usage:
+    python library_health_module.py [--workers 2] [--output HealthReport.json]
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from mp3_tag_reader_module import _frame_header
+
+REPORT_VERSION: int = 1
+
+# Bytes read at each probe point
+PROBE_WINDOW_BYTES: int = 16 * 1024
+
+# Consecutive MPEG frames that must chain together at a probe point
+PROBE_FRAMES: int = 8
+
+# Niceness given to the worker threads (Linux; elsewhere they keep normal priority)
+DEFAULT_NICENESS: int = 10
+
+ID3V1_SIZE: int = 128
+
+
+class ProbeFailed(Exception):
+    """A track failed a probe; the message is the reason recorded in its verdict"""
+
+
+def _id3v2_end(track_file: Any, file_size: int) -> int:
+    """Return the offset just past any ID3v2 tags at the start of the file"""
+    offset = 0
+    while True:
+        track_file.seek(offset)
+        header = track_file.read(10)
+        if len(header) < 10 or header[:3] != b'ID3':
+            return offset
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset += 10 + size + (10 if header[5] & 0x10 else 0)
+        if offset >= file_size:
+            raise ProbeFailed('truncated_tag')
+
+
+def _frame_chain(window: bytes, position: int, audio_ends: bool) -> int:
+    """Count the MPEG frames that chain from position (at most PROBE_FRAMES)
+
+    A chain that reaches the end of the window counts as complete only when the window ends
+    where the audio does (a short track), never part-way through the file.
+    """
+    first = _frame_header(window, position)
+    frames = 0
+    while first is not None and frames < PROBE_FRAMES:
+        if position + 4 > len(window):
+            return PROBE_FRAMES if audio_ends else frames
+        header = _frame_header(window, position)
+        if header is None or header[0] != first[0]:
+            break
+        frames += 1
+        position += header[2]
+    return frames
+
+
+def _find_frame_chain(track_file: Any, offset: int, audio_end: int) -> bool:
+    """Look for PROBE_FRAMES chained frames in the window starting at offset"""
+    track_file.seek(offset)
+    window = track_file.read(min(PROBE_WINDOW_BYTES, audio_end - offset))
+    audio_ends = offset + len(window) >= audio_end
+    position = window.find(b'\xff')
+    while position != -1:
+        if _frame_chain(window, position, audio_ends) >= PROBE_FRAMES:
+            return True
+        position = window.find(b'\xff', position + 1)
+    return False
+
+
+def _probe_mp3(track_file: Any, file_size: int) -> None:
+    audio_start = _id3v2_end(track_file, file_size)
+    audio_end = file_size
+    if file_size - audio_start >= ID3V1_SIZE:
+        track_file.seek(file_size - ID3V1_SIZE)
+        if track_file.read(3) == b'TAG':
+            audio_end -= ID3V1_SIZE
+
+    if not _find_frame_chain(track_file, audio_start, audio_end):
+        raise ProbeFailed('no_audio_frames')
+    if audio_end - audio_start > 2 * PROBE_WINDOW_BYTES:
+        if not _find_frame_chain(track_file, audio_start + (audio_end - audio_start) // 2, audio_end):
+            raise ProbeFailed('corrupt_audio')
+
+
+def _probe_flac(track_file: Any, file_size: int) -> None:
+    offset = _id3v2_end(track_file, file_size)
+    track_file.seek(offset)
+    if track_file.read(4) != b'fLaC':
+        raise ProbeFailed('no_flac_marker')
+    offset += 4
+    streaminfo = True
+    while True:
+        header = track_file.read(4)
+        if len(header) < 4:
+            raise ProbeFailed('truncated_metadata')
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], 'big')
+        if streaminfo:
+            block = track_file.read(length)
+            if block_type != 0 or length != 34 or len(block) < 34:
+                raise ProbeFailed('no_streaminfo')
+            if (int.from_bytes(block[10:13], 'big') >> 4) == 0:
+                raise ProbeFailed('no_sample_rate')
+            streaminfo = False
+        offset += 4 + length
+        if offset > file_size:
+            raise ProbeFailed('truncated_metadata')
+        track_file.seek(offset)
+        if header[0] & 0x80:
+            break
+    sync = track_file.read(2)
+    if len(sync) < 2 or sync[0] != 0xFF or sync[1] & 0xFE != 0xF8:
+        raise ProbeFailed('no_audio_frames')
+
+
+def _probe_ogg(track_file: Any, file_size: int) -> None:
+    track_file.seek(0)
+    if track_file.read(5) != b'OggS\x00':
+        raise ProbeFailed('no_ogg_page')
+    if file_size > 2 * PROBE_WINDOW_BYTES:
+        track_file.seek(file_size // 2)
+        if b'OggS\x00' not in track_file.read(PROBE_WINDOW_BYTES):
+            raise ProbeFailed('corrupt_audio')
+
+
+def _probe_m4a(track_file: Any, file_size: int) -> None:
+    offset = 0
+    boxes: Set[bytes] = set()
+    while offset + 8 <= file_size:
+        track_file.seek(offset)
+        header = track_file.read(16)
+        size = int.from_bytes(header[:4], 'big')
+        box_type = header[4:8]
+        if size == 1 and len(header) == 16:
+            size = int.from_bytes(header[8:16], 'big')
+        elif size == 0:
+            size = file_size - offset
+        if not boxes and box_type != b'ftyp':
+            raise ProbeFailed('no_ftyp_box')
+        if size < 8 or offset + size > file_size:
+            raise ProbeFailed('truncated_box')
+        boxes.add(box_type)
+        offset += size
+    if b'moov' not in boxes:
+        raise ProbeFailed('no_moov_box')
+    if b'mdat' not in boxes:
+        raise ProbeFailed('no_mdat_box')
+
+
+_PROBES = {'.mp3': _probe_mp3, '.flac': _probe_flac, '.ogg': _probe_ogg, '.m4a': _probe_m4a}
+
+
+def file_signature(file_path: str) -> Optional[List[int]]:
+    """Return [size, mtime_ns] - the key a cached verdict is valid for - or None if missing"""
+    try:
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def probe_track(file_path: str) -> Dict[str, Any]:
+    """Probe one music file
+
+    Returns:
+        Dict[str, Any]: 'signature', 'status' ('ok' or 'bad') and 'reason' (None when ok)
+    """
+    signature = file_signature(file_path)
+    if signature is None:
+        return {'signature': None, 'status': 'bad', 'reason': 'missing'}
+    verdict: Dict[str, Any] = {'signature': signature, 'status': 'ok', 'reason': None}
+    try:
+        if signature[0] == 0:
+            raise ProbeFailed('empty')
+        probe = _PROBES.get(os.path.splitext(file_path)[1].lower())
+        if probe is not None:
+            with open(file_path, 'rb', buffering=0) as track_file:
+                probe(track_file, signature[0])
+    except ProbeFailed as e:
+        verdict['status'] = 'bad'
+        verdict['reason'] = str(e)
+    except OSError:
+        verdict['status'] = 'bad'
+        verdict['reason'] = 'unreadable'
+    return verdict
+
+
+def _lower_thread_priority(niceness: int) -> None:
+    """Worker initializer: give the calling thread a lower CPU priority
+
+    On Linux setpriority() with a thread id changes only that thread, so playback and the
+    rest of the engine keep their priority. Elsewhere this does nothing.
+    """
+    try:
+        current = os.getpriority(os.PRIO_PROCESS, 0)
+        if niceness > current:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError):
+        pass
+
+
+class HealthScan:
+    """Probes a library on low-priority background threads and builds the health report
+
+    Args:
+        songs (List[Dict[str, Any]]): MusicMasterSongList entries (with 'id' and 'location')
+        workers (int): Files probed at the same time
+        niceness (int): CPU niceness of the worker threads (0 leaves their priority alone)
+        cached_verdicts (Optional[Dict[str, Dict[str, Any]]]): 'verdicts' from an earlier report
+    """
+
+    def __init__(self, songs: List[Dict[str, Any]], workers: int = 1, niceness: int = DEFAULT_NICENESS,
+                 cached_verdicts: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        # Copied so the engine can replace its song list while the scan runs
+        self.songs: List[Dict[str, Any]] = [{'id': song.get('id'), 'location': song['location'],
+                                             'artist': song.get('artist'), 'title': song.get('title')}
+                                            for song in songs]
+        self.workers: int = max(1, int(workers))
+        self.niceness: int = niceness
+        self.cached_verdicts: Dict[str, Dict[str, Any]] = cached_verdicts or {}
+        self.report: Optional[Dict[str, Any]] = None
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Run the scan on a background thread; poll done() for the report"""
+        self._thread = threading.Thread(target=self.run, name='library-health', daemon=True)
+        self._thread.start()
+
+    def done(self) -> bool:
+        return self.report is not None
+
+    def cancel(self) -> None:
+        """Stop probing; files not probed yet are left out of the (never finished) report"""
+        self._cancelled.set()
+
+    def _probe(self, location: str) -> Optional[Dict[str, Any]]:
+        return None if self._cancelled.is_set() else probe_track(location)
+
+    def run(self) -> Optional[Dict[str, Any]]:
+        """Probe every song not covered by a cached verdict and build the report
+
+        Returns:
+            Optional[Dict[str, Any]]: The report, or None if the scan was cancelled
+        """
+        started = time.perf_counter()
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        to_probe: List[str] = []
+        for location in dict.fromkeys(song['location'] for song in self.songs):
+            cached = self.cached_verdicts.get(location)
+            if cached is not None and cached.get('signature') == file_signature(location):
+                verdicts[location] = cached
+            else:
+                to_probe.append(location)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='library-health',
+                                initializer=_lower_thread_priority, initargs=(self.niceness,)) as pool:
+            for location, verdict in zip(to_probe, pool.map(self._probe, to_probe)):
+                if verdict is not None:
+                    verdicts[location] = verdict
+        if self._cancelled.is_set():
+            return None
+
+        quarantined = [{**song, 'reason': verdicts[song['location']]['reason']} for song in self.songs
+                       if verdicts[song['location']]['status'] == 'bad']
+        self.report = {
+            'version': REPORT_VERSION,
+            'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'library_size': len(self.songs),
+            'checked': len(to_probe),
+            'from_cache': len(verdicts) - len(to_probe),
+            'bad_songs': len(quarantined),
+            'seconds': round(time.perf_counter() - started, 3),
+            'quarantined': quarantined,
+            # Missing files are not cached: a network share that was offline is probed again
+            'verdicts': {location: verdict for location, verdict in verdicts.items()
+                         if verdict['signature'] is not None}
+        }
+        return self.report
+
+
+def quarantined_song_ids(report: Optional[Dict[str, Any]]) -> Set[int]:
+    """Return the ids of every song the report quarantined"""
+    if not report:
+        return set()
+    return {song['id'] for song in report.get('quarantined', []) if song.get('id') is not None}
+
+
+def load_health_report(report_file: str) -> Optional[Dict[str, Any]]:
+    """Load a report written by write_health_report() (None if missing or outdated)"""
+    try:
+        with open(report_file, 'r') as file:
+            report = json.load(file)
+    except (IOError, json.JSONDecodeError):
+        return None
+    if not isinstance(report, dict) or report.get('version') != REPORT_VERSION:
+        return None
+    return report
+
+
+def write_health_report(report_file: str, report: Dict[str, Any]) -> bool:
+    """Write the report as JSON, replacing any earlier one atomically"""
+    temp_file = report_file + '.tmp'
+    try:
+        with open(temp_file, 'w') as file:
+            json.dump(report, file, indent=2)
+        os.replace(temp_file, report_file)
+        return True
+    except IOError:
+        return False
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Probe the songs in MusicMasterSongList.txt for unplayable files')
+    parser.add_argument('--song-list', default='MusicMasterSongList.txt', help='Master song list to check')
+    parser.add_argument('--output', default='HealthReport.json', help='Report file (also the verdict cache)')
+    parser.add_argument('--workers', type=int, default=2, help='Files probed in parallel (default: 2)')
+    parser.add_argument('--niceness', type=int, default=0, help='Worker thread niceness (default: 0)')
+    args = parser.parse_args()
+
+    with open(args.song_list, 'r') as song_list_file:
+        song_list = json.load(song_list_file)
+    previous = load_health_report(args.output) or {}
+    health_report = HealthScan(song_list, args.workers, args.niceness, previous.get('verdicts')).run()
+    write_health_report(args.output, health_report)
+    for bad_song in health_report['quarantined']:
+        print(f"{bad_song['reason']}: {bad_song['location']}")
+    print(f"{health_report['bad_songs']} unplayable songs, {health_report['checked']} files probed, "
+          f"{health_report['from_cache']} from cache in {health_report['seconds']}s")
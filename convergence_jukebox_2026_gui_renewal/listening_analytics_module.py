@@ -0,0 +1,319 @@
+"""
+Listening Analytics Module
+Loads play and coin events from one or more kiosks into NumPy arrays and computes listening
+reports with vectorised bincount group-bys: hour-of-day x weekday heatmaps, artist share,
+paid vs random ratio and revenue curves.
+
+Inputs per kiosk can be a log segment directory (logs/), a single JSON-lines or legacy
+free-text log.txt, or a song_statistics.json (its play_history).
+
+Usage:
+    python listening_analytics_module.py logs
+    python listening_analytics_module.py bar=/data/bar/logs diner=/data/diner/logs --format csv --output report
+    python listening_analytics_module.py song_statistics.json --coin-value 0.25 --top-artists 20
+"""
+import csv
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from log_segments_module import iter_log_lines
+
+# Event source codes stored in PlayHistory.sources
+SOURCE_RANDOM: int = 0
+SOURCE_PAID: int = 1
+SOURCE_COIN: int = 2
+SOURCE_NAMES: List[str] = ['random', 'paid', 'coin']
+
+WEEKDAY_NAMES: List[str] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Legacy free-text lines written before the JSON-lines log
+LEGACY_PLAY_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}), (.*), Played (Paid|Random),?$')
+LEGACY_COIN_LINE = re.compile(r'^(\d{2}:\d{2}:\d{2}) Quarter Added,?$')
+
+
+class PlayHistory:
+    """Column arrays of play and coin events
+
+    Attributes:
+        timestamps (np.ndarray): int64 local wall-clock seconds since 1970-01-01
+        song_ids (np.ndarray): int64 stable song id (row number in older logs), -1 when unknown
+        sources (np.ndarray): int8 SOURCE_RANDOM, SOURCE_PAID or SOURCE_COIN
+        artist_codes (np.ndarray): int32 index into artist_names, -1 for coins
+        kiosk_codes (np.ndarray): int16 index into kiosk_names
+        artist_names (List[str]): Interned artist names
+        kiosk_names (List[str]): Kiosk names in input order
+    """
+
+    def __init__(self, timestamps: np.ndarray, song_ids: np.ndarray, sources: np.ndarray,
+                 artist_codes: np.ndarray, kiosk_codes: np.ndarray, artist_names: List[str],
+                 kiosk_names: List[str]) -> None:
+        self.timestamps: np.ndarray = timestamps
+        self.song_ids: np.ndarray = song_ids
+        self.sources: np.ndarray = sources
+        self.artist_codes: np.ndarray = artist_codes
+        self.kiosk_codes: np.ndarray = kiosk_codes
+        self.artist_names: List[str] = artist_names
+        self.kiosk_names: List[str] = kiosk_names
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def _iter_log_events(path: str) -> Iterator[Tuple[str, int, int, Optional[str]]]:
+    """Yield (timestamp, song id, source, artist) from a log file or segment directory"""
+    last_date: Optional[str] = None
+    last_time: str = ''
+    for line in iter_log_lines(path):
+        if line.startswith('{'):
+            # Only parse the two event types the report uses
+            if '"song_played"' not in line and '"coin_inserted"' not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('event') == 'coin_inserted':
+                yield record['ts'], -1, SOURCE_COIN, None
+            elif record.get('event') == 'song_played':
+                song_id = record.get('song_id', record.get('song_number'))
+                source = SOURCE_PAID if record.get('play_type') == 'Paid' else SOURCE_RANDOM
+                yield (record['ts'], song_id if isinstance(song_id, int) else -1, source,
+                       str(record.get('artist', '')))
+            continue
+        line = line.strip()
+        match = LEGACY_PLAY_LINE.match(line)
+        if match:
+            last_date, last_time = match.group(1)[:10], match.group(1)[11:]
+            artist = match.group(2).split(' - ', 1)[0]
+            yield match.group(1), -1, SOURCE_PAID if match.group(3) == 'Paid' else SOURCE_RANDOM, artist
+            continue
+        match = LEGACY_COIN_LINE.match(line)
+        if match and last_date is not None:
+            # GUI lines only carry the time: date them from the engine's last full timestamp
+            if match.group(1) < last_time:
+                last_date = str(np.datetime64(last_date) + np.timedelta64(1, 'D'))
+            last_time = match.group(1)
+            yield f'{last_date} {match.group(1)}', -1, SOURCE_COIN, None
+
+
+def _iter_statistics_events(path: str) -> Iterator[Tuple[str, int, int, Optional[str]]]:
+    """Yield (timestamp, song id, source, artist) from song_statistics.json play histories"""
+    with open(path, 'r') as statistics_file:
+        song_statistics = json.load(statistics_file)
+    for song_id_str, stats in song_statistics.items():
+        artist = str(stats.get('artist', ''))
+        song_id = int(song_id_str) if song_id_str.isdigit() else -1
+        for play in stats.get('play_history', []):
+            source = SOURCE_PAID if str(play.get('type', '')).lower() == 'paid' else SOURCE_RANDOM
+            yield play['timestamp'][:19], song_id, source, artist
+
+
+def load_play_history(inputs: List[Tuple[str, str]]) -> PlayHistory:
+    """Load events from every kiosk into one PlayHistory
+
+    Args:
+        inputs (List[Tuple[str, str]]): (kiosk name, path) pairs. A path is a segment
+            directory, a log file, or a file ending in .json holding song statistics.
+
+    Returns:
+        PlayHistory: Events from all kiosks
+    """
+    timestamps: List[str] = []
+    song_ids: List[int] = []
+    sources: List[int] = []
+    artist_codes: List[int] = []
+    kiosk_codes: List[int] = []
+    artist_lookup: Dict[str, int] = {}
+    kiosk_names: List[str] = []
+
+    for kiosk_code, (kiosk_name, path) in enumerate(inputs):
+        kiosk_names.append(kiosk_name)
+        events = _iter_statistics_events(path) if path.endswith('.json') else _iter_log_events(path)
+        for ts, song_id, source, artist in events:
+            timestamps.append(ts)
+            song_ids.append(song_id)
+            sources.append(source)
+            artist_codes.append(-1 if artist is None else artist_lookup.setdefault(artist, len(artist_lookup)))
+            kiosk_codes.append(kiosk_code)
+
+    artist_names: List[str] = [''] * len(artist_lookup)
+    for artist, code in artist_lookup.items():
+        artist_names[code] = artist
+    return PlayHistory(
+        np.array(timestamps, dtype='datetime64[s]').astype(np.int64),
+        np.array(song_ids, dtype=np.int64),
+        np.array(sources, dtype=np.int8),
+        np.array(artist_codes, dtype=np.int32),
+        np.array(kiosk_codes, dtype=np.int16),
+        artist_names,
+        kiosk_names
+    )
+
+
+def _iso_day(day_number: int) -> str:
+    return str(np.datetime64(int(day_number), 'D'))
+
+
+def compute_report(history: PlayHistory, coin_value: float = 0.25, top_artists: int = 25) -> Dict[str, Any]:
+    """Compute every aggregate with NumPy group-bys
+
+    Args:
+        history (PlayHistory): Loaded events
+        coin_value (float): Revenue per coin
+        top_artists (int): Number of artists listed in the artist share table
+
+    Returns:
+        Dict[str, Any]: summary, per-kiosk totals, heatmaps, artist share and revenue curves
+    """
+    kiosk_count = len(history.kiosk_names)
+    is_coin = history.sources == SOURCE_COIN
+    is_play = ~is_coin
+    is_paid = history.sources == SOURCE_PAID
+
+    day_numbers = history.timestamps // 86400
+    hours = (history.timestamps // 3600) % 24
+    weekdays = (day_numbers + 3) % 7  # 1970-01-01 was a Thursday; Monday is 0
+    slot = weekdays * 24 + hours
+
+    def heatmap(mask: np.ndarray) -> List[List[int]]:
+        return np.bincount(slot[mask], minlength=7 * 24).reshape(7, 24).tolist()
+
+    play_count = int(is_play.sum())
+    paid_count = int(is_paid.sum())
+    coin_count = int(is_coin.sum())
+
+    # Artist share (plays only)
+    artist_plays = np.bincount(history.artist_codes[is_play], minlength=len(history.artist_names))
+    top = np.argsort(-artist_plays, kind='stable')[:top_artists]
+    artist_share = [{'artist': history.artist_names[code], 'plays': int(artist_plays[code]),
+                     'share': round(float(artist_plays[code]) / play_count, 4) if play_count else 0.0}
+                    for code in top if artist_plays[code] > 0]
+
+    # Per kiosk totals
+    kiosk_sources = np.bincount(history.kiosk_codes.astype(np.int64) * 3 + history.sources,
+                                minlength=kiosk_count * 3).reshape(kiosk_count, 3)
+    kiosks = {name: {'random_plays': int(kiosk_sources[code, SOURCE_RANDOM]),
+                     'paid_plays': int(kiosk_sources[code, SOURCE_PAID]),
+                     'coins': int(kiosk_sources[code, SOURCE_COIN]),
+                     'revenue': round(float(kiosk_sources[code, SOURCE_COIN]) * coin_value, 2)}
+              for code, name in enumerate(history.kiosk_names)}
+
+    # Revenue curves: daily per kiosk, cumulative overall, and by hour of day
+    revenue_daily: List[Dict[str, Any]] = []
+    if coin_count:
+        first_day = int(day_numbers[is_coin].min())
+        day_span = int(day_numbers[is_coin].max()) - first_day + 1
+        daily = np.bincount(history.kiosk_codes[is_coin].astype(np.int64) * day_span
+                            + (day_numbers[is_coin] - first_day),
+                            minlength=kiosk_count * day_span).reshape(kiosk_count, day_span)
+        total_daily = daily.sum(axis=0)
+        cumulative = np.cumsum(total_daily) * coin_value
+        for offset in np.flatnonzero(total_daily):
+            row: Dict[str, Any] = {'date': _iso_day(first_day + offset),
+                                   'revenue': round(float(total_daily[offset]) * coin_value, 2),
+                                   'cumulative_revenue': round(float(cumulative[offset]), 2)}
+            for code, name in enumerate(history.kiosk_names):
+                row[name] = round(float(daily[code, offset]) * coin_value, 2)
+            revenue_daily.append(row)
+    revenue_by_hour = (np.bincount(hours[is_coin], minlength=24) * coin_value).round(2).tolist()
+
+    return {
+        'summary': {
+            'events': len(history),
+            'plays': play_count,
+            'paid_plays': paid_count,
+            'random_plays': play_count - paid_count,
+            'paid_ratio': round(paid_count / play_count, 4) if play_count else 0.0,
+            'coins': coin_count,
+            'revenue': round(coin_count * coin_value, 2),
+            'first_event': str(history.timestamps.min().astype('datetime64[s]')).replace('T', ' ') if len(history) else None,
+            'last_event': str(history.timestamps.max().astype('datetime64[s]')).replace('T', ' ') if len(history) else None,
+            'unique_songs': int(np.unique(history.song_ids[is_play & (history.song_ids >= 0)]).size),
+            'unique_artists': int(np.count_nonzero(artist_plays))
+        },
+        'kiosks': kiosks,
+        'heatmaps': {
+            'rows': WEEKDAY_NAMES,
+            'columns': list(range(24)),
+            'plays': heatmap(is_play),
+            'paid_plays': heatmap(is_paid),
+            'coins': heatmap(is_coin)
+        },
+        'artist_share': artist_share,
+        'revenue_daily': revenue_daily,
+        'revenue_by_hour': revenue_by_hour
+    }
+
+
+def write_csv_report(report: Dict[str, Any], output_dir: str) -> List[str]:
+    """Write the report as one CSV file per table
+
+    Returns:
+        List[str]: Paths written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written: List[str] = []
+
+    def write(name: str, header: List[str], rows: List[List[Any]]) -> None:
+        path = os.path.join(output_dir, name)
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+        written.append(path)
+
+    write('summary.csv', ['metric', 'value'], [[key, value] for key, value in report['summary'].items()])
+    write('kiosks.csv', ['kiosk', 'random_plays', 'paid_plays', 'coins', 'revenue'],
+          [[name] + list(totals.values()) for name, totals in report['kiosks'].items()])
+    for table in ('plays', 'paid_plays', 'coins'):
+        write(f'heatmap_{table}.csv', ['weekday'] + [f'{hour:02d}' for hour in range(24)],
+              [[weekday] + counts for weekday, counts in zip(WEEKDAY_NAMES, report['heatmaps'][table])])
+    write('artist_share.csv', ['artist', 'plays', 'share'],
+          [[row['artist'], row['plays'], row['share']] for row in report['artist_share']])
+    daily_header = ['date', 'revenue', 'cumulative_revenue'] + list(report['kiosks'])
+    write('revenue_daily.csv', daily_header, [[row[column] for column in daily_header] for row in report['revenue_daily']])
+    write('revenue_by_hour.csv', ['hour', 'revenue'], [[hour, revenue] for hour, revenue in enumerate(report['revenue_by_hour'])])
+    return written
+
+
+def _parse_input(argument: str) -> Tuple[str, str]:
+    """Split 'name=path' (or a bare path, named after its directory) into (kiosk name, path)"""
+    name, separator, path = argument.partition('=')
+    if separator and not os.path.exists(argument):
+        return name, path
+    path = argument.rstrip('/\\')
+    parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return parent or path, argument
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import time
+    parser = argparse.ArgumentParser(description='Listening analytics over jukebox play history')
+    parser.add_argument('inputs', nargs='+', help="Log directory, log file or song_statistics.json, optionally as 'kiosk=path'")
+    parser.add_argument('--coin-value', type=float, default=0.25, help='Revenue per coin (default: 0.25)')
+    parser.add_argument('--top-artists', type=int, default=25, help='Artists listed in the share table')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help='Output format (default: json)')
+    parser.add_argument('--output', help='JSON file or CSV directory (default: JSON to stdout)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    history = load_play_history([_parse_input(argument) for argument in args.inputs])
+    loaded = time.perf_counter()
+    report = compute_report(history, args.coin_value, args.top_artists)
+    print(f"{len(history)} events loaded in {loaded - start:.2f}s, report computed in "
+          f"{time.perf_counter() - loaded:.3f}s", file=sys.stderr)
+
+    if args.format == 'csv':
+        for path in write_csv_report(report, args.output or 'listening_report'):
+            print(path)
+    elif args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
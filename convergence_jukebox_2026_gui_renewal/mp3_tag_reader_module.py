@@ -0,0 +1,393 @@
+"""
+MP3 Tag Reader Module
+Fast-path tag and duration reader for library scans, falling back to TinyTag when needed.
+
+For an MP3 the fast path reads at most:
+    - the 10 byte ID3v2 header and the header of each frame, plus the body of the title,
+      artist, album, year and comment frames - other frames such as artwork are seeked past
+    - a small window at the start of the audio for the first MPEG frame header and its
+      Xing/Info or VBRI header
+    - the 128 byte ID3v1 trailer
+Duration follows TinyTag's rules (a Xing/Info or VBRI frame count, else the audio size over
+the mean length of the first frames), so switching readers does not change a song's 'MM:SS'
+or its song ID. The exception is VBR without a header, where TinyTag reads up to 30 seconds
+of frames and the fast path settles for an estimate from the frames in its window.
+
+Anything the fast path does not handle - other formats, unsynchronised tags, free-format
+bitrates, files with no recognisable frame header or no tags at all - goes to the fallback
+reader (TinyTag.get). Every call is counted, so a scan can report how often the fast path
+succeeded and how many bytes it read per file.
+"""
+import os
+import struct
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_TAG_BYTES: int = 64 * 1024
+
+# Bytes read at the start of the audio: enough for the first frames and a Xing/VBRI header
+AUDIO_WINDOW_BYTES: int = 8192
+
+# Frames read to decide a file without a Xing/VBRI header is CBR (as TinyTag does)
+CBR_DETECTION_FRAMES: int = 5
+
+ID3V1_SIZE: int = 128
+
+# Bitrates in kbps by (MPEG-1?, layer) and bitrate index
+_BITRATES: Dict[Tuple[bool, int], Tuple[int, ...]] = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_SAMPLE_RATES: Dict[int, Tuple[int, int, int]] = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000),
+                                                  0: (11025, 12000, 8000)}
+
+# ID3v2 frame ids (v2.3/v2.4 and v2.2) for the fields the engine uses
+_TEXT_FRAMES: Dict[str, str] = {
+    'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album', 'TYER': 'year', 'TDRC': 'year',
+    'TT2': 'title', 'TP1': 'artist', 'TAL': 'album', 'TYE': 'year'
+}
+_COMMENT_FRAMES: Tuple[str, ...] = ('COMM', 'COM')
+
+_ENCODINGS: Dict[int, str] = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+
+class Mp3Tags:
+    """Tag values and duration, with the attribute names of a TinyTag result"""
+
+    __slots__ = ('title', 'artist', 'album', 'year', 'comment', 'duration', 'filesize')
+
+    def __init__(self) -> None:
+        self.title: Optional[str] = None
+        self.artist: Optional[str] = None
+        self.album: Optional[str] = None
+        self.year: Optional[str] = None
+        self.comment: Optional[str] = None
+        self.duration: Optional[float] = None
+        self.filesize: int = 0
+
+
+class FastPathUnavailable(Exception):
+    """Raised inside the fast path to send a file to the fallback reader; args[0] is the reason"""
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_text(encoding: int, data: bytes) -> str:
+    if encoding == 1 and not data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        data = b'\xff\xfe' + data
+    text = data.decode(_ENCODINGS.get(encoding, 'latin-1'), 'replace')
+    # ID3v2.4 separates multiple values with nulls - keep the first
+    return next((value for value in text.split('\x00') if value), '')
+
+
+def _split_terminated(encoding: int, data: bytes) -> Tuple[bytes, bytes]:
+    """Split a null-terminated string (one or two null bytes, by encoding) off the front of data"""
+    if encoding in (1, 2):
+        position = 0
+        while True:
+            position = data.find(b'\x00\x00', position)
+            if position < 0:
+                return data, b''
+            if position % 2 == 0:
+                return data[:position], data[position + 2:]
+            position += 1
+    head, _, rest = data.partition(b'\x00')
+    return head, rest
+
+
+def _read_id3v2_frames(tags: Mp3Tags, mp3_file: Any, tag_end: int, major_version: int, budget: int) -> int:
+    """Fill tags from an ID3v2 tag, reading only the frames the engine uses
+
+    Frame headers are read one at a time and every other frame (artwork, lyrics, private
+    data) is skipped with a seek, so a tag with a large embedded image costs a few hundred
+    bytes. Reading stops at the end of the tag, at padding, or when budget bytes are used up.
+
+    Args:
+        tags (Mp3Tags): Filled in place
+        mp3_file (Any): Binary file positioned at the first frame
+        tag_end (int): File offset where the tag ends
+        major_version (int): ID3v2 version (2, 3 or 4)
+        budget (int): Most bytes to read
+
+    Returns:
+        int: Bytes read
+    """
+    id_length, header_length = (3, 6) if major_version == 2 else (4, 10)
+    comment_found_without_description = False
+    bytes_read = 0
+    position = mp3_file.tell()
+    while position + header_length <= tag_end and bytes_read + header_length <= budget:
+        mp3_file.seek(position)
+        frame_header = mp3_file.read(header_length)
+        bytes_read += len(frame_header)
+        frame_id = frame_header[:id_length]
+        if len(frame_header) < header_length or not frame_id.isalnum():
+            break  # padding or a damaged tag
+        if major_version == 2:
+            size = int.from_bytes(frame_header[3:6], 'big')
+            flags = 0
+        elif major_version == 4:
+            size = _syncsafe(frame_header[4:8])
+            flags = int.from_bytes(frame_header[8:10], 'big')
+        else:
+            size = int.from_bytes(frame_header[4:8], 'big')
+            flags = int.from_bytes(frame_header[8:10], 'big')
+        position += header_length + size
+        if position > tag_end:
+            break
+
+        name = frame_id.decode('ascii')
+        if name not in _TEXT_FRAMES and name not in _COMMENT_FRAMES:
+            continue
+        # Compressed, encrypted or unsynchronised frames are skipped
+        if (major_version == 3 and flags & 0x00C0) or (major_version == 4 and flags & 0x000E):
+            continue
+        if size == 0 or bytes_read + size > budget:
+            continue
+        content = mp3_file.read(size)
+        bytes_read += len(content)
+        if major_version == 4 and flags & 0x0001:
+            content = content[4:]  # data length indicator
+        if not content:
+            continue
+
+        encoding = content[0]
+        if name in _TEXT_FRAMES:
+            field = _TEXT_FRAMES[name]
+            if getattr(tags, field) is None:
+                setattr(tags, field, _decode_text(encoding, content[1:]))
+        elif not comment_found_without_description:
+            description, text = _split_terminated(encoding, content[4:])
+            has_description = bool(_decode_text(encoding, description))
+            # Prefer the plain comment over ones with a description (e.g. iTunNORM)
+            if not has_description or tags.comment is None:
+                tags.comment = _decode_text(encoding, text)
+                comment_found_without_description = not has_description
+    return bytes_read
+
+
+def _parse_id3v1(tags: Mp3Tags, trailer: bytes) -> bool:
+    """Fill missing fields from an ID3v1 trailer; return True if it was one"""
+    if len(trailer) != ID3V1_SIZE or trailer[:3] != b'TAG':
+        return False
+
+    def field(start: int, length: int) -> Optional[str]:
+        value = trailer[start:start + length].split(b'\x00')[0].decode('latin-1').strip()
+        return value or None
+    for name, start, length in (('title', 3, 30), ('artist', 33, 30), ('album', 63, 30),
+                                ('year', 93, 4), ('comment', 97, 28)):
+        if getattr(tags, name) is None:
+            setattr(tags, name, field(start, length))
+    return True
+
+
+def _frame_header(data: bytes, position: int) -> Optional[Tuple[int, int, int, int]]:
+    """Decode an MPEG frame header at position (the same validity rules as TinyTag)
+
+    Returns:
+        Optional[Tuple[int, int, int, int]]: (version and layer bits, bitrate in kbps, frame
+            length, samples per frame), or None if the bytes are not a usable frame header
+    """
+    if position + 4 > len(data) or data[position] != 0xFF or data[position + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[position + 1] >> 3) & 0x03
+    layer = 4 - ((data[position + 1] >> 1) & 0x03)
+    bitrate_index = data[position + 2] >> 4
+    sample_rate_index = (data[position + 2] >> 2) & 0x03
+    padding = (data[position + 2] >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = _BITRATES[(version == 3, layer)][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 3 else 576)
+    slot_size = 4 if layer == 1 else 1
+    length = ((samples_per_frame // 8 // slot_size) * 1000 * bitrate // sample_rate + padding) * slot_size
+    return (data[position + 1] >> 1) & 0x0F, bitrate, length, samples_per_frame
+
+
+def _sample_rate(data: bytes, position: int) -> int:
+    return _SAMPLE_RATES[(data[position + 1] >> 3) & 0x03][(data[position + 2] >> 2) & 0x03]
+
+
+def _vbr_header_duration(window: bytes, position: int, frame_length: int, samples_per_frame: int,
+                         sample_rate: int) -> Optional[float]:
+    """Duration from a Xing/Info or VBRI header in the first frame, if it has frame and byte counts"""
+    content = window[position + 4:position + 4 + min(50, frame_length)]
+    for marker in (b'Xing', b'Info'):
+        offset = content.find(marker)
+        if offset != -1:
+            if offset + 8 > len(content):
+                return None
+            flags = struct.unpack_from('>i', content, offset + 4)[0]
+            fields = content[offset + 8:]
+            frames = struct.unpack_from('>i', fields, 0)[0] if flags & 1 and len(fields) >= 4 else 0
+            byte_offset = 4 if flags & 1 else 0
+            byte_count = (struct.unpack_from('>i', fields, byte_offset)[0]
+                          if flags & 2 and len(fields) >= byte_offset + 4 else 0)
+            if frames > 0 and byte_count - frame_length > 0:
+                return frames * samples_per_frame / sample_rate
+            return None
+    offset = content.find(b'VBRI')
+    if offset != -1 and offset + 18 <= len(content):
+        byte_count, frames = struct.unpack_from('>II', content, offset + 10)
+        if frames > 0 and byte_count > 0:
+            return frames * samples_per_frame / sample_rate
+    return None
+
+
+def _estimate_duration(window: bytes, stream_size: int) -> float:
+    """Estimate an MP3's duration from the frames at the start of its audio
+
+    Follows TinyTag so both readers give the same 'MM:SS': a Xing/Info or VBRI header gives
+    the frame count; otherwise the frame count is extrapolated from the mean length of the
+    first CBR_DETECTION_FRAMES frames. When their bitrates differ TinyTag reads up to 30
+    seconds of frames; here every frame inside the window is used instead.
+
+    Args:
+        window (bytes): The start of the audio, possibly with junk before the first frame
+        stream_size (int): Bytes from window[0] to the end of the audio (ID3v1 excluded)
+
+    Returns:
+        float: Duration in seconds
+    """
+    position = window.find(b'\xff')
+    while position != -1 and _frame_header(window, position) is None:
+        position = window.find(b'\xff', position + 1)
+    if position == -1:
+        raise FastPathUnavailable('no_frame_header')
+    first_id, _, frame_length, samples_per_frame = _frame_header(window, position)
+    sample_rate = _sample_rate(window, position)
+
+    duration = _vbr_header_duration(window, position, frame_length, samples_per_frame, sample_rate)
+    if duration is not None:
+        return duration
+
+    stream_size -= position
+    frames = frame_size_total = 0
+    bitrates = set()
+    frame_position = position
+    while True:
+        header = _frame_header(window, frame_position)
+        if header is None or header[0] != first_id:
+            break
+        frames += 1
+        bitrates.add(header[1])
+        frame_size_total += header[2]
+        frame_position += header[2]
+        if frames == CBR_DETECTION_FRAMES and len(bitrates) == 1:
+            break
+    if frame_position >= stream_size:
+        # The whole stream was inside the window: count the frames exactly
+        return frames * samples_per_frame / sample_rate
+    estimated_frames = int(stream_size / (frame_size_total / frames) + 0.5)
+    return estimated_frames * samples_per_frame / sample_rate
+
+
+class FastTagReader:
+    """Reads MP3 tags with bounded reads and counts fast-path hits, fallbacks and bytes read
+
+    Args:
+        fallback (Optional[Callable[[str], Any]]): Reader for everything the fast path cannot
+            handle (TinyTag.get); None makes those files return None
+        enabled (bool): When False every file goes to the fallback reader
+        max_tag_bytes (int): Most bytes read from an ID3v2 tag
+    """
+
+    def __init__(self, fallback: Optional[Callable[[str], Any]] = None, enabled: bool = True,
+                 max_tag_bytes: int = DEFAULT_MAX_TAG_BYTES) -> None:
+        self.fallback: Optional[Callable[[str], Any]] = fallback
+        self.enabled: bool = enabled
+        self.max_tag_bytes: int = max(ID3V1_SIZE, int(max_tag_bytes))
+
+        # Counters
+        self.files: int = 0
+        self.fast_path: int = 0
+        self.fallbacks: int = 0
+        self.fast_path_bytes: int = 0
+        self.fallback_reasons: Dict[str, int] = {}
+
+    def _read_fast(self, file_path: str) -> Tuple[Mp3Tags, int]:
+        """Read tags and duration with bounded reads; returns the tags and bytes read"""
+        tags = Mp3Tags()
+        bytes_read = 0
+        # Unbuffered, so bytes_read is what was actually read from disk
+        with open(file_path, 'rb', buffering=0) as mp3_file:
+            file_size = os.fstat(mp3_file.fileno()).st_size
+            tags.filesize = file_size
+            header = mp3_file.read(10)
+            bytes_read += len(header)
+
+            audio_start = 0
+            has_id3v2 = len(header) == 10 and header[:3] == b'ID3'
+            if has_id3v2:
+                major_version, flags = header[3], header[5]
+                if major_version not in (2, 3, 4):
+                    raise FastPathUnavailable('id3v2_version')
+                if flags & 0x80:
+                    raise FastPathUnavailable('unsynchronised_tag')
+                tag_size = _syncsafe(header[6:10])
+                audio_start = 10 + tag_size + (10 if flags & 0x10 else 0)
+                if flags & 0x40 and major_version in (3, 4):
+                    extended_header = mp3_file.read(4)
+                    bytes_read += len(extended_header)
+                    extended_size = (struct.unpack('>I', extended_header)[0] + 4 if major_version == 3
+                                     else _syncsafe(extended_header))
+                    mp3_file.seek(10 + extended_size)
+                bytes_read += _read_id3v2_frames(tags, mp3_file, 10 + tag_size, major_version, self.max_tag_bytes)
+
+            # ID3v1 trailer: fills fields the ID3v2 tag lacks and is left out of the audio size
+            mp3_file.seek(max(0, file_size - ID3V1_SIZE))
+            trailer = mp3_file.read(ID3V1_SIZE)
+            bytes_read += len(trailer)
+            audio_end = file_size - ID3V1_SIZE if _parse_id3v1(tags, trailer) else file_size
+            if tags.title is None and tags.artist is None:
+                raise FastPathUnavailable('no_tags')
+
+            mp3_file.seek(audio_start)
+            window = mp3_file.read(AUDIO_WINDOW_BYTES)
+            bytes_read += len(window)
+            tags.duration = _estimate_duration(window, audio_end - audio_start)
+        return tags, bytes_read
+
+    def get(self, file_path: str) -> Optional[Any]:
+        """Return the tags of a music file, like TinyTag.get()
+
+        Args:
+            file_path (str): Music file
+
+        Returns:
+            Optional[Any]: Mp3Tags from the fast path, the fallback's result, or None
+        """
+        self.files += 1
+        reason = 'not_mp3' if self.enabled else 'disabled'
+        if self.enabled and file_path.lower().endswith('.mp3'):
+            try:
+                tags, bytes_read = self._read_fast(file_path)
+                self.fast_path += 1
+                self.fast_path_bytes += bytes_read
+                return tags
+            except FastPathUnavailable as e:
+                reason = e.args[0]
+            except (OSError, ValueError, IndexError, struct.error):
+                reason = 'parse_error'
+        self.fallbacks += 1
+        self.fallback_reasons[reason] = self.fallback_reasons.get(reason, 0) + 1
+        return self.fallback(file_path) if self.fallback is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the counters, with the fast-path rate and mean bytes read per fast-path file"""
+        return {
+            'files': self.files,
+            'fast_path': self.fast_path,
+            'fallbacks': self.fallbacks,
+            'fast_path_rate': round(self.fast_path / self.files, 4) if self.files else 0.0,
+            'fast_path_bytes': self.fast_path_bytes,
+            'bytes_per_file': round(self.fast_path_bytes / self.fast_path) if self.fast_path else 0,
+            'fallback_reasons': dict(self.fallback_reasons)
+        }
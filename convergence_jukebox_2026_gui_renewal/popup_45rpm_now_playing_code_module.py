@@ -8,7 +8,6 @@ import os
 import random
 import textwrap
 import time
-from PIL import Image, ImageDraw, ImageFont
 import FreeSimpleGUI as sg
 
 
@@ -30,6 +29,7 @@ def display_45rpm_now_playing_popup(MusicMasterSongList, counter, jukebox_select
     Returns:
         None
     """
+    from PIL import Image, ImageDraw, ImageFont  # deferred to the first popup so the GUI starts without Pillow
 
     def wrap_text(text, font, max_width, draw):
         """
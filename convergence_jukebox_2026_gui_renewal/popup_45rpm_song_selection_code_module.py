@@ -6,12 +6,11 @@ import threading
 import os
 import random
 import time
-from PIL import Image, ImageDraw, ImageFont
-import vlc
+from audio_backend_module import create_sound_effect_player
 import FreeSimpleGUI as sg
 
 
-def display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window, add_credit_callback=None):
+def display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window, add_credit_callback=None, audio_backend_name='vlc'):
     """
     Display an animated 45rpm record popup with song title and artist information.
 
@@ -22,10 +21,12 @@ def display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window,
         MusicMasterSongList (list): List containing song information dictionaries
         counter (int): Index of the current song in MusicMasterSongList
         jukebox_selection_window: The FreeSimpleGUI window object to hide/unhide
+        audio_backend_name (str): Audio backend used for the success sound ('vlc' or 'fake')
 
     Returns:
         None
     """
+    from PIL import Image, ImageDraw, ImageFont  # deferred to the first popup so the GUI starts without Pillow
 
     def wrap_text(text, font, max_width, draw):
         """
@@ -282,10 +283,10 @@ def display_45rpm_popup(MusicMasterSongList, counter, jukebox_selection_window,
     try:
         success_sound_path = 'jukebox_required_audio_files/success.mp3'
         if os.path.exists(success_sound_path):
-            p = vlc.MediaPlayer(success_sound_path)
+            p = create_sound_effect_player(success_sound_path, audio_backend_name)
             p.play()
-            # Give VLC time to initialize and start playing the audio
-            time.sleep(0.5)
+            # Give the audio backend time to initialize and start playing the audio
+            p.clock.sleep(0.5)
             print(f"Playing success sound: {success_sound_path}")
         else:
             print(f"Warning: Success sound file not found at {success_sound_path}")
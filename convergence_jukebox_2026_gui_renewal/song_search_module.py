@@ -0,0 +1,468 @@
+"""
+Song Search Module
+Indexes behind the GUI's title and artist search window, so a keystroke costs a couple of
+binary searches instead of a pass over MusicMasterSongList.
+
+Titles and artists are compared in a folded form (fold_search_key()): casefolded, with accents
+and other combining marks removed, so 'BEYONCE' typed on the keypad finds 'Beyoncé'.
+PrefixIndex keeps the folded keys of a list of strings in one sorted list; every key that
+starts with a prefix lies in one contiguous range of it, found with bisect. The title index
+takes its order from MusicMasterSongList.sort_order('title'), which the engine's snapshot
+already holds, instead of sorting 200k titles at start-up. PrefixSearch is
+the per-window state: while the patron keeps typing, each search only bisects inside the
+previous range.
+
+NgramIndex finds the typed text anywhere in a song's title, artist, album, genre comment or
+year ('MOON' finds 'Full Moon in the Daylight Sky'). For each field it numbers the distinct
+values and keeps, for every trigram (three folded characters) in them, the sorted array of
+value numbers containing it. A search intersects the arrays of the query's trigrams, checks
+the few candidates left, and ranks matches: a field starting with the text first, then the
+text at the start of a later word, then inside a word; within each, titles before artists,
+albums, genres and years, and values in alphabetical order. NgramSearch narrows the previous
+matches while keys are added and passes queries shorter than a trigram to a PrefixSearch.
+
+FuzzyIndex forgives touch-screen typos in the artist search ('BEATELS' finds 'The Beatles').
+It splits the artists into words and keeps, for the first FUZZY_PREFIX characters of every
+distinct word, the strings left by deleting one character (a deletion neighbourhood): two
+words within one edit (a wrong, missing, extra or swapped character) share one of them, so a
+typed word finds its candidates with a few dict lookups and only those are checked with
+edit_distance(). FuzzySearch shows the prefix matches first and fills the rest of the result
+buttons with the closest fuzzy matches.
+"""
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from song_library_module import fold_sort_key
+
+RESULT_LIMIT: int = 5  # result buttons on the search window
+NGRAM: int = 3
+# NgramIndex fields, in ranking order
+SEARCH_FIELDS: Tuple[str, ...] = ('title', 'artist', 'album', 'comment', 'year')
+FUZZY_EDITS: int = 1  # most typos forgiven per word
+FUZZY_MIN_LENGTH: int = 4  # shorter typed words must match the start of a word exactly
+FUZZY_PREFIX: int = 7  # characters of each word in the deletion neighbourhood
+_WORD = re.compile(r'[^\W_]+')
+
+
+# the form titles, artists and typed keys are matched in - the form Library.sort_order() sorts
+# in, so a PrefixIndex can be built on the snapshot's title order
+fold_search_key = fold_sort_key
+
+
+def _prefix_successor(key: str) -> str:
+    """The smallest string greater than every string starting with key"""
+    return key[:-1] + chr(ord(key[-1]) + 1)
+
+
+class PrefixIndex:
+    """Sorted folded keys of a sequence of strings, for prefix searches
+
+    Args:
+        values (Sequence[Optional[str]]): e.g. every song's title, or the artist list; results
+            are positions in it
+        order (Optional[Sequence[int]]): The positions already sorted by folded key, e.g.
+            Library.sort_order('title'); sorted here when omitted
+    """
+
+    def __init__(self, values: Sequence[Optional[str]], order: Optional[Sequence[int]] = None) -> None:
+        if order is None:
+            folded = [fold_search_key(value) for value in values]
+            order = sorted(range(len(folded)), key=folded.__getitem__)
+            self.keys: List[str] = [folded[position] for position in order]
+        else:
+            self.keys = [fold_search_key(values[position]) for position in order]
+        self.positions: array = array('I', order)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def prefix_range(self, folded_prefix: str, low: int = 0, high: Optional[int] = None) -> Tuple[int, int]:
+        """The range of keys starting with a folded prefix, searched for within [low, high)
+
+        Returns:
+            Tuple[int, int]: (start, end) indexes into keys; empty when start == end
+        """
+        if high is None:
+            high = len(self.keys)
+        if not folded_prefix:
+            return low, high
+        start = bisect_left(self.keys, folded_prefix, low, high)
+        return start, bisect_left(self.keys, _prefix_successor(folded_prefix), start, high)
+
+
+class PrefixSearch:
+    """One search window's prefix search over a PrefixIndex
+
+    Remembers the last prefix and its range: a search for a longer prefix starting with it
+    (the patron typed another key) only looks inside that range; anything else (a delete or a
+    clear) starts again from the whole index.
+
+    Args:
+        index (PrefixIndex): The titles or artists searched
+    """
+
+    def __init__(self, index: PrefixIndex) -> None:
+        self.index: PrefixIndex = index
+        self._prefix: str = ''
+        self._range: Tuple[int, int] = (0, len(index))
+
+    def search(self, keys_entered: str, limit: int = RESULT_LIMIT) -> Tuple[List[int], int]:
+        """Positions of the first matches in key order, and how many match in all
+
+        Args:
+            keys_entered (str): What has been typed so far
+            limit (int): Most positions returned
+
+        Returns:
+            Tuple[List[int], int]: (positions in the indexed values, total match count)
+        """
+        prefix = fold_search_key(keys_entered)
+        if prefix.startswith(self._prefix):
+            low, high = self._range
+        else:
+            low, high = 0, len(self.index)
+        start, end = self.index.prefix_range(prefix, low, high)
+        self._prefix, self._range = prefix, (start, end)
+        return self.index.positions[start:min(end, start + limit)].tolist(), end - start
+
+
+def _ngrams(key: str) -> set:
+    """The distinct trigrams of a folded key (none when it is shorter than NGRAM)"""
+    return {key[start:start + NGRAM] for start in range(len(key) - NGRAM + 1)}
+
+
+def _intersect(smaller: Sequence[int], larger: Sequence[int]) -> array:
+    """The ids in both of two sorted id arrays
+
+    Each id of the shorter array is looked up by bisect in the rest of the longer one when it is
+    much longer; arrays of similar length are intersected as sets.
+    """
+    if len(larger) < 16 * len(smaller):
+        return array('I', sorted(set(smaller).intersection(larger)))
+    common = array('I')
+    low, high = 0, len(larger)
+    for value in smaller:
+        low = bisect_left(larger, value, low, high)
+        if low == high:
+            break
+        if larger[low] == value:
+            common.append(value)
+    return common
+
+
+class _FieldIndex:
+    """Trigram index of one field: distinct values, their rows and trigram postings
+
+    Args:
+        values (Sequence[Optional[str]]): The field's value for every row
+    """
+
+    def __init__(self, values: Sequence[Optional[str]]) -> None:
+        value_ids: Dict[Any, int] = {}
+        row_values = array('I', [value_ids.setdefault(value, len(value_ids)) for value in values])
+        counts = [0] * len(value_ids)
+        for value_id in row_values:
+            counts[value_id] += 1
+        # rows grouped by value: the rows of value v are rows[starts[v]:starts[v + 1]]
+        self.starts: array = array('I', accumulate(counts, initial=0))
+        self.rows: array = array('I', sorted(range(len(row_values)), key=row_values.__getitem__))
+        # every value on one row (typically titles): the row of value v is rows[v]
+        self.single_row: bool = len(value_ids) == len(row_values)
+        self.keys: List[str] = [fold_search_key(value) for value in value_ids]
+        postings: Dict[str, List[int]] = {}
+        for value_id, key in enumerate(self.keys):
+            for gram in _ngrams(key):
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = [value_id]
+                else:
+                    ids.append(value_id)
+        self.postings: Dict[str, array] = {gram: array('I', ids) for gram, ids in postings.items()}
+        # the values in key order, for the ones starting with a query
+        self.sorted_keys: PrefixIndex = PrefixIndex(self.keys)
+
+    def rows_of(self, value_id: int) -> array:
+        return self.rows[self.starts[value_id]:self.starts[value_id + 1]]
+
+    def matches(self, folded_query: str) -> List[int]:
+        """Numbers of the values containing a folded query of at least NGRAM characters"""
+        posting_lists = [self.postings.get(gram) for gram in _ngrams(folded_query)]
+        if any(ids is None for ids in posting_lists):
+            return []
+        posting_lists.sort(key=len)
+        candidates = posting_lists[0]
+        for ids in posting_lists[1:]:
+            if not candidates:
+                break
+            candidates = _intersect(candidates, ids)
+        if len(folded_query) == NGRAM:
+            return list(candidates)
+        keys = self.keys
+        return [value_id for value_id in candidates if folded_query in keys[value_id]]
+
+    def best(self, folded_query: str, value_ids: List[int], match_class: int, count: int) -> List[int]:
+        """The first `count` values, in key order, of one class of matches() of a query:
+        0 the value starts with the query, 1 a later word in it does, 2 it is inside a word"""
+        if match_class == 0:
+            start, end = self.sorted_keys.prefix_range(folded_query)
+            return self.sorted_keys.positions[start:min(end, start + count)].tolist()
+        keys = self.keys
+        word_start = ' ' + folded_query
+        if match_class == 1:
+            tier = [value_id for value_id in value_ids
+                    if word_start in keys[value_id] and not keys[value_id].startswith(folded_query)]
+        else:
+            tier = [value_id for value_id in value_ids
+                    if word_start not in keys[value_id] and not keys[value_id].startswith(folded_query)]
+        return heapq.nsmallest(count, tier, key=keys.__getitem__)
+
+
+class NgramIndex:
+    """Substring index over several fields of MusicMasterSongList
+
+    Args:
+        library (Library): The songs; results are its rows
+        fields (Tuple[str, ...]): Fields searched, in ranking order
+    """
+
+    def __init__(self, library: Any, fields: Tuple[str, ...] = SEARCH_FIELDS) -> None:
+        self.fields: Tuple[str, ...] = fields
+        self.field_indexes: List[_FieldIndex] = [_FieldIndex(library.column(field)) for field in fields]
+
+    def matches(self, folded_query: str) -> List[List[int]]:
+        """For each field, the numbers of its values containing the folded query"""
+        return [field_index.matches(folded_query) for field_index in self.field_indexes]
+
+    def narrow(self, folded_query: str, matches: List[List[int]]) -> List[List[int]]:
+        """matches() for a query containing the one earlier matches were found for"""
+        return [[value_id for value_id in value_ids if folded_query in field_index.keys[value_id]]
+                for field_index, value_ids in zip(self.field_indexes, matches)]
+
+    def ranked(self, folded_query: str, matches: List[List[int]], limit: int) -> Tuple[List[int], int]:
+        """The best rows for matches() of a query, and how many rows match in all"""
+        rows: List[int] = []
+        for match_class in (0, 1, 2):
+            for field_index, value_ids in zip(self.field_indexes, matches):
+                if not value_ids:
+                    continue
+                # rows of different values of one field differ, so `limit` values are enough
+                for value_id in field_index.best(folded_query, value_ids, match_class, limit):
+                    for row in field_index.rows_of(value_id):
+                        if row not in rows:
+                            rows.append(row)
+                            if len(rows) == limit:
+                                return rows, self._count(matches)
+        return rows, self._count(matches)
+
+    def _count(self, matches: List[List[int]]) -> int:
+        """Rows matching in any field"""
+        matched_fields = [(field_index, value_ids) for field_index, value_ids
+                          in zip(self.field_indexes, matches) if value_ids]
+        if len(matched_fields) == 1:
+            # a field's values have no rows in common
+            field_index, value_ids = matched_fields[0]
+            if field_index.single_row:
+                return len(value_ids)
+            starts = field_index.starts
+            return sum(starts[value_id + 1] - starts[value_id] for value_id in value_ids)
+        matched_rows: set = set()
+        for field_index, value_ids in matched_fields:
+            starts, rows = field_index.starts, field_index.rows
+            if field_index.single_row:
+                matched_rows.update(map(rows.__getitem__, value_ids))
+                continue
+            for value_id in value_ids:
+                matched_rows.update(rows[starts[value_id]:starts[value_id + 1]])
+        return len(matched_rows)
+
+
+class NgramSearch:
+    """One search window's substring search over an NgramIndex
+
+    Args:
+        index (NgramIndex): The songs searched
+        short_search (PrefixSearch): Answers queries shorter than a trigram (title prefixes)
+    """
+
+    def __init__(self, index: NgramIndex, short_search: PrefixSearch) -> None:
+        self.index: NgramIndex = index
+        self.short_search: PrefixSearch = short_search
+        self._query: str = ''
+        self._matches: List[List[int]] = []
+
+    def search(self, keys_entered: str, limit: int = RESULT_LIMIT) -> Tuple[List[int], int]:
+        """Rows of the best matches, and how many songs match in all
+
+        Args:
+            keys_entered (str): What has been typed so far
+            limit (int): Most rows returned
+
+        Returns:
+            Tuple[List[int], int]: (rows of the library, total match count)
+        """
+        query = fold_search_key(keys_entered)
+        if len(query) < NGRAM:
+            self._query = ''
+            return self.short_search.search(keys_entered, limit)
+        if self._query and self._query in query:
+            self._matches = self.index.narrow(query, self._matches)
+        else:
+            self._matches = self.index.matches(query)
+        self._query = query
+        return self.index.ranked(query, self._matches, limit)
+
+
+def edit_distance(first: str, second: str, bound: int, prefix: bool = False) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or bound + 1 when it is over bound
+
+    Args:
+        first (str): A folded word
+        second (str): Another folded word
+        bound (int): Largest distance worth computing
+        prefix (bool): Distance from first to the closest start of second instead
+
+    Returns:
+        int: Insertions, deletions, substitutions and swaps of neighbouring characters needed
+    """
+    if len(second) < len(first) - bound or (len(second) > len(first) + bound and not prefix):
+        return bound + 1
+    previous_row: List[int] = []
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]
+                    and before_previous_row[j - 2] + 1 < row[j]):
+                row[j] = before_previous_row[j - 2] + 1
+        if min(row) > bound:
+            return bound + 1
+    return min(min(row) if prefix else row[-1], bound + 1)
+
+
+def _deletions(key: str, edits: int) -> set:
+    """key and the strings left by deleting up to `edits` of its characters"""
+    variants = {key}
+    for _ in range(edits):
+        variants |= {variant[:position] + variant[position + 1:]
+                     for variant in variants for position in range(len(variant))}
+    return variants
+
+
+class FuzzyIndex:
+    """Deletion neighbourhood of the words of a sequence of strings, for typo-tolerant searches
+
+    Args:
+        values (Sequence[Optional[str]]): e.g. the artist list; results are positions in it
+        edits (int): Most typos forgiven per word
+    """
+
+    def __init__(self, values: Sequence[Optional[str]], edits: int = FUZZY_EDITS) -> None:
+        self.edits: int = edits
+        self.keys: List[str] = [fold_search_key(value) for value in values]
+        word_ids: Dict[str, int] = {}
+        word_values: List[List[int]] = []
+        for position, key in enumerate(self.keys):
+            for word in set(_WORD.findall(key)):
+                word_id = word_ids.setdefault(word, len(word_ids))
+                if word_id == len(word_values):
+                    word_values.append([])
+                word_values[word_id].append(position)
+        self.words: List[str] = list(word_ids)
+        # positions of the values each word is in
+        self.word_values: List[array] = [array('I', positions) for positions in word_values]
+        self.word_index: PrefixIndex = PrefixIndex(self.words)
+        neighbourhood: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.words):
+            if len(word) < FUZZY_MIN_LENGTH - edits:
+                continue
+            for variant in _deletions(word[:FUZZY_PREFIX], edits):
+                ids = neighbourhood.get(variant)
+                if ids is None:
+                    neighbourhood[variant] = [word_id]
+                else:
+                    ids.append(word_id)
+        self.neighbourhood: Dict[str, array] = {variant: array('I', ids) for variant, ids in neighbourhood.items()}
+
+    def word_matches(self, typed_word: str, last: bool) -> Dict[int, int]:
+        """Words close to one folded typed word, with their distances (short words: words starting with it)
+
+        The last typed word may still be being typed, so it also matches the start of a word
+        (of one with the same first FUZZY_PREFIX characters when typed with a typo).
+        """
+        distances: Dict[int, int] = {}
+        if len(typed_word) < FUZZY_MIN_LENGTH or last:
+            start, end = self.word_index.prefix_range(typed_word)
+            distances = dict.fromkeys(self.word_index.positions[start:end], 0)
+            if len(typed_word) < FUZZY_MIN_LENGTH:
+                return distances
+        candidates: set = set()
+        for variant in _deletions(typed_word[:FUZZY_PREFIX], self.edits):
+            candidates.update(self.neighbourhood.get(variant, ()))
+        candidates.difference_update(distances)
+        for word_id in candidates:
+            distance = edit_distance(typed_word, self.words[word_id], self.edits, prefix=last)
+            if distance <= self.edits:
+                distances[word_id] = distance
+        return distances
+
+    def search(self, keys_entered: str) -> List[Tuple[int, int]]:
+        """Values with a close word for every typed word, closest first
+
+        Returns:
+            List[Tuple[int, int]]: (total distance, position) for every matching value, sorted
+        """
+        typed_words = _WORD.findall(fold_search_key(keys_entered))
+        if not typed_words or len(max(typed_words, key=len)) < FUZZY_MIN_LENGTH:
+            return []
+        totals: Optional[Dict[int, int]] = None
+        for word_number, typed_word in enumerate(typed_words):
+            value_distances: Dict[int, int] = {}
+            for word_id, distance in self.word_matches(typed_word, word_number == len(typed_words) - 1).items():
+                for position in self.word_values[word_id]:
+                    if value_distances.get(position, distance + 1) > distance:
+                        value_distances[position] = distance
+            if totals is None:
+                totals = value_distances
+            else:
+                totals = {position: total + value_distances[position]
+                          for position, total in totals.items() if position in value_distances}
+            if not totals:
+                return []
+        return sorted((total, position) for position, total in totals.items())
+
+
+class FuzzySearch:
+    """One search window's typo-tolerant search: prefix matches, then the closest fuzzy ones
+
+    Args:
+        index (FuzzyIndex): The artists searched
+        prefix_search (PrefixSearch): Prefix search over the same values
+    """
+
+    def __init__(self, index: FuzzyIndex, prefix_search: PrefixSearch) -> None:
+        self.index: FuzzyIndex = index
+        self.prefix_search: PrefixSearch = prefix_search
+
+    def search(self, keys_entered: str, limit: int = RESULT_LIMIT) -> Tuple[List[int], int]:
+        """Positions of the best matches, and how many match in all
+
+        Args:
+            keys_entered (str): What has been typed so far
+            limit (int): Most positions returned
+
+        Returns:
+            Tuple[List[int], int]: (positions in the indexed values, total match count)
+        """
+        positions, count = self.prefix_search.search(keys_entered, limit)
+        if count >= limit:
+            return positions, count
+        # fewer prefix matches than buttons: positions holds all of them
+        fuzzy = [position for _, position in self.index.search(keys_entered) if position not in positions]
+        return positions + fuzzy[:limit - len(positions)], count + len(fuzzy)
@@ -0,0 +1,155 @@
+"""
+Track Prefetch Module
+Warms the next few queued songs into the operating system's page cache so play_song() never
+waits for an SD card or a spun-down USB disk.
+
+The engine hands the prefetcher the locations of the songs coming up (the rest of the paid
+queue, then the head of the random rotation) before each song. A background thread walks
+that list in order and, for each song not warmed yet:
+    1. reads the first chunk - this is the read that pays for a disk spin-up or a slow card,
+       and its time is recorded as the start latency the song will not suffer later
+    2. warms the rest of the file, either with posix_fadvise(POSIX_FADV_WILLNEED), which
+       asks the kernel to read it ahead asynchronously, or by reading it sequentially where
+       posix_fadvise is not available (Windows, macOS)
+Warmed bytes of songs still waiting to play are kept within budget_bytes; the song that
+would overflow the budget is warmed only up to it and later songs wait their turn. When a
+song starts, take() reports whether it was warmed and the latency that saved.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_BUDGET_BYTES: int = 64 * 1024 * 1024
+CHUNK_SIZE: int = 1024 * 1024
+
+METHODS: tuple = ('auto', 'fadvise', 'read')
+
+
+class TrackPrefetcher:
+    """Background page-cache warmer for upcoming songs
+
+    Args:
+        budget_bytes (int): Most bytes kept warmed for songs that have not started yet
+        method (str): 'fadvise', 'read', or 'auto' (fadvise where the OS supports it)
+        chunk_size (int): Size of the first read and of each sequential read
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, method: str = 'auto',
+                 chunk_size: int = CHUNK_SIZE) -> None:
+        if method not in METHODS:
+            raise ValueError(f"Unknown prefetch method: {method}")
+        if method == 'auto':
+            method = 'fadvise' if hasattr(os, 'posix_fadvise') else 'read'
+        self.budget_bytes: int = max(0, int(budget_bytes))
+        self.method: str = method
+        self.chunk_size: int = chunk_size
+        self._plan: List[str] = []
+        self._generation: int = 0  # bumped by update() so a warm in progress can stop early
+        self._warmed: Dict[str, Dict[str, Any]] = {}  # location -> bytes, first_read_seconds, seconds
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, Any] = {'hits': 0, 'misses': 0, 'bytes_warmed': 0, 'latency_saved_seconds': 0.0}
+
+    def update(self, locations: List[str]) -> None:
+        """Set the songs coming up, next first; warmed songs no longer in the list are forgotten"""
+        plan = list(dict.fromkeys(locations))
+        with self._lock:
+            if plan == self._plan:
+                return
+            self._plan = plan
+            self._generation += 1
+            for location in [location for location in self._warmed if location not in plan]:
+                del self._warmed[location]
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name='track-prefetch', daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def take(self, location: str) -> Optional[Dict[str, Any]]:
+        """Record that a song is starting
+
+        Returns:
+            Optional[Dict[str, Any]]: How it was warmed ('bytes', 'first_read_seconds' - the
+                latency saved - and 'seconds'), or None if it was not warmed in time
+        """
+        with self._lock:
+            record = self._warmed.pop(location, None)
+            if location in self._plan:
+                self._plan.remove(location)
+            if record is None:
+                self._stats['misses'] += 1
+            else:
+                self._stats['hits'] += 1
+                self._stats['latency_saved_seconds'] += record['first_read_seconds']
+        # Its bytes no longer count against the budget: warm further ahead
+        self._wake.set()
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        """Songs started warmed ('hits') and cold ('misses'), bytes warmed and latency saved"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['latency_saved_seconds'] = round(stats['latency_saved_seconds'], 3)
+        return stats
+
+    def close(self) -> None:
+        """Stop the background thread"""
+        self._closed = True
+        with self._lock:
+            self._generation += 1
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            while not self._closed:
+                with self._lock:
+                    generation = self._generation
+                    used = sum(record['bytes'] for record in self._warmed.values())
+                    pending = [location for location in self._plan if location not in self._warmed]
+                if not pending or used >= self.budget_bytes:
+                    break
+                location = pending[0]
+                record = self._warm(location, self.budget_bytes - used, generation)
+                with self._lock:
+                    # The queue may have changed while warming; keep the result only if the song is still coming up
+                    if location not in self._plan:
+                        continue
+                    if record is None:
+                        # Missing or unreadable: play_song() will report it; do not retry
+                        self._plan.remove(location)
+                        continue
+                    self._warmed[location] = record
+                    self._stats['bytes_warmed'] += record['bytes']
+
+    def _warm(self, location: str, limit: int, generation: int) -> Optional[Dict[str, Any]]:
+        """Warm up to limit bytes of a file into the page cache"""
+        started = time.perf_counter()
+        try:
+            file_descriptor = os.open(location, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except OSError:
+            return None
+        try:
+            length = min(os.fstat(file_descriptor).st_size, limit)
+            position = len(os.read(file_descriptor, min(self.chunk_size, length)))
+            first_read_seconds = time.perf_counter() - started
+            if self.method == 'fadvise':
+                if length > position:  # a length of 0 would mean the whole file
+                    os.posix_fadvise(file_descriptor, position, length - position, os.POSIX_FADV_WILLNEED)
+            else:
+                while position < length and generation == self._generation and not self._closed:
+                    data = os.read(file_descriptor, min(self.chunk_size, length - position))
+                    if not data:
+                        break
+                    position += len(data)
+                length = position
+        except OSError:
+            return None
+        finally:
+            os.close(file_descriptor)
+        return {'bytes': length, 'first_read_seconds': first_read_seconds,
+                'seconds': time.perf_counter() - started}
@@ -0,0 +1,394 @@
+"""
+Audio Analysis Module
+Offline loudness and silence analysis, cached per song id so playback can level volumes and
+skip dead air without doing any work at play time.
+
+Each track is decoded once, streamed through NumPy in one-second chunks:
+    - integrated loudness in LUFS (ITU-R BS.1770: K-weighted 400 ms blocks with 75% overlap,
+      absolute gate at -70 LUFS and relative gate 10 LU below). The K-weighting filter is
+      applied in the frequency domain to each 100 ms sub-block, so no IIR filter (and no
+      SciPy) is needed
+    - sample peak in dBFS
+    - cue points: the start of the first and the end of the last 10 ms frame louder than the
+      silence threshold, so leading and trailing silence can be skipped
+Tracks are analysed in parallel, one process per core.
+
+Decoders are pluggable - add a function to DECODERS that returns the sample rate and an
+iterator of float32 (frames, channels) arrays:
+    ffmpeg  decodes anything ffmpeg can read (the default)
+    vlc     transcodes through libvlc's stream output to a temporary WAV file
+    wav     16-bit PCM WAV files, standard library only
+
+The cache is AudioAnalysis.json:
+    {"version": 1, "settings": {"silence_threshold_db": -50.0},
+     "tracks": {"5323782981007746": {"loudness": -9.42, "peak": -0.1, "cue_in": 1.23,
+                                     "cue_out": 212.4, "duration": 214.05}}}
+Loudness is stored rather than a gain, so changing the target level needs no re-analysis.
+
+Usage:
+    python audio_analysis_module.py [--decoder ffmpeg] [--workers 0] [--output AudioAnalysis.json]
+"""
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+CACHE_VERSION: int = 1
+
+DEFAULT_SILENCE_THRESHOLD_DB: float = -50.0
+DEFAULT_TARGET_LOUDNESS: float = -14.0
+
+# Sample rate and channels the ffmpeg and vlc decoders produce
+DECODE_SAMPLE_RATE: int = 44100
+DECODE_CHANNELS: int = 2
+
+# BS.1770 gating
+ABSOLUTE_GATE_LUFS: float = -70.0
+RELATIVE_GATE_LU: float = -10.0
+
+# Tracks written to the cache file between saves, so an interrupted run keeps its progress
+SAVE_EVERY: int = 50
+
+
+class DecodeError(Exception):
+    """A decoder could not produce PCM for a file"""
+
+
+def _pcm16_chunks(read: Callable[[int], bytes], channels: int, frames_per_chunk: int) -> Iterator[Any]:
+    """Turn a stream of interleaved 16-bit little-endian PCM into float32 (frames, channels) chunks"""
+    import numpy as np  # deferred so the engine can read the cache without NumPy
+    frame_bytes = 2 * channels
+    while True:
+        data = read(frames_per_chunk * frame_bytes)
+        usable = len(data) - len(data) % frame_bytes
+        if usable == 0:
+            return
+        yield np.frombuffer(data[:usable], dtype='<i2').reshape(-1, channels).astype(np.float32) / 32768.0
+
+
+def decode_wav(file_path: str) -> Tuple[int, Iterator[Any]]:
+    """Decode a 16-bit PCM WAV file"""
+    try:
+        wav_file = wave.open(file_path, 'rb')
+    except (OSError, wave.Error, EOFError) as e:
+        raise DecodeError(str(e))
+    if wav_file.getsampwidth() != 2:
+        wav_file.close()
+        raise DecodeError('only 16-bit WAV is supported')
+    sample_rate = wav_file.getframerate()
+    channels = wav_file.getnchannels()
+
+    def chunks() -> Iterator[Any]:
+        with wav_file:
+            yield from _pcm16_chunks(lambda size: wav_file.readframes(size // (2 * channels)), channels, sample_rate)
+    return sample_rate, chunks()
+
+
+def decode_ffmpeg(file_path: str) -> Tuple[int, Iterator[Any]]:
+    """Decode any format ffmpeg reads, piping 16-bit stereo PCM from a subprocess"""
+    if shutil.which('ffmpeg') is None:
+        raise DecodeError('ffmpeg not found')
+    process = subprocess.Popen(['ffmpeg', '-v', 'error', '-nostdin', '-i', file_path, '-f', 's16le',
+                                '-ac', str(DECODE_CHANNELS), '-ar', str(DECODE_SAMPLE_RATE), '-'],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def chunks() -> Iterator[Any]:
+        try:
+            yield from _pcm16_chunks(process.stdout.read, DECODE_CHANNELS, DECODE_SAMPLE_RATE)
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise DecodeError(f'ffmpeg exited with {process.returncode}')
+    return DECODE_SAMPLE_RATE, chunks()
+
+
+def decode_vlc(file_path: str) -> Tuple[int, Iterator[Any]]:
+    """Decode through libvlc, transcoding to a temporary WAV file as fast as the CPU allows
+
+    libvlc's audio callbacks are paced by the playback clock (a 4 minute song takes 4
+    minutes), so the stream output chain is used instead.
+    """
+    import vlc  # deferred so the other decoders never need libvlc
+    handle, wav_path = tempfile.mkstemp(suffix='.wav')
+    os.close(handle)
+    instance = vlc.Instance('--quiet', '--no-video')
+    player = instance.media_player_new()
+    media = instance.media_new(file_path)
+    media.add_option(f':sout=#transcode{{acodec=s16l,channels={DECODE_CHANNELS},samplerate={DECODE_SAMPLE_RATE}}}'
+                     f':std{{access=file,mux=wav,dst={wav_path}}}')
+    media.add_option(':no-sout-video')
+    player.set_media(media)
+    try:
+        player.play()
+        while player.get_state() not in (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped):
+            time.sleep(0.05)
+        failed = player.get_state() == vlc.State.Error
+    finally:
+        player.stop()
+        player.release()
+        instance.release()
+    if failed:
+        os.remove(wav_path)
+        raise DecodeError('libvlc could not decode the file')
+    sample_rate, wav_chunks = decode_wav(wav_path)
+
+    def chunks() -> Iterator[Any]:
+        try:
+            yield from wav_chunks
+        finally:
+            os.remove(wav_path)
+    return sample_rate, chunks()
+
+
+DECODERS: Dict[str, Callable[[str], Tuple[int, Iterator[Any]]]] = {
+    'ffmpeg': decode_ffmpeg,
+    'vlc': decode_vlc,
+    'wav': decode_wav
+}
+
+
+def _biquad_power(b: Tuple[float, float, float], a: Tuple[float, float, float], omega: Any) -> Any:
+    """|H(e^jw)|^2 of a biquad at the angular frequencies omega"""
+    import numpy as np
+    z1 = np.exp(-1j * omega)
+    z2 = z1 * z1
+    return np.abs((b[0] + b[1] * z1 + b[2] * z2) / (a[0] + a[1] * z1 + a[2] * z2)) ** 2
+
+
+def k_weighting_power(sample_rate: int, block_size: int) -> Any:
+    """Power response of the BS.1770 K-weighting filter at the rfft bins of block_size samples
+
+    The filter stages (a high shelf, then a high-pass) are built for sample_rate from the
+    analog prototype that reproduces the 48 kHz coefficients in the standard (as libebur128
+    does).
+    """
+    import numpy as np
+    omega = 2 * np.pi * np.fft.rfftfreq(block_size, 1.0 / sample_rate) / sample_rate
+
+    gain_db, q, centre = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = math.tan(math.pi * centre / sample_rate)
+    high_gain = 10 ** (gain_db / 20)
+    band_gain = high_gain ** 0.4996667741545416
+    shelf_b = (high_gain + band_gain * k / q + k * k, 2 * (k * k - high_gain), high_gain - band_gain * k / q + k * k)
+    shelf_a = (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k)
+
+    q, centre = 0.5003270373238773, 38.13547087602444
+    k = math.tan(math.pi * centre / sample_rate)
+    high_pass_b = (1.0, -2.0, 1.0)
+    high_pass_a = (1.0, 2 * (k * k - 1) / (1 + k / q + k * k), (1 - k / q + k * k) / (1 + k / q + k * k))
+
+    return _biquad_power(shelf_b, shelf_a, omega) * _biquad_power(high_pass_b, high_pass_a, omega)
+
+
+def analyse_pcm(sample_rate: int, chunks: Iterator[Any],
+                silence_threshold_db: float = DEFAULT_SILENCE_THRESHOLD_DB) -> Dict[str, Any]:
+    """Measure loudness, peak and cue points of a stream of PCM chunks
+
+    Args:
+        sample_rate (int): Samples per second
+        chunks (Iterator[np.ndarray]): float32 (frames, channels) arrays in [-1, 1]
+        silence_threshold_db (float): Level in dBFS below which a 10 ms frame counts as silence
+
+    Returns:
+        Dict[str, Any]: 'loudness' (LUFS, None for a silent track), 'peak' (dBFS), 'cue_in'
+            and 'cue_out' (seconds) and 'duration' (seconds)
+    """
+    import numpy as np
+    sub_block = sample_rate // 10
+    frame = sub_block // 10
+    # Parseval weights: interior rfft bins stand for two bins of the full spectrum
+    bins = np.full(sub_block // 2 + 1, 2.0)
+    bins[0] = 1.0
+    if sub_block % 2 == 0:
+        bins[-1] = 1.0
+    weights = k_weighting_power(sample_rate, sub_block) * bins / float(sub_block) ** 2
+
+    sub_block_power: List[Any] = []  # K-weighted mean square per 100 ms sub-block and channel
+    frame_power: List[Any] = []  # unweighted mean square per 10 ms frame
+    peak = 0.0
+    total_frames = 0
+    pending: Optional[Any] = None
+    for chunk in chunks:
+        total_frames += len(chunk)
+        if len(chunk):
+            peak = max(peak, float(np.abs(chunk).max()))
+        if pending is not None and len(pending):
+            chunk = np.concatenate([pending, chunk])
+        usable = len(chunk) - len(chunk) % sub_block
+        pending = chunk[usable:]
+        if usable == 0:
+            continue
+        blocks = chunk[:usable].reshape(-1, sub_block, chunk.shape[1])
+        spectrum = np.fft.rfft(blocks, axis=1)
+        sub_block_power.append(np.einsum('bkc,k->bc', spectrum.real ** 2 + spectrum.imag ** 2, weights))
+        frame_power.append(np.square(blocks[:, :frame * 10]).reshape(-1, frame, chunk.shape[1]).mean(axis=(1, 2)))
+    if pending is not None and len(pending) >= frame:
+        tail = pending[:len(pending) - len(pending) % frame]
+        frame_power.append(np.square(tail).reshape(-1, frame, tail.shape[1]).mean(axis=(1, 2)))
+
+    duration = total_frames / sample_rate
+    result: Dict[str, Any] = {'loudness': None, 'peak': round(20 * math.log10(peak), 2) if peak > 0 else None,
+                              'cue_in': 0.0, 'cue_out': round(duration, 2), 'duration': round(duration, 2)}
+
+    if frame_power:
+        levels = np.concatenate(frame_power)
+        loud = np.flatnonzero(levels > 10 ** (silence_threshold_db / 10))
+        if len(loud):
+            result['cue_in'] = round(float(loud[0]) * frame / sample_rate, 2)
+            result['cue_out'] = round(min(duration, float(loud[-1] + 1) * frame / sample_rate), 2)
+
+    if sub_block_power:
+        power = np.concatenate(sub_block_power)
+        if len(power) >= 4:
+            # 400 ms gating blocks with 75% overlap: the mean of four consecutive sub-blocks
+            cumulative = np.concatenate([np.zeros((1, power.shape[1])), np.cumsum(power, axis=0)])
+            block_power = ((cumulative[4:] - cumulative[:-4]) / 4).sum(axis=1)
+            with np.errstate(divide='ignore'):
+                block_loudness = -0.691 + 10 * np.log10(block_power)
+            gated = block_power[block_loudness > ABSOLUTE_GATE_LUFS]
+            if len(gated):
+                relative_gate = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE_LU
+                gated = block_power[block_loudness > max(relative_gate, ABSOLUTE_GATE_LUFS)]
+                result['loudness'] = round(-0.691 + 10 * math.log10(gated.mean()), 2)
+    return result
+
+
+def analyse_file(file_path: str, decoder: str = 'ffmpeg',
+                 silence_threshold_db: float = DEFAULT_SILENCE_THRESHOLD_DB) -> Dict[str, Any]:
+    """Decode and analyse one file (see analyse_pcm()); raises DecodeError on failure"""
+    sample_rate, chunks = DECODERS[decoder](file_path)
+    return analyse_pcm(sample_rate, chunks, silence_threshold_db)
+
+
+def _analyse_song(job: Tuple[str, str, str, float]) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Worker process entry point: (song id, location, decoder, threshold) -> (id, result, error)"""
+    song_id, location, decoder, silence_threshold_db = job
+    try:
+        return song_id, analyse_file(location, decoder, silence_threshold_db), None
+    except Exception as e:
+        return song_id, None, str(e) or type(e).__name__
+
+
+def load_analysis_cache(cache_file: str) -> Optional[Dict[str, Any]]:
+    """Load AudioAnalysis.json (None if missing, unreadable or outdated)"""
+    try:
+        with open(cache_file, 'r') as file:
+            cache = json.load(file)
+    except (IOError, json.JSONDecodeError):
+        return None
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return None
+    return cache
+
+
+def save_analysis_cache(cache_file: str, cache: Dict[str, Any]) -> bool:
+    """Write AudioAnalysis.json, replacing the old one atomically"""
+    temp_file = cache_file + '.tmp'
+    try:
+        with open(temp_file, 'w') as file:
+            json.dump(cache, file)
+        os.replace(temp_file, cache_file)
+        return True
+    except IOError:
+        return False
+
+
+def analyse_library(songs: List[Dict[str, Any]], cache_file: str, decoder: str = 'ffmpeg', workers: int = 0,
+                    silence_threshold_db: float = DEFAULT_SILENCE_THRESHOLD_DB,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Analyse every song missing from the cache, in parallel, and update the cache file
+
+    Args:
+        songs (List[Dict[str, Any]]): MusicMasterSongList entries (with 'id' and 'location')
+        cache_file (str): AudioAnalysis.json
+        decoder (str): Name of a DECODERS entry
+        workers (int): Worker processes (0 = one per core)
+        silence_threshold_db (float): See analyse_pcm(); changing it re-analyses every track
+        progress (Optional[Callable[[int, int], None]]): Called with (done, total) after each track
+
+    Returns:
+        Dict[str, Any]: 'analysed', 'cached', 'failed' ({song id: error}) and 'seconds'
+    """
+    started = time.perf_counter()
+    settings = {'silence_threshold_db': silence_threshold_db}
+    cache = load_analysis_cache(cache_file)
+    if cache is None or cache.get('settings') != settings:
+        cache = {'version': CACHE_VERSION, 'settings': settings, 'tracks': {}}
+    tracks: Dict[str, Dict[str, Any]] = cache['tracks']
+
+    jobs = [(str(song['id']), song['location'], decoder, silence_threshold_db) for song in songs
+            if str(song['id']) not in tracks]
+    failed: Dict[str, str] = {}
+    from concurrent.futures import ProcessPoolExecutor  # deferred: multiprocessing is slow to import
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for done, (song_id, result, error) in enumerate(pool.map(_analyse_song, jobs, chunksize=4), 1):
+            if result is not None:
+                tracks[song_id] = result
+            else:
+                failed[song_id] = error
+            if done % SAVE_EVERY == 0:
+                save_analysis_cache(cache_file, cache)
+            if progress is not None:
+                progress(done, len(jobs))
+    save_analysis_cache(cache_file, cache)
+    return {'analysed': len(jobs) - len(failed), 'cached': len(songs) - len(jobs), 'failed': failed,
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def playback_settings(analysis: Optional[Dict[str, Any]], volume: int, target_loudness: float = DEFAULT_TARGET_LOUDNESS,
+                      max_volume: int = 100, apply_gain: bool = True,
+                      skip_silence: bool = True) -> Tuple[int, float, Optional[float]]:
+    """Turn a track's cached analysis into the volume and play range to use
+
+    The gain that brings the track to target_loudness scales the configured volume, limited so
+    the track's peak stays at or below full scale and the volume stays within max_volume.
+
+    Args:
+        analysis (Optional[Dict[str, Any]]): The track's cache entry (None plays it untouched)
+        volume (int): Configured playback volume (0-100)
+        target_loudness (float): Loudness every track is levelled to, in LUFS
+        max_volume (int): Highest volume a quiet track may be raised to
+        apply_gain (bool): Level the volume
+        skip_silence (bool): Start at cue_in and stop at cue_out
+
+    Returns:
+        Tuple[int, float, Optional[float]]: Volume, start time and stop time (None = the end)
+    """
+    if analysis is None:
+        return volume, 0.0, None
+    if apply_gain and analysis.get('loudness') is not None:
+        gain_db = target_loudness - analysis['loudness']
+        if analysis.get('peak') is not None:
+            gain_db = min(gain_db, -analysis['peak'])
+        volume = max(0, min(max_volume, int(round(volume * 10 ** (gain_db / 20)))))
+    if not skip_silence:
+        return volume, 0.0, None
+    stop_time = analysis['cue_out'] if analysis['cue_out'] < analysis['duration'] else None
+    return volume, analysis['cue_in'], stop_time
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Measure loudness and silence of the songs in MusicMasterSongList.txt')
+    parser.add_argument('--song-list', default='MusicMasterSongList.txt', help='Master song list to analyse')
+    parser.add_argument('--output', default='AudioAnalysis.json', help='Cache file to update')
+    parser.add_argument('--decoder', default='ffmpeg', choices=sorted(DECODERS), help='PCM decoder (default: ffmpeg)')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: one per core)')
+    parser.add_argument('--silence-threshold', type=float, default=DEFAULT_SILENCE_THRESHOLD_DB,
+                        help=f'Silence level in dBFS (default: {DEFAULT_SILENCE_THRESHOLD_DB})')
+    args = parser.parse_args()
+
+    with open(args.song_list, 'r') as song_list_file:
+        song_list = json.load(song_list_file)
+    summary = analyse_library(song_list, args.output, args.decoder, args.workers, args.silence_threshold,
+                              progress=lambda done, total: print(f'\r{done}/{total}', end='', flush=True))
+    print()
+    for failed_id, error in summary['failed'].items():
+        print(f'failed {failed_id}: {error}')
+    print(f"{summary['analysed']} tracks analysed, {summary['cached']} already cached, "
+          f"{len(summary['failed'])} failed in {summary['seconds']}s")
@@ -0,0 +1,356 @@
+"""
+Audio Backend Module
+Pluggable audio playback used by the jukebox engine, the GUI sound effects and the popups.
+
+Two implementations are provided:
+- VlcAudioBackend: real playback through libvlc (python-vlc)
+- FakeAudioBackend: deterministic, device-free playback driven by a VirtualClock so the
+  engine loop can run headless (benchmarks, CI, simulations) at many times real speed
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from typing import Protocol
+except ImportError:  # Python 3.7
+    Protocol = object
+
+
+class SystemClock:
+    """Wall clock used by real audio backends"""
+
+    def now(self) -> float:
+        """Return the current time in seconds since the epoch"""
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        """Block for the given number of seconds"""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Deterministic clock that only moves when asked to
+
+    Args:
+        start_time (float): Epoch seconds the clock starts at (defaults to the real time now)
+        speed (float): Ratio of virtual to real seconds. 0 (default) never blocks;
+            1000.0 really sleeps 1 ms for every virtual second.
+    """
+
+    def __init__(self, start_time: Optional[float] = None, speed: float = 0.0) -> None:
+        self._now: float = time.time() if start_time is None else float(start_time)
+        self.speed: float = speed
+
+    def now(self) -> float:
+        """Return the current virtual time in seconds since the epoch"""
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward without blocking"""
+        if seconds > 0:
+            self._now += seconds
+
+    def sleep(self, seconds: float) -> None:
+        """Advance the clock, optionally pacing against real time"""
+        if seconds <= 0:
+            return
+        if self.speed > 0:
+            time.sleep(seconds / self.speed)
+        self._now += seconds
+
+
+class AudioBackend(Protocol):
+    """Interface every audio backend implements
+
+    A backend owns one player: load() a file, play() it, poll is_playing() or
+    has_ended(), and stop() it. clock supplies now()/sleep() so callers that wait
+    on playback never touch time.sleep() directly.
+    """
+
+    clock: Any
+
+    def load(self, file_path: str, start_time: float = 0.0, stop_time: Optional[float] = None) -> None: ...
+
+    def play(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+    def is_playing(self) -> bool: ...
+
+    def get_position(self) -> float: ...
+
+    def has_ended(self) -> bool: ...
+
+    def add_end_callback(self, callback: Callable[[], None]) -> None: ...
+
+    def set_volume(self, volume: int) -> None: ...
+
+    def get_volume(self) -> int: ...
+
+
+class VlcAudioBackend:
+    """Audio backend built on libvlc
+
+    Args:
+        silent (bool): Suppress libvlc's C-level stdout/stderr chatter while creating players
+        volume (int): Initial volume (0-100)
+    """
+
+    def __init__(self, silent: bool = False, volume: int = 100) -> None:
+        import vlc  # deferred so headless runs never need libvlc
+        self._vlc = vlc
+        self.clock: SystemClock = SystemClock()
+        self.silent: bool = silent
+        self._volume: int = volume
+        self._player: Optional[Any] = None
+        self._ended: threading.Event = threading.Event()
+        self._end_callbacks: List[Callable[[], None]] = []
+
+    def _create_player(self, file_path: str) -> Any:
+        """Create a vlc.MediaPlayer, redirecting fds 1 and 2 to /dev/null when silent"""
+        if not self.silent:
+            return self._vlc.MediaPlayer(file_path)
+        old_stdout = os.dup(1)
+        old_stderr = os.dup(2)
+        try:
+            with open(os.devnull, 'w') as devnull:
+                os.dup2(devnull.fileno(), 1)
+                os.dup2(devnull.fileno(), 2)
+                return self._vlc.MediaPlayer(file_path)
+        finally:
+            os.dup2(old_stdout, 1)
+            os.dup2(old_stderr, 2)
+            os.close(old_stdout)
+            os.close(old_stderr)
+
+    def _on_end_reached(self, event: Any) -> None:
+        """libvlc event callback - runs on a libvlc thread"""
+        self._ended.set()
+        for callback in self._end_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Audio end callback error: {e}")
+
+    def load(self, file_path: str, start_time: float = 0.0, stop_time: Optional[float] = None) -> None:
+        """Load a file, replacing any previously loaded track
+
+        Args:
+            file_path (str): File to play
+            start_time (float): Seconds into the file where playback starts
+            stop_time (Optional[float]): Seconds into the file where playback ends (None = the end)
+        """
+        if self._player is not None:
+            self._player.stop()
+        self._ended.clear()
+        self._player = self._create_player(file_path)
+        media = self._player.get_media()
+        if start_time > 0:
+            media.add_option(f':start-time={start_time:.2f}')
+        if stop_time is not None:
+            media.add_option(f':stop-time={stop_time:.2f}')
+        events = self._player.event_manager()
+        events.event_attach(self._vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+        events.event_attach(self._vlc.EventType.MediaPlayerEncounteredError, self._on_end_reached)
+
+    def play(self) -> None:
+        """Start playback of the loaded file"""
+        if self._player is None:
+            return
+        self._player.play()
+        self._player.audio_set_volume(self._volume)
+
+    def stop(self) -> None:
+        """Stop playback"""
+        if self._player is not None:
+            self._player.stop()
+
+    def is_playing(self) -> bool:
+        """Return True while the loaded track is playing"""
+        return bool(self._player is not None and self._player.is_playing())
+
+    def get_position(self) -> float:
+        """Return the playback position in seconds"""
+        if self._player is None:
+            return 0.0
+        return max(self._player.get_time(), 0) / 1000.0
+
+    def has_ended(self) -> bool:
+        """Return True once libvlc reported end of track (or an error)"""
+        return self._ended.is_set()
+
+    def add_end_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callable invoked when the current track ends"""
+        self._end_callbacks.append(callback)
+
+    def set_volume(self, volume: int) -> None:
+        """Set the volume (0-100)"""
+        self._volume = max(0, min(100, int(volume)))
+        if self._player is not None:
+            self._player.audio_set_volume(self._volume)
+
+    def get_volume(self) -> int:
+        """Return the volume (0-100)"""
+        return self._volume
+
+
+class FakeAudioBackend:
+    """Deterministic audio backend for headless runs
+
+    Nothing is decoded or sent to an audio device. A track "plays" for its
+    duration on the virtual clock, so polling with clock.sleep() finishes a
+    three-minute song in microseconds when the clock speed is 0.
+
+    Args:
+        clock (VirtualClock): Clock to run on (a new one is created if omitted)
+        durations (Dict[str, float]): Optional duration in seconds per file path
+        default_duration (float): Duration used for files not in durations
+        duration_lookup (Callable[[str], Optional[float]]): Optional resolver tried before default_duration
+        fail_paths (set): File paths that behave like unplayable files (end immediately)
+    """
+
+    def __init__(self, clock: Optional[VirtualClock] = None, durations: Optional[Dict[str, float]] = None,
+                 default_duration: float = 180.0,
+                 duration_lookup: Optional[Callable[[str], Optional[float]]] = None,
+                 fail_paths: Optional[set] = None) -> None:
+        self.clock: VirtualClock = clock if clock is not None else VirtualClock()
+        self.durations: Dict[str, float] = dict(durations or {})
+        self.default_duration: float = default_duration
+        self.duration_lookup: Optional[Callable[[str], Optional[float]]] = duration_lookup
+        self.fail_paths: set = set(fail_paths or ())
+        self.loaded_file: Optional[str] = None
+        self.play_log: List[Dict[str, Any]] = []
+        self._volume: int = 100
+        self._duration: float = 0.0
+        self._start_time: float = 0.0
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._end_fired: bool = False
+        self._end_callbacks: List[Callable[[], None]] = []
+
+    def _resolve_duration(self, file_path: str) -> float:
+        """Work out how long a file 'plays' for"""
+        if file_path in self.fail_paths:
+            return 0.0
+        if file_path in self.durations:
+            return float(self.durations[file_path])
+        if self.duration_lookup is not None:
+            duration = self.duration_lookup(file_path)
+            if duration is not None:
+                return float(duration)
+        return self.default_duration
+
+    def _elapsed(self) -> float:
+        if self._started_at is None:
+            return 0.0
+        end = self._stopped_at if self._stopped_at is not None else self.clock.now()
+        return self._start_time + min(end - self._started_at, self._duration)
+
+    def _check_end(self) -> None:
+        """Fire end callbacks once the virtual clock passes the end of the track"""
+        if self._end_fired or self._started_at is None or self._stopped_at is not None:
+            return
+        if self.clock.now() - self._started_at >= self._duration:
+            self._end_fired = True
+            for callback in self._end_callbacks:
+                callback()
+
+    def load(self, file_path: str, start_time: float = 0.0, stop_time: Optional[float] = None) -> None:
+        """Load a file, replacing any previously loaded track
+
+        Args:
+            file_path (str): File to play
+            start_time (float): Seconds into the file where playback starts
+            stop_time (Optional[float]): Seconds into the file where playback ends (None = the end)
+        """
+        self.loaded_file = file_path
+        duration = self._resolve_duration(file_path)
+        if stop_time is not None:
+            duration = min(duration, stop_time)
+        self._start_time = min(start_time, duration)
+        self._duration = duration - self._start_time
+        self._started_at = None
+        self._stopped_at = None
+        self._end_fired = False
+
+    def play(self) -> None:
+        """Start playback at the current virtual time"""
+        if self.loaded_file is None:
+            return
+        self._started_at = self.clock.now()
+        self._stopped_at = None
+        self.play_log.append({'file': self.loaded_file, 'start': self._started_at,
+                              'duration': self._duration, 'volume': self._volume,
+                              'start_time': self._start_time})
+
+    def stop(self) -> None:
+        """Stop playback"""
+        if self._started_at is not None and self._stopped_at is None:
+            self._stopped_at = self.clock.now()
+
+    def is_playing(self) -> bool:
+        """Return True while the virtual clock is inside the track"""
+        self._check_end()
+        return (self._started_at is not None and self._stopped_at is None
+                and self.clock.now() - self._started_at < self._duration)
+
+    def get_position(self) -> float:
+        """Return the playback position in seconds"""
+        return self._elapsed()
+
+    def has_ended(self) -> bool:
+        """Return True once the track played to its end"""
+        self._check_end()
+        return self._end_fired
+
+    def add_end_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callable invoked when the current track ends"""
+        self._end_callbacks.append(callback)
+
+    def set_volume(self, volume: int) -> None:
+        """Set the volume (0-100)"""
+        self._volume = max(0, min(100, int(volume)))
+
+    def get_volume(self) -> int:
+        """Return the volume (0-100)"""
+        return self._volume
+
+
+def create_audio_backend(backend_name: str = 'vlc', **kwargs: Any) -> Any:
+    """Create an audio backend by name
+
+    Args:
+        backend_name (str): 'vlc' or 'fake'
+        **kwargs: Passed to the backend constructor
+
+    Returns:
+        AudioBackend: The new backend
+    """
+    if backend_name == 'vlc':
+        return VlcAudioBackend(**kwargs)
+    if backend_name == 'fake':
+        return FakeAudioBackend(**kwargs)
+    raise ValueError(f"Unknown audio backend: {backend_name}")
+
+
+def create_sound_effect_player(file_path: str, backend_name: str = 'vlc') -> Any:
+    """Create a backend loaded with a short UI sound (buzz, success)
+
+    The VLC backend is created silent so libvlc warnings do not clutter the console.
+    Call play() on the result and keep a reference to it until the sound finishes.
+
+    Args:
+        file_path (str): Sound file to load
+        backend_name (str): 'vlc' or 'fake'
+
+    Returns:
+        AudioBackend: The loaded backend
+    """
+    if backend_name == 'vlc':
+        backend = create_audio_backend(backend_name, silent=True)
+    else:
+        backend = create_audio_backend(backend_name)
+    backend.load(file_path)
+    return backend
@@ -0,0 +1,287 @@
+"""
+Duplicate Detection Module
+Finds songs that were ripped into the library more than once under different file names.
+
+Detection runs in two stages so only a handful of files are ever read:
+    1. Candidates - songs are grouped by normalised artist and title, and each group is split
+       where durations differ by more than duration_tolerance seconds. Groups of one are done.
+    2. Confirmation - each candidate's MPEG audio is hashed with the ID3v2 header, ID3v1
+       trailer and APE tag left out, so copies that differ only in tags or file name match.
+       Files are hashed in parallel and streamed in fixed-size chunks. Other formats (FLAC,
+       OGG, M4A) are hashed whole, so only byte-identical copies of those match.
+
+Candidate groups whose audio differs (different rips or encodings of the same song) are
+reported as 'possible' duplicates; those copies are never hidden. The report doubles as a
+cache: fingerprints are reused for files whose size and modification time have not changed.
+
+Usage:
+    python duplicate_detection_module.py [--workers 4] [--output DuplicateReport.json]
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from song_id_module import normalise_tag
+
+REPORT_VERSION: int = 1
+HASH_CHUNK_SIZE: int = 64 * 1024
+
+# Bytes searched after the ID3v2 tag for the first MPEG frame sync
+FRAME_SYNC_SEARCH_BYTES: int = 64 * 1024
+
+ID3V1_SIZE: int = 128
+APE_FOOTER_SIZE: int = 32
+
+
+def _duration_seconds(duration: Any) -> int:
+    """Convert an 'MM:SS' duration to seconds (-1 if it cannot be parsed)"""
+    try:
+        minutes, seconds = str(duration).split(':')
+        return int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return -1
+
+
+def group_candidates(songs: List[Dict[str, Any]], duration_tolerance: int = 2) -> List[List[int]]:
+    """Group rows that may be the same recording
+
+    Args:
+        songs (List[Dict[str, Any]]): MusicMasterSongList entries
+        duration_tolerance (int): Largest gap in seconds between neighbouring durations in a group
+
+    Returns:
+        List[List[int]]: Groups of two or more rows, each in ascending row order
+    """
+    by_name: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    for row, song in enumerate(songs):
+        key = (normalise_tag(song.get('artist', '')), normalise_tag(song.get('title', '')))
+        by_name.setdefault(key, []).append((_duration_seconds(song.get('duration')), row))
+
+    groups: List[List[int]] = []
+    for entries in by_name.values():
+        if len(entries) < 2:
+            continue
+        entries.sort()
+        group: List[int] = [entries[0][1]]
+        for previous, current in zip(entries, entries[1:]):
+            if current[0] - previous[0] <= duration_tolerance:
+                group.append(current[1])
+            else:
+                if len(group) > 1:
+                    groups.append(sorted(group))
+                group = [current[1]]
+        if len(group) > 1:
+            groups.append(sorted(group))
+    groups.sort()
+    return groups
+
+
+def _audio_start(mp3_file: Any) -> int:
+    """Return the offset of the first MPEG frame, skipping any ID3v2 tags"""
+    offset = 0
+    while True:
+        mp3_file.seek(offset)
+        header = mp3_file.read(10)
+        if len(header) < 10 or header[:3] != b'ID3':
+            break
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        footer = 10 if header[5] & 0x10 else 0
+        offset += 10 + size + footer
+
+    mp3_file.seek(offset)
+    window = mp3_file.read(FRAME_SYNC_SEARCH_BYTES)
+    for position in range(len(window) - 1):
+        if window[position] == 0xFF and window[position + 1] & 0xE0 == 0xE0:
+            return offset + position
+    return offset
+
+
+def _audio_end(mp3_file: Any, file_size: int) -> int:
+    """Return the offset just past the last audio byte, leaving out ID3v1 and APE tags"""
+    end = file_size
+    while end >= ID3V1_SIZE:
+        mp3_file.seek(end - ID3V1_SIZE)
+        if mp3_file.read(3) == b'TAG':
+            end -= ID3V1_SIZE
+            continue
+        if end >= APE_FOOTER_SIZE:
+            mp3_file.seek(end - APE_FOOTER_SIZE)
+            footer = mp3_file.read(APE_FOOTER_SIZE)
+            if footer[:8] == b'APETAGEX':
+                tag_size = int.from_bytes(footer[12:16], 'little')
+                has_header = bool(int.from_bytes(footer[20:24], 'little') & 0x80000000)
+                end -= tag_size + (APE_FOOTER_SIZE if has_header else 0)
+                continue
+        break
+    return max(end, 0)
+
+
+def audio_fingerprint(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> Optional[str]:
+    """Hash a file's MPEG audio frames, ignoring tags (the whole file for other formats)
+
+    Args:
+        file_path (str): Music file
+        chunk_size (int): Bytes read per step
+
+    Returns:
+        Optional[str]: Hex digest, or None if the file cannot be read
+    """
+    try:
+        with open(file_path, 'rb') as mp3_file:
+            file_size = os.fstat(mp3_file.fileno()).st_size
+            if file_path.lower().endswith('.mp3'):
+                start = _audio_start(mp3_file)
+                remaining = _audio_end(mp3_file, file_size) - start
+            else:
+                start, remaining = 0, file_size
+            digest = hashlib.blake2b(digest_size=16)
+            mp3_file.seek(start)
+            while remaining > 0:
+                chunk = mp3_file.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+            return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def _file_signature(file_path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def find_duplicates(songs: List[Dict[str, Any]], duration_tolerance: int = 2, workers: int = 4,
+                    cached_fingerprints: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Find duplicate songs and build the report
+
+    The first row of a confirmed group is kept; the others are listed as its duplicates.
+
+    Args:
+        songs (List[Dict[str, Any]]): MusicMasterSongList entries (with 'id' and 'location')
+        duration_tolerance (int): See group_candidates()
+        workers (int): Files hashed at the same time
+        cached_fingerprints (Optional[Dict[str, Dict[str, Any]]]): 'fingerprints' from an earlier report
+
+    Returns:
+        Dict[str, Any]: The report - summary counts, 'duplicates', 'possible' and 'fingerprints'
+    """
+    started = time.perf_counter()
+    cached_fingerprints = cached_fingerprints or {}
+    candidates = group_candidates(songs, duration_tolerance)
+    locations = sorted({songs[row]['location'] for group in candidates for row in group})
+
+    fingerprints: Dict[str, Dict[str, Any]] = {}
+    to_hash: List[str] = []
+    for location in locations:
+        signature = _file_signature(location)
+        cached = cached_fingerprints.get(location)
+        if signature is not None and cached is not None and cached.get('signature') == signature:
+            fingerprints[location] = cached
+        else:
+            to_hash.append(location)
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        for location, fingerprint in zip(to_hash, pool.map(audio_fingerprint, to_hash)):
+            if fingerprint is not None:
+                fingerprints[location] = {'signature': _file_signature(location), 'audio_hash': fingerprint}
+
+    duplicates: List[Dict[str, Any]] = []
+    possible: List[Dict[str, Any]] = []
+    for group in candidates:
+        by_hash: Dict[str, List[int]] = {}
+        for row in group:
+            fingerprint = fingerprints.get(songs[row]['location'])
+            if fingerprint is not None:
+                by_hash.setdefault(fingerprint['audio_hash'], []).append(row)
+        confirmed = [rows for rows in by_hash.values() if len(rows) > 1]
+        for rows in confirmed:
+            keep = songs[rows[0]]
+            duplicates.append({
+                'keep': {'id': keep.get('id'), 'location': keep['location']},
+                'duplicates': [{'id': songs[row].get('id'), 'location': songs[row]['location']} for row in rows[1:]],
+                'artist': keep.get('artist'),
+                'title': keep.get('title'),
+                'duration': keep.get('duration')
+            })
+        if len(by_hash) != 1:
+            possible.append({
+                'artist': songs[group[0]].get('artist'),
+                'title': songs[group[0]].get('title'),
+                'songs': [{'id': songs[row].get('id'), 'location': songs[row]['location'],
+                           'duration': songs[row].get('duration')} for row in group]
+            })
+
+    return {
+        'version': REPORT_VERSION,
+        'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'library_size': len(songs),
+        'candidate_groups': len(candidates),
+        'files_hashed': len(to_hash),
+        'files_from_cache': len(locations) - len(to_hash),
+        'duplicate_groups': len(duplicates),
+        'duplicate_songs': sum(len(group['duplicates']) for group in duplicates),
+        'seconds': round(time.perf_counter() - started, 3),
+        'duplicates': duplicates,
+        'possible': possible,
+        'fingerprints': fingerprints
+    }
+
+
+def duplicate_song_ids(report: Dict[str, Any]) -> List[int]:
+    """Return the ids of every confirmed duplicate (not the copies that are kept)"""
+    return [song['id'] for group in report.get('duplicates', []) for song in group['duplicates']
+            if song.get('id') is not None]
+
+
+def load_duplicate_report(report_file: str) -> Optional[Dict[str, Any]]:
+    """Load a report written by write_duplicate_report() (None if missing or outdated)"""
+    try:
+        with open(report_file, 'r') as file:
+            report = json.load(file)
+    except (IOError, json.JSONDecodeError):
+        return None
+    if not isinstance(report, dict) or report.get('version') != REPORT_VERSION:
+        return None
+    return report
+
+
+def write_duplicate_report(report_file: str, report: Dict[str, Any]) -> bool:
+    """Write the report as JSON, replacing any earlier one atomically"""
+    temp_file = report_file + '.tmp'
+    try:
+        with open(temp_file, 'w') as file:
+            json.dump(report, file, indent=2)
+        os.replace(temp_file, report_file)
+        return True
+    except IOError:
+        return False
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Report duplicate songs in MusicMasterSongList.txt')
+    parser.add_argument('--song-list', default='MusicMasterSongList.txt', help='Master song list to check')
+    parser.add_argument('--output', default='DuplicateReport.json', help='Report file (also the fingerprint cache)')
+    parser.add_argument('--workers', type=int, default=4, help='Files hashed in parallel (default: 4)')
+    parser.add_argument('--duration-tolerance', type=int, default=2, help='Seconds (default: 2)')
+    args = parser.parse_args()
+
+    with open(args.song_list, 'r') as song_list_file:
+        song_list = json.load(song_list_file)
+    previous = load_duplicate_report(args.output) or {}
+    duplicate_report = find_duplicates(song_list, args.duration_tolerance, args.workers,
+                                       previous.get('fingerprints'))
+    write_duplicate_report(args.output, duplicate_report)
+    for duplicate_group in duplicate_report['duplicates']:
+        print(f"{duplicate_group['artist']} - {duplicate_group['title']}: keep {duplicate_group['keep']['location']}")
+        for duplicate in duplicate_group['duplicates']:
+            print(f"    duplicate {duplicate['location']}")
+    print(f"{duplicate_report['duplicate_songs']} duplicates in {duplicate_report['duplicate_groups']} groups, "
+          f"{len(duplicate_report['possible'])} possible, {duplicate_report['files_hashed']} files hashed "
+          f"in {duplicate_report['seconds']}s")
@@ -0,0 +1,171 @@
+"""
+Engine Snapshot Module
+Compact binary checkpoint of the engine's playback state, so a restart after a power cut
+resumes the random rotation and the song that was playing instead of starting over.
+
+A snapshot holds:
+    - the library generation: a fingerprint of MusicMasterSongList.txt (size, modification
+      time and song count). A snapshot from another generation is stale and is not restored
+    - the genre flags, the genre list and one genre mask byte per song (see genre_mask())
+    - the random rotation, next song first, as 64-bit song ids
+    - the song that was playing and the position it had reached, in seconds
+
+Layout (little-endian):
+    header    magic 'JKSN', version, flags, generation, saved time, song count,
+              rotation length, current song id, position
+    strings   the four genre flags, then the genre list (length-prefixed UTF-8)
+    masks     song count bytes, by row
+    rotation  rotation length uint64 song ids
+    trailer   CRC-32 of everything before it
+The file is written to a temporary name and renamed, and the CRC rejects a torn write, so a
+power cut while checkpointing leaves either the old snapshot or none.
+"""
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_MAGIC: bytes = b'JKSN'
+SNAPSHOT_VERSION: int = 1
+
+# Genre mask bits: bits 0-3 are set when the song's genre comment matches genre flag 0-3
+NO_RANDOM_BIT: int = 0x10  # 'norandom' in the genre comment
+GENRE_SLOT_BITS: int = 0x0F
+
+_HEADER = struct.Struct('<4sHHQdIIQd')
+_FLAG_HAS_CURRENT: int = 0x1
+_LENGTH = struct.Struct('<H')
+_COUNT = struct.Struct('<I')
+_CRC = struct.Struct('<I')
+
+
+def library_generation(master_list_file: str, song_count: int) -> int:
+    """Fingerprint of the library a snapshot belongs to (0 if the master list cannot be read)"""
+    try:
+        stat = os.stat(master_list_file)
+    except OSError:
+        return 0
+    digest = zlib.crc32(struct.pack('<QqI', stat.st_size, stat.st_mtime_ns, song_count))
+    return (stat.st_size << 32) ^ digest
+
+
+def genre_mask(comment: str, genre_flags: List[str]) -> int:
+    """Genre mask byte for a song: which of the four genre flags its comment matches, plus NO_RANDOM_BIT"""
+    mask: int = NO_RANDOM_BIT if 'norandom' in comment else 0
+    for slot, genre in enumerate(genre_flags[:4]):
+        if genre != 'null' and genre in comment:
+            mask |= 1 << slot
+    return mask
+
+
+def random_eligible(mask: int, genre_flags: List[str]) -> bool:
+    """True if a song with this genre mask belongs in the random rotation for these genre flags"""
+    if mask & NO_RANDOM_BIT:
+        return False
+    return all(genre == 'null' for genre in genre_flags[:4]) or bool(mask & GENRE_SLOT_BITS)
+
+
+def _pack_string(text: str) -> bytes:
+    encoded = text.encode('utf-8')[:0xFFFF]
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_string(data: bytes, offset: int) -> tuple:
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+def write_snapshot(file_path: str, snapshot: Dict[str, Any]) -> bool:
+    """Write a snapshot atomically
+
+    Args:
+        file_path (str): Snapshot file
+        snapshot (Dict[str, Any]): generation, saved, genre_flags (4 strings), genre_list,
+            genre_masks (bytes, one per song), rotation (song ids), current_song_id
+            (None when nothing was playing) and position
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    current_song_id: Optional[int] = snapshot.get('current_song_id')
+    genre_flags: List[str] = (list(snapshot['genre_flags']) + ['null'] * 4)[:4]
+    parts: List[bytes] = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                       _FLAG_HAS_CURRENT if current_song_id is not None else 0,
+                                       snapshot['generation'], snapshot['saved'], len(snapshot['genre_masks']),
+                                       len(snapshot['rotation']), current_song_id or 0,
+                                       snapshot.get('position', 0.0))]
+    parts.extend(_pack_string(genre) for genre in genre_flags)
+    parts.append(_COUNT.pack(len(snapshot['genre_list'])))
+    parts.extend(_pack_string(genre) for genre in snapshot['genre_list'])
+    parts.append(bytes(snapshot['genre_masks']))
+    rotation = array('Q', snapshot['rotation'])
+    if sys.byteorder == 'big':
+        rotation.byteswap()
+    parts.append(rotation.tobytes())
+    body = b''.join(parts)
+    temp_file = file_path + '.tmp'
+    try:
+        with open(temp_file, 'wb') as snapshot_file:
+            snapshot_file.write(body + _CRC.pack(zlib.crc32(body)))
+        os.replace(temp_file, file_path)
+        return True
+    except OSError:
+        return False
+
+
+def read_snapshot(file_path: str) -> Optional[Dict[str, Any]]:
+    """Read a snapshot written by write_snapshot()
+
+    Returns:
+        Optional[Dict[str, Any]]: The snapshot, with genre_masks as bytes and rotation as a
+            list of song ids, or None if the file is missing, damaged or from another version
+    """
+    try:
+        with open(file_path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size + _CRC.size:
+        return None
+    body, (crc,) = data[:-_CRC.size], _CRC.unpack_from(data, len(data) - _CRC.size)
+    if zlib.crc32(body) != crc:
+        return None
+    (magic, version, flags, generation, saved, song_count, rotation_length,
+     current_song_id, position) = _HEADER.unpack_from(body, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    try:
+        offset = _HEADER.size
+        genre_flags: List[str] = []
+        for _ in range(4):
+            genre, offset = _unpack_string(body, offset)
+            genre_flags.append(genre)
+        (genre_count,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        genre_list: List[str] = []
+        for _ in range(genre_count):
+            genre, offset = _unpack_string(body, offset)
+            genre_list.append(genre)
+        genre_masks = body[offset:offset + song_count]
+        offset += song_count
+        rotation = array('Q')
+        rotation.frombytes(body[offset:offset + rotation_length * rotation.itemsize])
+        if sys.byteorder == 'big':
+            rotation.byteswap()
+    except (struct.error, UnicodeDecodeError, ValueError):
+        return None
+    if len(genre_masks) != song_count or len(rotation) != rotation_length:
+        return None
+    return {
+        'generation': generation,
+        'saved': saved,
+        'genre_flags': genre_flags,
+        'genre_list': genre_list,
+        'genre_masks': genre_masks,
+        'rotation': rotation.tolist(),
+        'current_song_id': current_song_id if flags & _FLAG_HAS_CURRENT else None,
+        'position': position
+    }
@@ -0,0 +1,246 @@
+"""
+Library Mirror Module
+Read-through local mirror for music libraries kept on a network share (NAS).
+
+Songs are copied into a local cache directory when they are queued or played, and playback
+always reads the local copy, so a network hiccup during a song cannot interrupt it:
+    - local_path() returns the mirrored copy of a song, or None
+    - ensure() returns the local copy, fetching it first if needed (read-through)
+    - request() fetches songs in the background - the whole paid queue and the next random
+      songs - and pins them so eviction never removes a song that is about to play
+Copies are evicted least recently used first whenever the mirror would exceed budget_bytes.
+The LRU order is saved in mirror_index.json in the cache directory, so the mirror survives
+restarts.
+
+Where songs are fetched from is pluggable:
+    DirectorySource  copies from the song's own path (a mounted share, or any local folder
+                     standing in for one)
+    HttpSource       downloads <base_url>/<path relative to its music root>, e.g. from a NAS
+                     web share or `python -m http.server` in the music folder
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+INDEX_VERSION: int = 1
+INDEX_FILE: str = 'mirror_index.json'
+COPY_CHUNK_SIZE: int = 1024 * 1024
+
+
+class DirectorySource:
+    """Fetches a song by copying it from its own location"""
+
+    def open(self, location: str) -> Any:
+        return open(location, 'rb')
+
+
+class HttpSource:
+    """Fetches a song over HTTP from base_url, by its path relative to the music root holding it
+
+    Args:
+        base_url (str): URL the music root is served at
+        roots (List[str]): Music roots the song locations live under
+        timeout (float): Seconds to wait for the server
+    """
+
+    def __init__(self, base_url: str, roots: List[str], timeout: float = 30.0) -> None:
+        self.base_url: str = base_url.rstrip('/')
+        self.roots: List[str] = [os.path.abspath(root) for root in roots]
+        self.timeout: float = timeout
+
+    def url(self, location: str) -> str:
+        location = os.path.abspath(location)
+        for root in self.roots:
+            if location.startswith(root + os.sep):
+                relative_path = os.path.relpath(location, root).replace(os.sep, '/')
+                return f'{self.base_url}/{urllib.parse.quote(relative_path)}'
+        raise OSError(f'{location} is not under a music root')
+
+    def open(self, location: str) -> Any:
+        import urllib.request  # deferred: it pulls in http.client and ssl, which only HTTP mirrors need
+        return urllib.request.urlopen(self.url(location), timeout=self.timeout)
+
+
+class LibraryMirror:
+    """Local LRU copy of songs from a slow or unreliable music library
+
+    Args:
+        cache_dir (str): Local directory holding the copies
+        budget_bytes (int): Most bytes of copies kept
+        source (Any): Object with open(location) returning a readable binary stream
+            (DirectorySource by default)
+    """
+
+    def __init__(self, cache_dir: str, budget_bytes: int, source: Optional[Any] = None) -> None:
+        self.cache_dir: str = cache_dir
+        self.budget_bytes: int = max(0, int(budget_bytes))
+        self.source: Any = source if source is not None else DirectorySource()
+        # location -> {'file': local file name, 'size': bytes}, least recently used first
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._pending: List[str] = []
+        self._lock = threading.RLock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'fetched': 0, 'bytes_fetched': 0,
+                                       'evicted': 0, 'failed': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ---------------------------------------------------------------- index
+
+    def _load_index(self) -> None:
+        """Load the LRU order, keeping only entries whose copy is still complete on disk"""
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE), 'r') as index_file:
+                index = json.load(index_file)
+        except (IOError, json.JSONDecodeError):
+            return
+        if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+            return
+        for location, entry in index.get('entries', []):
+            try:
+                if os.path.getsize(os.path.join(self.cache_dir, entry['file'])) == entry['size']:
+                    self._entries[location] = entry
+            except (OSError, KeyError, TypeError):
+                continue
+
+    def _save_index(self) -> None:
+        temp_file = os.path.join(self.cache_dir, INDEX_FILE + '.tmp')
+        try:
+            with open(temp_file, 'w') as index_file:
+                json.dump({'version': INDEX_VERSION, 'entries': list(self._entries.items())}, index_file)
+            os.replace(temp_file, os.path.join(self.cache_dir, INDEX_FILE))
+        except IOError:
+            pass
+
+    # ---------------------------------------------------------------- lookups
+
+    def local_path(self, location: str, touch: bool = True) -> Optional[str]:
+        """Return the local copy of a song (marking it recently used), or None if not mirrored"""
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is None:
+                return None
+            if touch:
+                self._entries.move_to_end(location)
+            return os.path.join(self.cache_dir, entry['file'])
+
+    def ensure(self, location: str) -> Optional[str]:
+        """Return the local copy of a song, fetching it now if it is not mirrored yet
+
+        Returns:
+            Optional[str]: The local path, or None if the song could not be fetched
+        """
+        local_path = self.local_path(location)
+        with self._lock:
+            self._stats['hits' if local_path is not None else 'misses'] += 1
+        if local_path is not None:
+            return local_path
+        return self._fetch(location)
+
+    def request(self, locations: List[str]) -> None:
+        """Fetch songs in the background, in order, and pin them until the next request()"""
+        with self._lock:
+            self._pinned = set(locations)
+            self._pending = [location for location in dict.fromkeys(locations) if location not in self._entries]
+            for location in locations:
+                if location in self._entries:
+                    self._entries.move_to_end(location)
+        if self._pending and self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name='library-mirror', daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Playback hits and misses, fetches, bytes fetched, evictions and failed fetches"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['songs'] = len(self._entries)
+            stats['bytes'] = sum(entry['size'] for entry in self._entries.values())
+        return stats
+
+    def close(self) -> None:
+        """Stop background fetching and save the LRU order"""
+        self._closed = True
+        self._wake.set()
+        with self._lock:
+            self._save_index()
+
+    # ---------------------------------------------------------------- fetching
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            while not self._closed:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    location = self._pending.pop(0)
+                self._fetch(location)
+
+    def _local_file_name(self, location: str) -> str:
+        digest = hashlib.blake2b(location.encode('utf-8'), digest_size=12).hexdigest()
+        return digest + os.path.splitext(location)[1].lower()
+
+    def _evict_for(self, size: int) -> bool:
+        """Evict least recently used, unpinned copies until size more bytes fit the budget"""
+        used = sum(entry['size'] for entry in self._entries.values())
+        for location in list(self._entries):
+            if used + size <= self.budget_bytes:
+                break
+            if location in self._pinned:
+                continue
+            entry = self._entries.pop(location)
+            used -= entry['size']
+            self._stats['evicted'] += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                pass
+        return used + size <= self.budget_bytes
+
+    def _fetch(self, location: str) -> Optional[str]:
+        """Copy a song into the mirror (once, however many threads ask for it)"""
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(location, threading.Lock())
+        with fetch_lock:
+            local_path = self.local_path(location, touch=False)
+            if local_path is not None:
+                return local_path
+            file_name = self._local_file_name(location)
+            local_path = os.path.join(self.cache_dir, file_name)
+            temp_path = local_path + '.part'
+            try:
+                with self.source.open(location) as remote, open(temp_path, 'wb') as local:
+                    shutil.copyfileobj(remote, local, COPY_CHUNK_SIZE)
+                size = os.path.getsize(temp_path)
+                with self._lock:
+                    if not self._evict_for(size):
+                        os.remove(temp_path)
+                        return None
+                    os.replace(temp_path, local_path)
+                    self._entries[location] = {'file': file_name, 'size': size}
+                    self._stats['fetched'] += 1
+                    self._stats['bytes_fetched'] += size
+                    self._save_index()
+                return local_path
+            except (OSError, ValueError):
+                with self._lock:
+                    self._stats['failed'] += 1
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                return None
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(location, None)
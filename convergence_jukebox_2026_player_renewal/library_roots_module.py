@@ -0,0 +1,232 @@
+"""
+Library Roots Module
+Per-root scan caches and sorted indexes, merged into the single artist-sorted library view.
+
+Each music root (the core library on local disk, a seasonal pack on a second drive, ...) has
+its own cache file in library_cache/. It holds that root's songs already sorted by artist,
+plus each file's size and modification time:
+    library_cache/root-3f2a9c0d41b7e615.json
+    {"version": 1, "root": "/media/packs/xmas", "scan": {...}, "songs": [
+        {"location": ".../Bing Crosby - White Christmas.mp3", "title": "...", "artist": "...",
+         "album": "...", "year": "...", "comment": "...", "duration": "03:02",
+         "size": 4404013, "mtime_ns": 1700000000000000000}, ...]}
+
+Refreshing a root walks only that root. Tags are read only for files that are new or changed,
+and a root with no changes keeps its index as it is, without re-sorting. The library view is a
+k-way merge (heapq.merge) of the per-root indexes, so adding or refreshing one root never
+rescans or re-sorts the others.
+
+BackgroundLibraryScan refreshes every root on a background thread and hands over the songs
+found in batches as the walk goes, so the engine can start playing before the scan finishes.
+"""
+import hashlib
+import heapq
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from library_scanner_module import scan_music_files
+
+CACHE_VERSION: int = 1
+
+# Song fields kept in a root index, in MusicMasterSongList order (without 'number' and 'id')
+SONG_FIELDS: List[str] = ['location', 'title', 'artist', 'album', 'year', 'comment', 'duration']
+
+
+def artist_sort_key(song: Dict[str, Any]) -> str:
+    """Sort key of the library view - the same plain artist order the GUI pages through"""
+    return song['artist']
+
+
+def root_cache_file(cache_dir: str, root: str) -> str:
+    """Return the cache file for a music root (named from a hash of its absolute path)"""
+    digest = hashlib.blake2b(os.path.abspath(root).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f'root-{digest}.json')
+
+
+def _scan_key(scan_options: Dict[str, Any]) -> Dict[str, Any]:
+    """The scan options that decide which files belong to a root (callbacks left out)"""
+    return {key: list(value) if isinstance(value, (list, tuple)) else value
+            for key, value in sorted(scan_options.items()) if not callable(value)}
+
+
+def load_root_index(cache_file: str, root: str, scan_options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Load a root's cache, or None if it is missing, unreadable or was built differently"""
+    try:
+        with open(cache_file, 'r') as file:
+            cache = json.load(file)
+    except (IOError, json.JSONDecodeError):
+        return None
+    if (not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION or
+            cache.get('root') != os.path.abspath(root) or cache.get('scan') != _scan_key(scan_options)):
+        return None
+    return cache
+
+
+def save_root_index(cache_file: str, root: str, scan_options: Dict[str, Any], songs: List[Dict[str, Any]]) -> bool:
+    """Write a root's cache, replacing the old one atomically"""
+    temp_file = cache_file + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, 'w') as file:
+            json.dump({'version': CACHE_VERSION, 'root': os.path.abspath(root), 'scan': _scan_key(scan_options),
+                       'songs': songs}, file)
+        os.replace(temp_file, cache_file)
+        return True
+    except IOError:
+        return False
+
+
+def refresh_root_index(root: str, cache_dir: str, scan_options: Dict[str, Any],
+                       read_tags: Callable[[str], Optional[Dict[str, Any]]],
+                       on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                       batch_size: int = 100) -> Dict[str, Any]:
+    """Bring one root's sorted index up to date with the files on disk
+
+    Args:
+        root (str): Music root directory
+        cache_dir (str): Directory holding the per-root cache files
+        scan_options (Dict[str, Any]): Keyword arguments for scan_music_files()
+        read_tags (Callable[[str], Optional[Dict[str, Any]]]): Returns a file's SONG_FIELDS
+            values (without 'location'), or None if it cannot be read
+        on_batch (Optional[Callable[[List[Dict[str, Any]]], None]]): Called with every
+            batch_size songs found (cached or newly read), in scan order, and with the rest
+            at the end
+        batch_size (int): Songs per on_batch() call
+
+    Returns:
+        Dict[str, Any]: 'songs' (the artist-sorted index), 'files', 'reused', 'tags_read',
+            'removed', 'unreadable' and 'changed' (False when the cached index was kept as is)
+    """
+    cache_file = root_cache_file(cache_dir, root)
+    cache = load_root_index(cache_file, root, scan_options)
+    cached: Dict[str, Dict[str, Any]] = {song['location']: song for song in cache['songs']} if cache else {}
+
+    songs: List[Dict[str, Any]] = []
+    files = reused = tags_read = unreadable = batched = 0
+    for entry in scan_music_files(root, **scan_options):
+        files += 1
+        if on_batch is not None and len(songs) - batched >= batch_size:
+            on_batch(songs[batched:])
+            batched = len(songs)
+        try:
+            stat = entry.stat()
+        except OSError:
+            unreadable += 1
+            continue
+        previous = cached.pop(entry.path, None)
+        if previous is not None and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            songs.append(previous)
+            reused += 1
+            continue
+        tags = read_tags(entry.path)
+        if tags is None:
+            unreadable += 1
+            continue
+        song: Dict[str, Any] = {'location': entry.path}
+        song.update({field: tags[field] for field in SONG_FIELDS[1:]})
+        song['size'] = stat.st_size
+        song['mtime_ns'] = stat.st_mtime_ns
+        songs.append(song)
+        tags_read += 1
+
+    if on_batch is not None and len(songs) > batched:
+        on_batch(songs[batched:])
+
+    removed = len(cached)
+    changed = cache is None or tags_read > 0 or removed > 0
+    if changed:
+        songs.sort(key=artist_sort_key)
+        save_root_index(cache_file, root, scan_options, songs)
+    else:
+        # Unchanged root: keep the cached order rather than re-sorting
+        songs = cache['songs']
+    return {'root': root, 'songs': songs, 'files': files, 'reused': reused, 'tags_read': tags_read,
+            'removed': removed, 'unreadable': unreadable, 'changed': changed}
+
+
+def merge_root_indexes(indexes: List[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """k-way merge of artist-sorted root indexes into one artist-sorted stream
+
+    Songs with the same artist keep the order of the roots, then their order within the root.
+    """
+    return heapq.merge(*indexes, key=artist_sort_key)
+
+
+class BackgroundLibraryScan:
+    """Refresh every music root on a background thread, handing over songs in batches
+
+    Args:
+        roots (List[str]): Music roots, in library order
+        cache_dir (str): Directory holding the per-root cache files
+        scan_options (Dict[str, Any]): Keyword arguments for scan_music_files()
+        read_tags (Callable[[str], Optional[Dict[str, Any]]]): As for refresh_root_index()
+        batch_size (int): Songs per batch
+    """
+
+    def __init__(self, roots: List[str], cache_dir: str, scan_options: Dict[str, Any],
+                 read_tags: Callable[[str], Optional[Dict[str, Any]]], batch_size: int = 100) -> None:
+        self.roots: List[str] = list(roots)
+        self.cache_dir: str = cache_dir
+        self.scan_options: Dict[str, Any] = scan_options
+        self.read_tags: Callable[[str], Optional[Dict[str, Any]]] = read_tags
+        self.batch_size: int = max(1, int(batch_size))
+        self.refreshed: List[Dict[str, Any]] = []  # refresh_root_index() result per root, once done
+        self.songs: List[Dict[str, Any]] = []  # the merged, artist-sorted library, once done
+        self.error: Optional[Exception] = None
+        self._batches: List[List[Dict[str, Any]]] = []
+        self._condition = threading.Condition()
+        self._done = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start scanning on a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='library-scan', daemon=True)
+        self._thread.start()
+
+    def done(self) -> bool:
+        """True once every root has been refreshed (take_batches() may still hold songs)"""
+        with self._condition:
+            return self._done
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the scan to finish
+
+        Returns:
+            bool: True if it has finished, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._done, timeout)
+
+    def wait_for_batch(self, timeout: Optional[float] = None) -> bool:
+        """Wait until a batch is waiting or the scan has finished
+
+        Returns:
+            bool: True if a batch is waiting or the scan has finished, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._batches or self._done, timeout)
+
+    def take_batches(self) -> List[Dict[str, Any]]:
+        """Return the songs found since the last call, in scan order"""
+        with self._condition:
+            batches, self._batches = self._batches, []
+        return [song for batch in batches for song in batch]
+
+    def _add_batch(self, batch: List[Dict[str, Any]]) -> None:
+        with self._condition:
+            self._batches.append(batch)
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        try:
+            for root in self.roots:
+                self.refreshed.append(refresh_root_index(root, self.cache_dir, self.scan_options, self.read_tags,
+                                                         self._add_batch, self.batch_size))
+            self.songs = list(merge_root_indexes([refreshed['songs'] for refreshed in self.refreshed]))
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
@@ -0,0 +1,91 @@
+"""
+Library Scanner Module
+Streams the music files under a directory tree to the metadata stage.
+
+scan_music_files() is a generator built on os.scandir: it walks Artist/Album style trees
+depth-first and yields one os.DirEntry per music file as it is found, so the caller can read
+tags while the walk continues and memory stays flat however many files the tree holds. Only
+the directory being listed and the directories still to visit are held in memory.
+
+Entries are sorted by name within each directory, so the same tree always comes out in the
+same order (song numbers stay put between rescans).
+
+Patterns are shell-style (fnmatch) and are matched against both the entry's name and its path
+relative to the root, with '/' separators:
+    include: ["Rock/*", "*.flac"]    only files matching at least one pattern (empty = all)
+    exclude: [".*", "Podcasts"]      skips matching files and whole matching directories
+"""
+import fnmatch
+import os
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+# Formats TinyTag can read duration and tags from
+MUSIC_EXTENSIONS: Tuple[str, ...] = ('.mp3', '.flac', '.ogg', '.m4a')
+
+
+def _matches(name: str, relative_path: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern) for pattern in patterns)
+
+
+def scan_music_files(root: str, extensions: Sequence[str] = MUSIC_EXTENSIONS, recursive: bool = True,
+                     include: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None,
+                     on_error: Optional[Callable[[OSError], None]] = None) -> Iterator[os.DirEntry]:
+    """Yield every music file under root, depth-first and sorted by name within each directory
+
+    Args:
+        root (str): Directory to scan
+        extensions (Sequence[str]): File extensions to yield, compared case-insensitively
+        recursive (bool): Descend into subdirectories (symlinked directories are not followed)
+        include (Optional[Sequence[str]]): Patterns a file must match to be yielded
+        exclude (Optional[Sequence[str]]): Patterns for files and directories to skip
+        on_error (Optional[Callable[[OSError], None]]): Called for directories that cannot be
+            listed; the scan carries on with the rest of the tree
+
+    Yields:
+        os.DirEntry: One entry per music file (entry.path is the full path)
+    """
+    suffixes = tuple(extension.lower() for extension in extensions)
+    include = list(include or [])
+    exclude = list(exclude or [])
+    # Directories still to visit, as (path, path relative to root)
+    pending: List[Tuple[str, str]] = [(root, '')]
+
+    while pending:
+        directory, relative_directory = pending.pop()
+        try:
+            with os.scandir(directory) as listing:
+                entries = sorted(listing, key=lambda entry: entry.name)
+        except OSError as e:
+            if on_error is not None:
+                on_error(e)
+            continue
+
+        subdirectories: List[Tuple[str, str]] = []
+        for entry in entries:
+            relative_path = f'{relative_directory}/{entry.name}' if relative_directory else entry.name
+            if exclude and _matches(entry.name, relative_path, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirectories.append((entry.path, relative_path))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError as e:
+                if on_error is not None:
+                    on_error(e)
+                continue
+            if not entry.name.lower().endswith(suffixes):
+                continue
+            if include and not _matches(entry.name, relative_path, include):
+                continue
+            yield entry
+
+        # Reversed so the first subdirectory by name is visited next
+        pending.extend(reversed(subdirectories))
+
+
+def count_music_files(root: str, **scan_options) -> int:
+    """Count the files scan_music_files() would yield, without keeping any of them"""
+    return sum(1 for _ in scan_music_files(root, **scan_options))
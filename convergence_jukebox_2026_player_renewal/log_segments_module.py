@@ -0,0 +1,456 @@
+"""
+Log Segments Module
+Segmented, rotating JSON-lines log files with a small index per segment, and a query tool
+that answers date-range revenue and play-count questions from those indexes.
+
+Segments live in one directory and are named by the day they were started and a sequence
+number, oldest first when sorted by name:
+    logs/log-2026-01-02.000.jsonl       active segment
+    logs/log-2026-01-01.000.jsonl.gz    older segment, compressed
+    logs/log-2026-01-01.000.idx.json    its index
+
+An index records the segment's time range and per-day counts of events, play types and
+sources, so a query only opens the segments (and days) that overlap the requested range.
+
+Usage:
+    python log_segments_module.py query --from 2026-01-02 --to 2026-01-02 --coin-value 0.25
+    python log_segments_module.py index
+    python log_segments_module.py compact
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ROTATION_MODES: Tuple[str, ...] = ('none', 'day', 'size')
+
+# Plain segments must be untouched this long before they are compressed, so a writer in the
+# other process that still holds one open has moved on to the new segment
+COMPACT_GRACE_SECONDS: float = 300.0
+
+INDEX_VERSION: int = 1
+
+
+def _segment_pattern(prefix: str) -> 're.Pattern':
+    return re.compile(rf'^{re.escape(prefix)}-(\d{{4}}-\d{{2}}-\d{{2}})\.(\d{{3}})\.jsonl(\.gz)?$')
+
+
+def list_segments(segment_dir: str, prefix: str = 'log') -> List[Tuple[str, str, int, bool]]:
+    """List segments oldest first
+
+    Returns:
+        List[Tuple[str, str, int, bool]]: (file name, day, sequence number, compressed)
+    """
+    if not os.path.isdir(segment_dir):
+        return []
+    pattern = _segment_pattern(prefix)
+    segments: List[Tuple[str, str, int, bool]] = []
+    for name in os.listdir(segment_dir):
+        match = pattern.match(name)
+        if match:
+            segments.append((name, match.group(1), int(match.group(2)), bool(match.group(3))))
+    segments.sort(key=lambda segment: (segment[1], segment[2]))
+    return segments
+
+
+def index_path_for(segment_path: str) -> str:
+    """Return the index file path for a plain or compressed segment"""
+    base = segment_path[:-3] if segment_path.endswith('.gz') else segment_path
+    return base[:-len('.jsonl')] + '.idx.json'
+
+
+def iter_log_lines(path: str) -> Iterator[str]:
+    """Yield the lines of a log file, a segment (plain or .gz) or a whole segment directory"""
+    if os.path.isdir(path):
+        for name, _, _, _ in list_segments(path, _guess_prefix(path)):
+            yield from iter_log_lines(os.path.join(path, name))
+        return
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as log_file:
+        for line in log_file:
+            yield line
+
+
+def _guess_prefix(segment_dir: str) -> str:
+    """Return the prefix of the segments in segment_dir ('log' if there are none)"""
+    for name in sorted(os.listdir(segment_dir)):
+        match = re.match(r'^(.+)-\d{4}-\d{2}-\d{2}\.\d{3}\.jsonl(\.gz)?$', name)
+        if match:
+            return match.group(1)
+    return 'log'
+
+
+# ============================================================================
+# LOG FILE TARGETS (used by BufferedLogWriter)
+# ============================================================================
+
+class PlainLogFile:
+    """A single append-only log file that is never rotated"""
+
+    def __init__(self, log_file: str) -> None:
+        self.log_file: str = log_file
+        self._fd: Optional[int] = None
+
+    def exists(self) -> bool:
+        """Return True if the log already has content from an earlier run"""
+        return os.path.exists(self.log_file)
+
+    def write(self, data: bytes) -> None:
+        """Append data with one write on an O_APPEND descriptor"""
+        if self._fd is None:
+            self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, data)
+
+    def fsync(self) -> None:
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SegmentedLogFile:
+    """Append-only log split into day- or size-bounded segments
+
+    The engine and the GUI may write the same segment directory. Neither renames files:
+    each picks the newest segment that is still open for writing (same day in 'day' mode,
+    under max_segment_bytes in both modes) and moves to the next sequence number when it
+    fills up, so both processes converge on the same segment without any locking.
+
+    Args:
+        segment_dir (str): Directory holding the segments
+        prefix (str): Segment name prefix ('log' gives log-2026-01-02.000.jsonl)
+        rotation (str): 'day' starts a new segment every day and when full, 'size' only when full
+        max_segment_bytes (int): Size at which a segment is closed
+        compress (bool): gzip and index closed segments after rotating
+    """
+
+    def __init__(self, segment_dir: str, prefix: str = 'log', rotation: str = 'day',
+                 max_segment_bytes: int = 5 * 1024 * 1024, compress: bool = True) -> None:
+        if rotation not in ('day', 'size'):
+            raise ValueError(f"Unknown log rotation: {rotation}")
+        self.segment_dir: str = segment_dir
+        self.prefix: str = prefix
+        self.rotation: str = rotation
+        self.max_segment_bytes: int = max(1, int(max_segment_bytes))
+        self.compress: bool = compress
+        self.segment_name: Optional[str] = None
+        self.rotations: int = 0
+        self._segment_day: Optional[str] = None
+        self._fd: Optional[int] = None
+
+    def exists(self) -> bool:
+        """Return True if any segment exists from an earlier run"""
+        return bool(list_segments(self.segment_dir, self.prefix))
+
+    def _select_segment(self, today: str) -> str:
+        """Pick the segment to append to: the newest one if still open, else the next one"""
+        segments = list_segments(self.segment_dir, self.prefix)
+        if not segments:
+            return f'{self.prefix}-{today}.000.jsonl'
+        name, day, sequence, compressed = segments[-1]
+        if not compressed and (self.rotation == 'size' or day == today):
+            if os.path.getsize(os.path.join(self.segment_dir, name)) < self.max_segment_bytes:
+                return name
+        if day == today:
+            return f'{self.prefix}-{today}.{sequence + 1:03d}.jsonl'
+        return f'{self.prefix}-{today}.000.jsonl'
+
+    def _segment_closed(self, today: str) -> bool:
+        """Return True if the open segment is full, from another day or compressed away"""
+        stat = os.fstat(self._fd)
+        return (stat.st_nlink == 0 or stat.st_size >= self.max_segment_bytes
+                or (self.rotation == 'day' and self._segment_day != today))
+
+    def write(self, data: bytes) -> None:
+        """Append data to the current segment, rotating first if it is closed"""
+        today = time.strftime('%Y-%m-%d')
+        if self._fd is not None and self._segment_closed(today):
+            self.close()
+            self.rotations += 1
+        if self._fd is None:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            self.segment_name = self._select_segment(today)
+            self._segment_day = _segment_pattern(self.prefix).match(self.segment_name).group(1)
+            self._fd = os.open(os.path.join(self.segment_dir, self.segment_name),
+                               os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if self.compress:
+                compact_segments(self.segment_dir, self.prefix, keep=self.segment_name)
+        os.write(self._fd, data)
+
+    def fsync(self) -> None:
+        if self._fd is not None:
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def create_log_target(log_file: str, rotation: str = 'day', max_segment_bytes: int = 5 * 1024 * 1024,
+                      compress: bool = True, segment_dir: str = 'logs') -> Any:
+    """Create the file target for a log writer
+
+    Args:
+        log_file (str): Log file path. With rotation 'none' records go straight to it;
+            otherwise its name (minus the extension) is the segment prefix.
+        rotation (str): 'none', 'day' or 'size'
+        max_segment_bytes (int): Size at which a segment is closed
+        compress (bool): gzip closed segments
+        segment_dir (str): Segment directory, relative to the log file's directory
+
+    Returns:
+        PlainLogFile or SegmentedLogFile
+    """
+    if rotation not in ROTATION_MODES:
+        raise ValueError(f"Unknown log rotation: {rotation}")
+    if rotation == 'none':
+        return PlainLogFile(log_file)
+    prefix = os.path.splitext(os.path.basename(log_file))[0] or 'log'
+    return SegmentedLogFile(os.path.join(os.path.dirname(log_file), segment_dir), prefix,
+                            rotation, max_segment_bytes, compress)
+
+
+# ============================================================================
+# SEGMENT INDEXES
+# ============================================================================
+
+def _add_record(bucket: Dict[str, Dict[str, int]], record: Dict[str, Any]) -> None:
+    """Count one record into a per-day bucket"""
+    for field, key in (('events', record.get('event')), ('sources', record.get('source')),
+                       ('play_types', record.get('play_type'))):
+        if key is not None:
+            bucket[field][key] = bucket[field].get(key, 0) + 1
+
+
+def _new_bucket() -> Dict[str, Dict[str, int]]:
+    return {'events': {}, 'sources': {}, 'play_types': {}}
+
+
+def _iter_records(segment_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the JSON records of a segment, skipping torn or foreign lines"""
+    for line in iter_log_lines(segment_path):
+        if not line.startswith('{'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and isinstance(record.get('ts'), str):
+            yield record
+
+
+def build_segment_index(segment_path: str) -> Dict[str, Any]:
+    """Scan a segment and summarise it
+
+    Returns:
+        Dict[str, Any]: Time range, record count and per-day counts of events, sources and play types
+    """
+    days: Dict[str, Dict[str, Dict[str, int]]] = {}
+    first_ts: Optional[str] = None
+    last_ts: Optional[str] = None
+    records = 0
+    for record in _iter_records(segment_path):
+        ts = record['ts']
+        first_ts = ts if first_ts is None or ts < first_ts else first_ts
+        last_ts = ts if last_ts is None or ts > last_ts else last_ts
+        records += 1
+        _add_record(days.setdefault(ts[:10], _new_bucket()), record)
+    return {
+        'version': INDEX_VERSION,
+        'segment': os.path.basename(segment_path),
+        'file_bytes': os.path.getsize(segment_path),
+        'first_ts': first_ts,
+        'last_ts': last_ts,
+        'records': records,
+        'days': days
+    }
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    temp_path = f'{path}.tmp-{os.getpid()}'
+    with open(temp_path, 'w') as temp_file:
+        json.dump(data, temp_file)
+    os.replace(temp_path, path)
+
+
+def load_segment_index(segment_path: str, write: bool = True) -> Dict[str, Any]:
+    """Return a segment's index, rebuilding it if missing or stale
+
+    An index is stale when the segment's name or size no longer matches it (a plain
+    segment that grew, or one that has since been compressed).
+    """
+    index_path = index_path_for(segment_path)
+    try:
+        with open(index_path, 'r') as index_file:
+            index = json.load(index_file)
+        if (index.get('version') == INDEX_VERSION and index.get('segment') == os.path.basename(segment_path)
+                and index.get('file_bytes') == os.path.getsize(segment_path)):
+            return index
+    except (IOError, ValueError):
+        pass
+    index = build_segment_index(segment_path)
+    if write:
+        try:
+            _write_json_atomic(index_path, index)
+        except OSError:
+            pass
+    return index
+
+
+def compact_segments(segment_dir: str, prefix: str = 'log', keep: Optional[str] = None,
+                     grace_seconds: float = COMPACT_GRACE_SECONDS) -> int:
+    """gzip and index closed plain segments
+
+    Args:
+        segment_dir (str): Segment directory
+        prefix (str): Segment name prefix
+        keep (Optional[str]): Segment being written - never compressed
+        grace_seconds (float): Skip segments modified more recently than this
+
+    Returns:
+        int: Number of segments compressed
+    """
+    segments = list_segments(segment_dir, prefix)
+    compacted = 0
+    # The newest segment may still be open in the other process
+    for name, _, _, compressed in segments[:-1]:
+        if compressed or name == keep:
+            continue
+        plain_path = os.path.join(segment_dir, name)
+        try:
+            if time.time() - os.path.getmtime(plain_path) < grace_seconds:
+                continue
+            gz_path = plain_path + '.gz'
+            temp_path = f'{gz_path}.tmp-{os.getpid()}'
+            with open(plain_path, 'rb') as plain_file, gzip.open(temp_path, 'wb') as gz_file:
+                shutil.copyfileobj(plain_file, gz_file)
+            os.replace(temp_path, gz_path)
+            _write_json_atomic(index_path_for(gz_path), build_segment_index(gz_path))
+            os.remove(plain_path)
+            compacted += 1
+        except FileNotFoundError:
+            continue  # compacted by the other process meanwhile
+        except OSError as e:
+            print(f"Failed to compact log segment {name}: {e}")
+    return compacted
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def _normalise_bound(value: Optional[str], end: bool) -> Optional[str]:
+    """Turn 'YYYY-MM-DD' into the first or last second of that day"""
+    if value is None:
+        return None
+    value = value.strip().replace('T', ' ')
+    if len(value) == 10:
+        return value + (' 23:59:59' if end else ' 00:00:00')
+    return value
+
+
+def _merge_bucket(total: Dict[str, Dict[str, int]], bucket: Dict[str, Dict[str, int]]) -> None:
+    for field, counts in bucket.items():
+        target = total.setdefault(field, {})
+        for key, count in counts.items():
+            target[key] = target.get(key, 0) + count
+
+
+def query_logs(segment_dir: str, start: Optional[str] = None, end: Optional[str] = None,
+               coin_value: float = 0.25, prefix: str = 'log', by_day: bool = False) -> Dict[str, Any]:
+    """Count coins, selections and plays between two timestamps
+
+    Days that lie entirely inside [start, end] are answered from the segment indexes; a
+    segment is only read when the range starts or ends part way through one of its days.
+
+    Args:
+        segment_dir (str): Segment directory
+        start (Optional[str]): 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' (inclusive), None for no limit
+        end (Optional[str]): 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' (inclusive), None for no limit
+        coin_value (float): Revenue per 'coin_inserted' record
+        prefix (str): Segment name prefix
+        by_day (bool): Include a per-day breakdown
+
+    Returns:
+        Dict[str, Any]: Totals, optional per-day counts and how many segments were touched
+    """
+    start = _normalise_bound(start, end=False)
+    end = _normalise_bound(end, end=True)
+    days: Dict[str, Dict[str, Dict[str, int]]] = {}
+    touched = {'total': 0, 'skipped': 0, 'from_index': 0, 'scanned': 0}
+
+    for name, _, _, _ in list_segments(segment_dir, prefix):
+        touched['total'] += 1
+        segment_path = os.path.join(segment_dir, name)
+        index = load_segment_index(segment_path)
+        if (index['records'] == 0 or (start is not None and index['last_ts'] < start)
+                or (end is not None and index['first_ts'] > end)):
+            touched['skipped'] += 1
+            continue
+        partial = any((start is not None and start[:10] == day and start > day + ' 00:00:00')
+                      or (end is not None and end[:10] == day and end < day + ' 23:59:59')
+                      for day in index['days'])
+        if not partial:
+            touched['from_index'] += 1
+            for day, bucket in index['days'].items():
+                if (start is None or day >= start[:10]) and (end is None or day <= end[:10]):
+                    _merge_bucket(days.setdefault(day, _new_bucket()), bucket)
+            continue
+        touched['scanned'] += 1
+        for record in _iter_records(segment_path):
+            ts = record['ts']
+            if (start is None or ts >= start) and (end is None or ts <= end):
+                _add_record(days.setdefault(ts[:10], _new_bucket()), record)
+
+    total: Dict[str, Dict[str, int]] = _new_bucket()
+    for bucket in days.values():
+        _merge_bucket(total, bucket)
+    coins = total['events'].get('coin_inserted', 0)
+    result: Dict[str, Any] = {
+        'from': start,
+        'to': end,
+        'coins': coins,
+        'revenue': round(coins * coin_value, 2),
+        'selections': total['events'].get('song_selected', 0),
+        'plays': {
+            'total': total['events'].get('song_played', 0),
+            'paid': total['play_types'].get('Paid', 0),
+            'random': total['play_types'].get('Random', 0)
+        },
+        'errors': total['events'].get('error', 0),
+        'events': total['events'],
+        'segments': touched
+    }
+    if by_day:
+        result['days'] = {day: days[day] for day in sorted(days)}
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Query and maintain segmented jukebox logs')
+    parser.add_argument('command', choices=['query', 'index', 'compact'])
+    parser.add_argument('--log-dir', default='logs', help='Segment directory (default: logs)')
+    parser.add_argument('--prefix', default='log', help='Segment name prefix (default: log)')
+    parser.add_argument('--from', dest='start', help="Start, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'")
+    parser.add_argument('--to', dest='end', help="End (inclusive), 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'")
+    parser.add_argument('--coin-value', type=float, default=0.25, help='Revenue per coin (default: 0.25)')
+    parser.add_argument('--by-day', action='store_true', help='Include per-day counts')
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        print(json.dumps(query_logs(args.log_dir, args.start, args.end, args.coin_value, args.prefix,
+                                    args.by_day), indent=2))
+    elif args.command == 'index':
+        for segment in list_segments(args.log_dir, args.prefix):
+            index = load_segment_index(os.path.join(args.log_dir, segment[0]))
+            print(f"{segment[0]}: {index['records']} records, {index['first_ts']} - {index['last_ts']}")
+    else:
+        print(f"Compressed {compact_segments(args.log_dir, args.prefix)} segments")
@@ -1,8 +1,4 @@
-import vlc
 from datetime import datetime, timedelta
-from tinytag import TinyTag
-import psutil
-import glob
 import json
 import os
 import random
@@ -10,6 +6,21 @@ import time
 import gc
 import sys
 from typing import List, Dict, Any, Optional, Tuple
+from audio_backend_module import AudioBackend, create_audio_backend
+from buffered_log_writer_module import BufferedLogWriter, create_log_writer
+from song_id_module import assign_song_ids, build_song_id_index, is_song_id
+from song_library_module import Library, library_snapshot_current, write_library_snapshot
+from library_scanner_module import MUSIC_EXTENSIONS, count_music_files
+from library_roots_module import SONG_FIELDS, BackgroundLibraryScan, merge_root_indexes, refresh_root_index
+from mp3_tag_reader_module import DEFAULT_MAX_TAG_BYTES, FastTagReader
+from library_health_module import (DEFAULT_NICENESS, HealthScan, file_signature, load_health_report,
+                                   quarantined_song_ids, write_health_report)
+from audio_analysis_module import DEFAULT_TARGET_LOUDNESS, load_analysis_cache, playback_settings
+from track_prefetch_module import TrackPrefetcher
+from library_mirror_module import HttpSource, LibraryMirror
+from engine_snapshot_module import genre_mask, library_generation, random_eligible, read_snapshot, write_snapshot
+from duplicate_detection_module import (duplicate_song_ids, find_duplicates, load_duplicate_report,
+                                        write_duplicate_report)
 
 
 # ANSI Color codes for cross-platform colored output
@@ -52,7 +63,20 @@ class JukeboxEngine:
     - #3: Song Statistics tracking and reporting
     - Plus: Console colors, logging, config file support (from 0.8)
 
-    Key Feature: NO THREADING - Avoids the memory leak introduced in 0.9+
+    Threading: playback, the playlists and the song list are only touched by the thread running
+    jukebox_engine(). Background threads do slow I/O off it:
+    - log writer (buffered_log_writer_module): writes queued log records in batches
+    - library-health (library_health_module): checks songs are playable, at low priority
+    - track-prefetch (track_prefetch_module): reads the next songs into the page cache
+    - library-mirror (library_mirror_module): copies songs from a network share to a local cache
+    - library-scan (library_roots_module): rescans the music folders on a progressive start
+    The engine hands them copies of what they need (paths, song lists), and their results (a
+    health report, rescanned songs, warmed or mirrored files) are only taken up by the engine
+    thread between songs or as a song starts, so no engine state changes mid-song. Their queues
+    and caches are bounded (queue_size, the prefetch and mirror budget_mb), so memory does not
+    grow with play time as it did with the threading of 0.9+. All are daemon threads; close()
+    stops the log writer, health check, prefetcher and mirror, and the library scan ends on its
+    own.
     """
 
     # Configuration constants
@@ -62,19 +86,41 @@ class JukeboxEngine:
     STATISTICS_FILE: str = 'song_statistics.json'
     GC_THRESHOLD: int = 100
 
-    def __init__(self) -> None:
-        """Initialize Jukebox Engine with all required variables and file setup"""
+    def __init__(self, audio_backend: Optional[AudioBackend] = None, dir_path: Optional[str] = None) -> None:
+        """Initialize Jukebox Engine with all required variables and file setup
+
+        Args:
+            audio_backend (Optional[AudioBackend]): Backend used for playback. When omitted
+                one is created from the 'audio' section of the config file.
+            dir_path (Optional[str]): Directory holding the config, data files and music
+                folder. Defaults to the directory this file lives in.
+        """
         # Initialize data structures
         self.music_id3_metadata_list: List[tuple] = []
-        self.music_master_song_list: List[Dict[str, str]] = []
-        self.random_music_playlist: List[int] = []
-        self.paid_music_playlist: List[int] = []
+        self.music_master_song_list: Library = Library()
+        self.random_music_playlist: List[int] = []  # song ids
+        self.paid_music_playlist: List[int] = []  # song ids
+        self.song_id_to_row: Dict[int, int] = {}  # song id -> index in music_master_song_list
+        self.duplicate_song_ids: set = set()  # confirmed duplicates (the kept copy is not included)
+        self.quarantined_song_ids: set = set()  # songs the health check found unplayable
+        self.health_scan: Optional[HealthScan] = None  # background health check, until its report is applied
+        self.library_scan: Optional[BackgroundLibraryScan] = None  # progressive startup's rescan, until merged
+        self._scanned_locations: set = set()  # locations already in the library while library_scan runs
+        self.track_analysis: Dict[int, Dict[str, Any]] = {}  # song id -> cached loudness and cue points
         self.final_genre_list: List[str] = []
+        self.song_genre_masks: bytearray = bytearray()  # one genre_mask() byte per row
+        self.current_song_id: Optional[int] = None  # song being played, for snapshots
+        self._resume_song: Optional[Tuple[int, float]] = None  # (song id, position) restored from a snapshot
+        self._stopped_position: Optional[float] = None  # position the current song was stopped at by stop()
+        self._last_checkpoint: float = 0.0
         self.song_statistics: Dict[str, Dict[str, Any]] = {}  # Improvement #3: Statistics tracking
 
         # Memory optimization counters
         self.gc_counter: int = 0
 
+        # Set by stop() to make jukebox_engine() return after the current song
+        self.stop_requested: bool = False
+
         # Current song metadata
         self.artist_name: str = ""
         self.song_name: str = ""
@@ -90,13 +136,28 @@ class JukeboxEngine:
         self.genre3: str = "null"
 
         # Get directory path for cross-platform compatibility
-        self.dir_path: str = os.path.dirname(os.path.realpath(__file__))
+        self.dir_path: str = dir_path if dir_path is not None else os.path.dirname(os.path.realpath(__file__))
 
         # Load configuration
         self.config: Dict[str, Any] = self._load_config()
 
+        # Audio playback and the clock used for waiting on it (virtual for the fake backend)
+        if audio_backend is None:
+            audio_backend = create_audio_backend(self.config['audio']['backend'])
+        self.audio_backend: AudioBackend = audio_backend
+        self.audio_backend.set_volume(self.config['audio']['volume'])
+        self.clock = self.audio_backend.clock
+
         # Define standard file and directory paths using os.path.join for cross-platform compatibility
         self.music_dir: str = os.path.join(self.dir_path, self.config['paths']['music_dir'])
+        # Every root is scanned; with no music_roots configured music_dir is the only one
+        self.music_roots: List[str] = [os.path.join(self.dir_path, music_root)
+                                       for music_root in self.config['paths']['music_roots']] or [self.music_dir]
+        self.library_cache_dir: str = os.path.join(self.dir_path, self.config['paths']['library_cache_dir'])
+        self.tag_reader: FastTagReader = self._create_tag_reader()
+        self.prefetcher: Optional[TrackPrefetcher] = self._create_prefetcher()
+        self.mirror: Optional[LibraryMirror] = self._create_mirror()
+        self._mirrored_paid_queue_mtime: Optional[int] = None
         self.log_file: str = os.path.join(self.dir_path, self.config['paths']['log_file'])
         self.genre_flags_file: str = os.path.join(self.dir_path, self.config['paths']['genre_flags_file'])
         self.music_master_song_list_file: str = os.path.join(self.dir_path, self.config['paths']['music_master_song_list_file'])
@@ -104,6 +165,14 @@ class JukeboxEngine:
         self.paid_music_playlist_file: str = os.path.join(self.dir_path, self.config['paths']['paid_music_playlist_file'])
         self.current_song_playing_file: str = os.path.join(self.dir_path, self.config['paths']['current_song_playing_file'])
         self.statistics_file: str = os.path.join(self.dir_path, self.STATISTICS_FILE)
+        self.duplicate_report_file: str = os.path.join(self.dir_path, self.config['paths']['duplicate_report_file'])
+        self.health_report_file: str = os.path.join(self.dir_path, self.config['paths']['health_report_file'])
+        self.audio_analysis_file: str = os.path.join(self.dir_path, self.config['paths']['audio_analysis_file'])
+        self.engine_snapshot_file: str = os.path.join(self.dir_path, self.config['paths']['engine_snapshot_file'])
+        self.library_snapshot_file: str = os.path.join(self.dir_path, self.config['paths']['library_snapshot_file'])
+
+        # Background JSON-lines log writer (shared format with the GUI)
+        self.log_writer: BufferedLogWriter = create_log_writer(self.log_file, 'engine', self.config['logging'])
 
         # Initialize log file and required data files
         self._setup_files()
@@ -123,21 +192,88 @@ class JukeboxEngine:
             "logging": {
                 "enabled": True,
                 "level": "INFO",
-                "format": "{timestamp} {level}: {message}"
+                "format": "{timestamp} {level}: {message}",
+                "queue_size": 1000,
+                "batch_size": 64,
+                "flush_interval": 0.5,
+                "fsync_interval": 5.0,
+                "rotation": "day",
+                "max_segment_bytes": 5242880,
+                "compress": True,
+                "segment_dir": "logs"
             },
             "paths": {
                 "music_dir": "music",
+                "music_roots": [],
+                "library_cache_dir": "library_cache",
                 "log_file": "log.txt",
                 "genre_flags_file": "GenreFlagsList.txt",
                 "music_master_song_list_file": "MusicMasterSongList.txt",
                 "music_master_song_list_check_file": "MusicMasterSongListCheck.txt",
                 "paid_music_playlist_file": "PaidMusicPlayList.txt",
-                "current_song_playing_file": "CurrentSongPlaying.txt"
+                "current_song_playing_file": "CurrentSongPlaying.txt",
+                "duplicate_report_file": "DuplicateReport.json",
+                "health_report_file": "HealthReport.json",
+                "audio_analysis_file": "AudioAnalysis.json",
+                "engine_snapshot_file": "EngineSnapshot.bin",
+                "library_snapshot_file": "MusicMasterSongList.bin"
+            },
+            "scan": {
+                "recursive": True,
+                "extensions": list(MUSIC_EXTENSIONS),
+                "include": [],
+                "exclude": [".*"],
+                "fast_mp3_tags": True,
+                "max_tag_bytes": DEFAULT_MAX_TAG_BYTES
+            },
+            "duplicates": {
+                "detect": True,
+                "hide_from_random": False,
+                "workers": 4,
+                "duration_tolerance": 2
+            },
+            "health": {
+                "check": True,
+                "quarantine": True,
+                "workers": 1,
+                "niceness": DEFAULT_NICENESS
+            },
+            "analysis": {
+                "apply_gain": True,
+                "target_loudness": DEFAULT_TARGET_LOUDNESS,
+                "max_volume": 100,
+                "skip_silence": True
+            },
+            "prefetch": {
+                "enabled": True,
+                "lookahead": 3,
+                "budget_mb": 64,
+                "method": "auto"
+            },
+            "mirror": {
+                "enabled": False,
+                "cache_dir": "mirror_cache",
+                "budget_mb": 4096,
+                "random_lookahead": 3,
+                "remote_url": "",
+                "timeout": 30
+            },
+            "snapshot": {
+                "enabled": True,
+                "interval": 15
+            },
+            "startup": {
+                "progressive": True,
+                "batch_size": 50
             },
             "console": {
                 "colors_enabled": True,
                 "show_system_info": True,
                 "verbose": False
+            },
+            "audio": {
+                "backend": "vlc",
+                "volume": 100
             }
         }
 
@@ -206,6 +342,23 @@ class JukeboxEngine:
 
         return True, ""
 
+    def _validate_song_id(self, song_id: int) -> Tuple[bool, str]:
+        """Validate song id belongs to the current library.
+
+        Args:
+            song_id (int): The song id to validate
+
+        Returns:
+            Tuple[bool, str]: (is_valid, error_message)
+        """
+        if not is_song_id(song_id):
+            return False, f"Not a song id: {song_id}"
+
+        if song_id not in self.song_id_to_row:
+            return False, f"Song id {song_id} is not in the music library"
+
+        return True, ""
+
     def _validate_file_path(self, file_path: str) -> Tuple[bool, str]:
         """Validate file path exists and is accessible.
 
@@ -264,16 +417,16 @@ class JukeboxEngine:
 
         return True, ""
 
-    def _validate_playlist_entry(self, song_index: int) -> bool:
-        """Validate a song index before adding to playlist.
+    def _validate_playlist_entry(self, song_id: int) -> bool:
+        """Validate a song id before adding to playlist.
 
         Args:
-            song_index (int): The song index to validate
+            song_id (int): The song id to validate
 
         Returns:
             bool: True if valid, False otherwise
         """
-        is_valid, error_msg = self._validate_song_index(song_index)
+        is_valid, error_msg = self._validate_song_id(song_id)
         if not is_valid:
             self._log_error(f"Invalid playlist entry: {error_msg}")
             return False
@@ -377,21 +530,21 @@ class JukeboxEngine:
 
         return True, data
 
-    def _read_master_song_list(self) -> Tuple[bool, List[Dict[str, str]]]:
+    def _read_master_song_list(self) -> Tuple[bool, Library]:
         """Read master song list file with validation.
 
         Returns:
-            Tuple[bool, List[Dict]]: (success, song_list)
+            Tuple[bool, Library]: (success, song_list)
         """
         success, data = self._read_json_file(self.music_master_song_list_file)
         if not success:
-            return False, []
+            return False, Library()
 
         if not isinstance(data, list):
             self._log_error(f"Master song list must be list, got {type(data).__name__}")
-            return False, []
+            return False, Library()
 
-        return True, data
+        return True, Library(data)
 
     # ============================================================================
     # IMPROVEMENT #3: SONG STATISTICS METHODS
@@ -414,21 +567,21 @@ class JukeboxEngine:
         """
         return self._write_json_file(self.statistics_file, self.song_statistics)
 
-    def _record_song_play(self, song_index: int, play_type: str) -> None:
+    def _record_song_play(self, song_id: int, play_type: str) -> None:
         """Record a song play in statistics.
 
         Args:
-            song_index (int): Index of played song
+            song_id (int): Id of played song
             play_type (str): Type of play ('random' or 'paid')
         """
-        if not self._validate_playlist_entry(song_index):
+        if not self._validate_playlist_entry(song_id):
             return
 
-        song_index_str = str(song_index)
+        song_index_str = str(song_id)
 
         # Initialize song stats if not exists
         if song_index_str not in self.song_statistics:
-            song = self.music_master_song_list[song_index]
+            song = self.music_master_song_list[self.song_id_to_row[song_id]]
             self.song_statistics[song_index_str] = {
                 'title': song.get('title', 'Unknown'),
                 'artist': song.get('artist', 'Unknown'),
@@ -466,9 +619,10 @@ class JukeboxEngine:
         )
 
         top_songs = []
-        for song_index_str, stats in sorted_stats[:limit]:
+        for song_id_str, stats in sorted_stats[:limit]:
             top_songs.append({
-                'index': int(song_index_str),
+                'id': int(song_id_str),
+                'index': self.song_id_to_row.get(int(song_id_str)),
                 'title': stats.get('title', 'Unknown'),
                 'artist': stats.get('artist', 'Unknown'),
                 'play_count': stats.get('play_count', 0),
@@ -498,6 +652,567 @@ class JukeboxEngine:
 
         print("-" * 80)
 
+    # ============================================================================
+    # STABLE SONG IDS
+    # ============================================================================
+
+    def _song_row(self, song_id: int) -> Optional[int]:
+        """Return the music_master_song_list index for a song id in O(1).
+
+        Args:
+            song_id (int): Song id (a row number from an older GUI is accepted too)
+
+        Returns:
+            Optional[int]: Row index, or None if the song is not in the library
+        """
+        row = self.song_id_to_row.get(song_id)
+        if row is None and isinstance(song_id, int) and not is_song_id(song_id):
+            if 0 <= song_id < len(self.music_master_song_list):
+                row = song_id
+        return row
+
+    def _file_size(self, file_path: str) -> int:
+        """Return a file's size in bytes, or -1 if it cannot be read"""
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return -1
+
+    def index_song_ids(self) -> bool:
+        """Make sure every song has a stable id, build the id -> row map and migrate
+        PaidMusicPlayList.txt and song statistics keyed by row number to ids.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if None in self.music_master_song_list.column('id'):
+                self._print_section("Assigning stable song IDs...")
+                assign_song_ids(self.music_master_song_list,
+                                [self._file_size(song.get('location', '')) for song in self.music_master_song_list])
+                try:
+                    with open(self.music_master_song_list_file, 'w') as master_list_file:
+                        json.dump(self.music_master_song_list.to_list(), master_list_file)
+                except IOError as e:
+                    self._log_error(f"Failed to save MusicMasterSongList.txt with song ids: {e}")
+
+            self.song_id_to_row = build_song_id_index(self.music_master_song_list)
+            self.save_library_snapshot()
+            self._migrate_paid_playlist()
+            self._migrate_statistics()
+            return True
+        except Exception as e:
+            self._log_error(f"Unexpected error in index_song_ids: {e}")
+            return False
+
+    def save_library_snapshot(self) -> None:
+        """Save MusicMasterSongList.bin, the memory-mapped copy of the library the GUI opens instead
+        of parsing MusicMasterSongList.txt, unless it is already up to date"""
+        if (not os.path.exists(self.music_master_song_list_file) or
+                library_snapshot_current(self.library_snapshot_file, self.music_master_song_list_file)):
+            return
+        started: float = time.perf_counter()
+        if write_library_snapshot(self.library_snapshot_file, self.music_master_song_list,
+                                  self.music_master_song_list_file):
+            self.log_writer.log('INFO', 'library_snapshot_saved', timestamp=self.clock.now(),
+                                songs=len(self.music_master_song_list),
+                                bytes=os.path.getsize(self.library_snapshot_file),
+                                ms=round((time.perf_counter() - started) * 1000, 1))
+        else:
+            self._log_error(f"Failed to save {os.path.basename(self.library_snapshot_file)}")
+
+    def _migrate_paid_playlist(self) -> None:
+        """Replace row numbers left in PaidMusicPlayList.txt by an older GUI with song ids"""
+        success, playlist = self._read_paid_playlist()
+        if not success or all(is_song_id(entry) for entry in playlist):
+            return
+        migrated: List[int] = []
+        for entry in playlist:
+            row = self._song_row(entry)
+            if row is None:
+                self._log_error(f"Dropping unknown entry from paid playlist: {entry}")
+                continue
+            migrated.append(self.music_master_song_list[row]['id'])
+        self._write_paid_playlist(migrated)
+        self._print_success(f"Migrated {len(migrated)} paid playlist entries to song ids")
+
+    def _migrate_statistics(self) -> None:
+        """Re-key statistics stored by row number to song ids
+
+        A row number is trusted when that row still has the recorded artist and title;
+        otherwise the song is found by artist and title. Entries that match no song are
+        dropped, and entries that land on the same id are merged.
+        """
+        legacy_keys = [key for key in self.song_statistics if not (key.isdigit() and is_song_id(int(key)))]
+        if not legacy_keys:
+            return
+        by_artist_title: Dict[Tuple[str, str], int] = {}
+        for song in self.music_master_song_list:
+            by_artist_title.setdefault((song.get('artist'), song.get('title')), song['id'])
+
+        migrated = dropped = 0
+        for key in legacy_keys:
+            stats = self.song_statistics.pop(key)
+            artist_title = (stats.get('artist'), stats.get('title'))
+            song_id: Optional[int] = None
+            if key.isdigit() and int(key) < len(self.music_master_song_list):
+                song = self.music_master_song_list[int(key)]
+                if (song.get('artist'), song.get('title')) == artist_title:
+                    song_id = song['id']
+            if song_id is None:
+                song_id = by_artist_title.get(artist_title)
+            if song_id is None:
+                dropped += 1
+                continue
+
+            existing = self.song_statistics.get(str(song_id))
+            if existing is not None:
+                existing['play_count'] = existing.get('play_count', 0) + stats.get('play_count', 0)
+                history = existing.get('play_history', []) + stats.get('play_history', [])
+                history.sort(key=lambda play: play.get('timestamp', ''))
+                existing['play_history'] = history[-100:]
+                existing['last_played'] = max(filter(None, [existing.get('last_played'), stats.get('last_played')]),
+                                              default=None)
+            else:
+                self.song_statistics[str(song_id)] = stats
+            migrated += 1
+
+        self._save_statistics()
+        self._print_success(f"Migrated statistics for {migrated} songs to song ids")
+        if dropped:
+            self._print_warning(f"Dropped statistics for {dropped} songs no longer in the library")
+
+    # ============================================================================
+    # DUPLICATE DETECTION
+    # ============================================================================
+
+    def detect_duplicates(self) -> bool:
+        """Find songs ripped more than once and write DuplicateReport.json
+
+        Candidates share artist, title and (roughly) duration; only those files are read, and
+        fingerprints from the previous report are reused for files that have not changed.
+        With duplicates.hide_from_random set, generate_random_song_list() skips the copies.
+
+        Returns:
+            bool: Always True - if detection fails every song simply stays in the random pool
+        """
+        self.duplicate_song_ids = set()
+        duplicates_config: Dict[str, Any] = self.config['duplicates']
+        if not duplicates_config['detect']:
+            return True
+        try:
+            self._print_section("Checking for duplicate songs...")
+            previous: Dict[str, Any] = load_duplicate_report(self.duplicate_report_file) or {}
+            report: Dict[str, Any] = find_duplicates(self.music_master_song_list,
+                                                     duplicates_config['duration_tolerance'],
+                                                     duplicates_config['workers'],
+                                                     previous.get('fingerprints'))
+            if not write_duplicate_report(self.duplicate_report_file, report):
+                self._log_error(f"Failed to save {os.path.basename(self.duplicate_report_file)}")
+            self.duplicate_song_ids = set(duplicate_song_ids(report))
+            self.log_writer.log('INFO', 'duplicates_detected', timestamp=self.clock.now(),
+                                groups=report['duplicate_groups'], songs=report['duplicate_songs'],
+                                possible=len(report['possible']), files_hashed=report['files_hashed'])
+            if self.duplicate_song_ids:
+                hidden = " (hidden from random play)" if duplicates_config['hide_from_random'] else ""
+                self._print_warning(f"Found {report['duplicate_songs']} duplicate songs in "
+                                    f"{report['duplicate_groups']} groups{hidden}")
+            else:
+                self._print_success("No duplicate songs found")
+        except Exception as e:
+            self._log_error(f"Unexpected error in detect_duplicates: {e}")
+        return True
+
+    # ============================================================================
+    # LIBRARY HEALTH
+    # ============================================================================
+
+    def check_library_health(self) -> bool:
+        """Quarantine songs already known to be unplayable and start the background health scan
+
+        Bad verdicts from the previous HealthReport.json apply at once for files that have not
+        changed since. The scan then probes new and changed files on low-priority worker
+        threads while the jukebox plays; jukebox_engine() applies its report between songs.
+
+        Returns:
+            bool: Always True - if the check fails every song simply stays playable
+        """
+        self.quarantined_song_ids = set()
+        if self.health_scan is not None:
+            self.health_scan.cancel()
+            self.health_scan = None
+        health_config: Dict[str, Any] = self.config['health']
+        if not health_config['check']:
+            return True
+        try:
+            previous: Dict[str, Any] = load_health_report(self.health_report_file) or {}
+            verdicts: Dict[str, Dict[str, Any]] = previous.get('verdicts', {})
+            if health_config['quarantine']:
+                for song in previous.get('quarantined', []):
+                    cached = verdicts.get(song['location'])
+                    if (song.get('id') in self.song_id_to_row and cached is not None and
+                            cached['signature'] == file_signature(song['location'])):
+                        self.quarantined_song_ids.add(song['id'])
+                if self.quarantined_song_ids:
+                    self._print_warning(f"{len(self.quarantined_song_ids)} unplayable songs quarantined "
+                                        f"by the last health check")
+
+            self.health_scan = HealthScan(self.music_master_song_list, health_config['workers'],
+                                          health_config['niceness'], verdicts)
+            self.health_scan.start()
+            self._print_section("Library health check running in the background...")
+        except Exception as e:
+            self._log_error(f"Unexpected error in check_library_health: {e}")
+        return True
+
+    # ============================================================================
+    # LOUDNESS AND SILENCE
+    # ============================================================================
+
+    def load_audio_analysis(self) -> bool:
+        """Load the per-song loudness and cue points written by audio_analysis_module.py
+
+        The analysis runs offline; at play time the cached values only set the volume and the
+        start and stop times, so levelling and silence skipping cost nothing.
+
+        Returns:
+            bool: Always True - songs without an analysis simply play untouched
+        """
+        self.track_analysis = {}
+        cache: Optional[Dict[str, Any]] = load_analysis_cache(self.audio_analysis_file)
+        if cache is None:
+            return True
+        try:
+            for song_id, analysis in cache['tracks'].items():
+                if int(song_id) in self.song_id_to_row:
+                    self.track_analysis[int(song_id)] = analysis
+            self._print_success(f"Loudness and silence analysis loaded for {len(self.track_analysis)} "
+                                f"of {len(self.music_master_song_list)} songs")
+        except (KeyError, ValueError, AttributeError) as e:
+            self._log_error(f"Failed to load {os.path.basename(self.audio_analysis_file)}: {e}")
+        return True
+
+    # ============================================================================
+    # PROGRESSIVE STARTUP
+    # ============================================================================
+
+    def start_progressively(self) -> bool:
+        """Start playing before a changed library has been rescanned
+
+        The rescan runs on a background thread. Meanwhile the jukebox plays from the last
+        known-good MusicMasterSongList.txt or, on a first start, from the first batch of songs
+        the scan finds; jukebox_engine() merges the rest between songs. Duplicate detection
+        waits for the finished scan.
+
+        Returns:
+            bool: True once the jukebox has run, False if there was nothing to start with
+                (the caller falls back to the full scan)
+        """
+        started: float = time.perf_counter()
+        self._print_header("Progressive Startup")
+        self.tag_reader = self._create_tag_reader()
+        self.library_scan = BackgroundLibraryScan(self.music_roots, self.library_cache_dir, self._scan_options(),
+                                                  self._read_song_tags, self.config['startup']['batch_size'])
+        self.library_scan.start()
+
+        library: str = 'last_known_good'
+        success: bool = False
+        if os.path.exists(self.music_master_song_list_file):
+            success, self.music_master_song_list = self._read_master_song_list()
+        if not success or not self.music_master_song_list:
+            library = 'first_batch'
+            self.music_master_song_list = Library()
+            while not self.music_master_song_list and self.library_scan.wait_for_batch():
+                self.music_master_song_list = Library(self._new_song_rows(self.library_scan.take_batches()))
+                if self.library_scan.done():
+                    break
+        if not self.music_master_song_list:
+            self.library_scan = None
+            return False
+        self._scanned_locations = {song['location'] for song in self.music_master_song_list}
+
+        self.log_writer.log('INFO', 'progressive_start', timestamp=self.clock.now(), library=library,
+                            songs=len(self.music_master_song_list), ms=round((time.perf_counter() - started) * 1000, 1))
+        self._print_success(f"Playing from the {library.replace('_', ' ')} library "
+                            f"({len(self.music_master_song_list)} songs) while the music folder is rescanned")
+        if (self.index_song_ids() and
+            self.check_library_health() and
+            self.load_audio_analysis() and
+            (self.restore_snapshot() or
+             (self.assign_genres_to_random_play() and self.generate_random_song_list()))):
+            self.jukebox_engine()
+            return True
+        return False
+
+    def _new_song_rows(self, songs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """MusicMasterSongList rows, numbered after the current library, for songs from the scan
+
+        A copy of a song already in the library gets the next free id, not that song's.
+        """
+        rows: List[Dict[str, Any]] = [{'number': len(self.music_master_song_list) + offset,
+                                       **{field: song[field] for field in SONG_FIELDS}}
+                                      for offset, song in enumerate(songs)]
+        assign_song_ids(rows, [song['size'] for song in songs], taken_ids=self.song_id_to_row)
+        return rows
+
+    def _insert_into_rotation(self, rows: range) -> None:
+        """Add the genre masks of library rows appended since the masks were built, and give those
+        rows' songs that are eligible for random play and not in the rotation yet random places in it"""
+        genre_flags: List[str] = [self.genre0, self.genre1, self.genre2, self.genre3]
+        skipped: set = set(self.random_music_playlist) | self.quarantined_song_ids
+        if self.config['duplicates']['hide_from_random']:
+            skipped |= self.duplicate_song_ids
+        for row in rows:
+            song: Dict[str, Any] = self.music_master_song_list[row]
+            mask: int = genre_mask(song['comment'], genre_flags)
+            self.song_genre_masks.append(mask)
+            if song['id'] not in skipped and random_eligible(mask, genre_flags):
+                self.random_music_playlist.insert(random.randint(0, len(self.random_music_playlist)), song['id'])
+                skipped.add(song['id'])
+
+    def _apply_library_scan(self) -> None:
+        """Merge what the background rescan has found into the live library and random rotation
+
+        New songs join the rotation as their batches arrive. Once the scan has finished, the
+        finished library replaces the running one: it is saved as MusicMasterSongList.txt,
+        songs no longer on disk leave the rotation, and duplicates and health are re-checked.
+        """
+        if self.library_scan is None:
+            return
+        new_songs: List[Dict[str, Any]] = [song for song in self.library_scan.take_batches()
+                                           if song['location'] not in self._scanned_locations]
+        if new_songs:
+            first_row: int = len(self.music_master_song_list)
+            for row in self._new_song_rows(new_songs):
+                self.song_id_to_row[row['id']] = len(self.music_master_song_list)
+                self.music_master_song_list.append(row)
+                self._scanned_locations.add(row['location'])
+            self._insert_into_rotation(range(first_row, len(self.music_master_song_list)))
+            self.log_writer.log('INFO', 'library_scan_merged', timestamp=self.clock.now(), added=len(new_songs),
+                                songs=len(self.music_master_song_list))
+        if not self.library_scan.done():
+            return
+
+        library_scan: BackgroundLibraryScan = self.library_scan
+        self.library_scan = None
+        self._scanned_locations = set()
+        if library_scan.error is not None:
+            self._log_error(f"Background library scan failed: {library_scan.error}")
+            return
+        if not library_scan.songs:
+            self._log_error("No music files found in music directory")
+            return
+        # The finished scan replaces the library, numbered in artist order like a full scan
+        rotation: List[int] = self.random_music_playlist
+        self.music_id3_metadata_list = [[counter] + [song[field] for field in SONG_FIELDS]
+                                        for counter, song in enumerate(library_scan.songs)]
+        if not (self.generate_music_master_song_list_dictionary() and self.index_song_ids()):
+            return
+        self.detect_duplicates()
+        self.check_library_health()
+        self.load_audio_analysis()
+        hidden: set = set(self.quarantined_song_ids)
+        if self.config['duplicates']['hide_from_random']:
+            hidden |= self.duplicate_song_ids
+        self.random_music_playlist = [song_id for song_id in rotation
+                                      if song_id in self.song_id_to_row and song_id not in hidden]
+        self.song_genre_masks = bytearray()
+        self._insert_into_rotation(range(len(self.music_master_song_list)))
+        self.log_writer.log('INFO', 'library_scan_finished', timestamp=self.clock.now(),
+                            songs=len(self.music_master_song_list), rotation=len(self.random_music_playlist),
+                            files=sum(refreshed['files'] for refreshed in library_scan.refreshed),
+                            tags_read=sum(refreshed['tags_read'] for refreshed in library_scan.refreshed))
+        self._print_success(f"Library rescan finished: {len(self.music_master_song_list)} songs")
+
+    # ============================================================================
+    # WARM RESTART SNAPSHOT
+    # ============================================================================
+
+    def restore_snapshot(self) -> bool:
+        """Restore the genre flags, random rotation and interrupted song from EngineSnapshot.bin
+
+        Replaces assign_genres_to_random_play() and generate_random_song_list() on a warm
+        start, so a restart carries on the rotation where it stopped instead of reshuffling.
+        Songs quarantined or hidden since the checkpoint are dropped from the rotation and
+        songs that became eligible are added at its end.
+
+        Returns:
+            bool: True if restored, False if there is no usable snapshot (the caller rebuilds)
+        """
+        if not self.config['snapshot']['enabled']:
+            return False
+        started: float = time.perf_counter()
+        snapshot: Optional[Dict[str, Any]] = read_snapshot(self.engine_snapshot_file)
+        genre_flags: List[str] = (self._read_genres()[1] + ['null'] * 4)[:4]
+        stale_reason: Optional[str] = None
+        if snapshot is None:
+            stale_reason = 'unreadable' if os.path.exists(self.engine_snapshot_file) else None
+        elif snapshot['generation'] != library_generation(self.music_master_song_list_file,
+                                                          len(self.music_master_song_list)):
+            stale_reason = 'library_changed'
+        elif snapshot['genre_flags'] != genre_flags:
+            stale_reason = 'genres_changed'
+        if snapshot is None or stale_reason is not None:
+            if stale_reason is not None:
+                self._print_warning(f"Engine snapshot is stale ({stale_reason}) - rebuilding the random playlist")
+                self.log_writer.log('INFO', 'snapshot_stale', timestamp=self.clock.now(), reason=stale_reason)
+            return False
+
+        self.genre0, self.genre1, self.genre2, self.genre3 = genre_flags
+        self.final_genre_list = snapshot['genre_list']
+        self.song_genre_masks = bytearray(snapshot['genre_masks'])
+
+        hidden: set = set(self.quarantined_song_ids)
+        if self.config['duplicates']['hide_from_random']:
+            hidden |= self.duplicate_song_ids
+        rotation: List[int] = [song_id for song_id in snapshot['rotation']
+                               if song_id in self.song_id_to_row and song_id not in hidden]
+        in_rotation: set = set(rotation)
+        added: List[int] = [song_id for row, song_id in enumerate(self.music_master_song_list.column('id'))
+                            if song_id not in in_rotation and song_id not in hidden
+                            and random_eligible(self.song_genre_masks[row], genre_flags)]
+        random.shuffle(added)
+        self.random_music_playlist = rotation + added
+
+        if snapshot['current_song_id'] is not None:
+            self._resume_song = (snapshot['current_song_id'], snapshot['position'])
+        self.log_writer.log('INFO', 'snapshot_restored', timestamp=self.clock.now(),
+                            rotation=len(self.random_music_playlist), added=len(added),
+                            current_song_id=snapshot['current_song_id'], position=round(snapshot['position'], 1),
+                            ms=round((time.perf_counter() - started) * 1000, 2))
+        self._print_success(f"Restored engine snapshot: random playlist of {len(self.random_music_playlist)} songs"
+                            + (f", resuming at {snapshot['position']:.0f}s" if self._resume_song else ""))
+        return True
+
+    def save_snapshot(self) -> bool:
+        """Checkpoint the rotation and the current song's position to EngineSnapshot.bin
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.config['snapshot']['enabled'] or not self.music_master_song_list:
+            return False
+        self._last_checkpoint = self.clock.now()
+        position: float = 0.0
+        if self.current_song_id is not None:
+            position = (self._stopped_position if self._stopped_position is not None
+                        else self.audio_backend.get_position())
+        if not write_snapshot(self.engine_snapshot_file, {
+                'generation': library_generation(self.music_master_song_list_file, len(self.music_master_song_list)),
+                'saved': self._last_checkpoint,
+                'genre_flags': [self.genre0, self.genre1, self.genre2, self.genre3],
+                'genre_list': self.final_genre_list,
+                'genre_masks': self.song_genre_masks,
+                'rotation': self.random_music_playlist,
+                'current_song_id': self.current_song_id,
+                'position': position}):
+            self._log_error(f"Failed to save {os.path.basename(self.engine_snapshot_file)}")
+            return False
+        return True
+
+    def _resume_position(self, song_id: Optional[int]) -> float:
+        """Position to start the first song after a restore at, if it is the song that was interrupted"""
+        resume_song, self._resume_song = self._resume_song, None
+        if resume_song is not None and resume_song[0] == song_id:
+            return resume_song[1]
+        return 0.0
+
+    # ============================================================================
+    # PREFETCH
+    # ============================================================================
+
+    def _create_prefetcher(self) -> Optional[TrackPrefetcher]:
+        """Create the page-cache prefetcher from the 'prefetch' config (None when disabled)"""
+        prefetch_config: Dict[str, Any] = self.config['prefetch']
+        if not prefetch_config['enabled']:
+            return None
+        return TrackPrefetcher(int(prefetch_config['budget_mb'] * 1024 * 1024), prefetch_config['method'])
+
+    def _prefetch_upcoming(self, current_song_id: Optional[int]) -> None:
+        """Hand the prefetcher the songs due after the current one: the rest of the paid queue,
+        then the head of the random rotation"""
+        upcoming: List[str] = []
+        for song_id in self.paid_music_playlist + self.random_music_playlist:
+            if len(upcoming) >= self.config['prefetch']['lookahead']:
+                break
+            if song_id == current_song_id or song_id in self.quarantined_song_ids:
+                continue
+            row = self._song_row(song_id)
+            if row is not None:
+                upcoming.append(self._playback_location(self.music_master_song_list[row]['location']))
+        self.prefetcher.update(upcoming)
+
+    # ============================================================================
+    # LIBRARY MIRROR
+    # ============================================================================
+
+    def _create_mirror(self) -> Optional[LibraryMirror]:
+        """Create the local library mirror from the 'mirror' config (None when disabled)"""
+        mirror_config: Dict[str, Any] = self.config['mirror']
+        if not mirror_config['enabled']:
+            return None
+        source: Optional[HttpSource] = None
+        if mirror_config['remote_url']:
+            source = HttpSource(mirror_config['remote_url'], self.music_roots, mirror_config['timeout'])
+        return LibraryMirror(os.path.join(self.dir_path, mirror_config['cache_dir']),
+                             int(mirror_config['budget_mb'] * 1024 * 1024), source)
+
+    def _mirror_upcoming(self, current_song_id: Optional[int]) -> None:
+        """Have the mirror copy the whole paid queue, then the head of the random rotation"""
+        random_lookahead: List[int] = [song_id for song_id in self.random_music_playlist
+                                       if song_id not in self.quarantined_song_ids][:self.config['mirror']['random_lookahead']]
+        upcoming: List[str] = []
+        for song_id in self.paid_music_playlist + random_lookahead:
+            if song_id == current_song_id or song_id in self.quarantined_song_ids:
+                continue
+            row = self._song_row(song_id)
+            if row is not None:
+                upcoming.append(self.music_master_song_list[row]['location'])
+        self.mirror.request(upcoming)
+
+    def _mirror_new_paid_requests(self, current_song_id: Optional[int]) -> None:
+        """Start mirroring songs paid for while a song plays, as soon as PaidMusicPlayList.txt changes"""
+        try:
+            paid_queue_mtime: int = os.stat(self.paid_music_playlist_file).st_mtime_ns
+            if paid_queue_mtime == self._mirrored_paid_queue_mtime:
+                return
+            with open(self.paid_music_playlist_file, 'r') as paid_list_file:
+                self.paid_music_playlist = json.load(paid_list_file)
+        except (IOError, json.JSONDecodeError):
+            return
+        self._mirrored_paid_queue_mtime = paid_queue_mtime
+        self._mirror_upcoming(current_song_id)
+
+    def _playback_location(self, location: str) -> str:
+        """The file a song is read from: its mirrored copy when there is one"""
+        if self.mirror is None:
+            return location
+        return self.mirror.local_path(location, touch=False) or location
+
+    def _apply_health_report(self) -> None:
+        """Save the background health scan's report once it has finished and quarantine the bad songs"""
+        if self.health_scan is None or not self.health_scan.done():
+            return
+        report: Dict[str, Any] = self.health_scan.report
+        self.health_scan = None
+        if not write_health_report(self.health_report_file, report):
+            self._log_error(f"Failed to save {os.path.basename(self.health_report_file)}")
+        self.log_writer.log('INFO', 'library_health_checked', timestamp=self.clock.now(), checked=report['checked'],
+                            from_cache=report['from_cache'], bad=report['bad_songs'], seconds=report['seconds'])
+        if not self.config['health']['quarantine']:
+            return
+
+        self.quarantined_song_ids = quarantined_song_ids(report)
+        for song in report['quarantined']:
+            self.log_writer.log('WARNING', 'song_quarantined', timestamp=self.clock.now(), song_id=song['id'],
+                                location=song['location'], reason=song['reason'])
+        if self.quarantined_song_ids:
+            self.random_music_playlist = [song_id for song_id in self.random_music_playlist
+                                          if song_id not in self.quarantined_song_ids]
+            self._print_warning(f"Library health check quarantined {len(self.quarantined_song_ids)} unplayable songs")
+        else:
+            self._print_success(f"Library health check passed ({report['checked']} files probed)")
+
     def _print_header(self, message: str) -> None:
         """Print a formatted header message to console
 
@@ -564,7 +1279,7 @@ class JukeboxEngine:
             datetime: Current timestamp rounded to nearest second
         """
         try:
-            now: datetime = datetime.now()
+            now: datetime = datetime.fromtimestamp(self.clock.now())
             rounded_now: datetime = now + timedelta(seconds=self.TIMESTAMP_ROUNDING)
             return rounded_now.replace(microsecond=0)
         except Exception as e:
@@ -577,35 +1292,17 @@ class JukeboxEngine:
         Args:
             error_message (str): The error message to log
         """
-        timestamp: datetime = self._get_rounded_timestamp()
-        error_log: str = f"\n{timestamp} ERROR: {error_message}"
-
-        # Only log to file if logging is enabled
-        if self.config['logging']['enabled']:
-            try:
-                with open(self.log_file, 'a') as log:
-                    log.write(error_log)
-            except Exception as e:
-                self._print_error_msg(f"Could not write to log file: {e}")
-
+        # Queued for the background writer - never blocks on the disk
+        self.log_writer.log('ERROR', 'error', timestamp=self.clock.now(), message=error_message)
         self._print_error_msg(error_message)
 
     def _setup_files(self) -> None:
         """Check for files on disk. If they don't exist, create them"""
-        # Create date and time stamp for log file
-        now: datetime = self._get_rounded_timestamp()
-
-        # Setup log file
-        try:
-            if not os.path.exists(self.log_file):
-                with open(self.log_file, 'w') as log:
-                    log.write(str(now) + ' Jukebox Engine Started - New Log File Created,')
-                self._print_success(f"Created log file: {os.path.basename(self.log_file)}")
-            else:
-                with open(self.log_file, 'a') as log:
-                    log.write('\n' + str(now) + ' Jukebox Engine Restarted,')
-        except IOError as e:
-            self._log_error(f"Failed to setup log.txt: {e}")
+        # Setup log file (created by the log writer on its first batch)
+        new_log_file: bool = not self.log_writer.log_exists()
+        self.log_writer.log('INFO', 'engine_started', timestamp=self.clock.now(), new_log_file=new_log_file)
+        if new_log_file and self.log_writer.enabled:
+            self._print_success(f"Created log file: {os.path.basename(self.log_file)}")
 
         # Setup genre flags file
         try:
@@ -651,19 +1348,20 @@ class JukeboxEngine:
                 if not self.random_music_playlist:
                     self._log_error("Random playlist is empty")
                     return False
-                song_index: int = self.random_music_playlist[0]
+                song_id: int = self.random_music_playlist[0]
             elif playlist_type == 'paid':
                 if not self.paid_music_playlist:
                     self._log_error("Paid playlist is empty")
                     return False
-                song_index: int = int(self.paid_music_playlist[0])
+                song_id: int = int(self.paid_music_playlist[0])
             else:
                 self._log_error(f"Invalid playlist type: {playlist_type}")
                 return False
 
-            # Validate song index
-            if song_index >= len(self.music_master_song_list):
-                self._log_error(f"Song index {song_index} out of range")
+            # Look up the song's row
+            song_index: Optional[int] = self._song_row(song_id)
+            if song_index is None:
+                self._log_error(f"Song id {song_id} is not in the music library")
                 return False
 
             # Assign song metadata to instance variables
@@ -678,67 +1376,112 @@ class JukeboxEngine:
             self._log_error(f"Failed to assign {playlist_type} song data: {e}")
             return False
 
+    def _scan_options(self) -> Dict[str, Any]:
+        """Return the scan_music_files() options from the 'scan' section of the config"""
+        scan_config: Dict[str, Any] = self.config['scan']
+        return {
+            'extensions': scan_config['extensions'],
+            'recursive': scan_config['recursive'],
+            'include': scan_config['include'],
+            'exclude': scan_config['exclude'],
+            'on_error': lambda e: self._log_error(f"Failed to scan music directory: {e}")
+        }
+
+    def _create_tag_reader(self) -> FastTagReader:
+        """Create the scan's tag reader: the bounded MP3 fast path, with TinyTag for the rest"""
+        return FastTagReader(fallback=self._read_tags_with_tinytag, enabled=self.config['scan']['fast_mp3_tags'],
+                             max_tag_bytes=self.config['scan']['max_tag_bytes'])
+
+    @staticmethod
+    def _read_tags_with_tinytag(file_path: str) -> Any:
+        """The tag reader's fallback: TinyTag.get()"""
+        from tinytag import TinyTag  # deferred so a start from the library cache never imports it
+        return TinyTag.get(file_path)
+
+    def _read_song_tags(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Read one music file's tags and duration
+
+        Args:
+            file_path (str): Full path of the music file
+
+        Returns:
+            Optional[Dict[str, Any]]: title, artist, album, year, comment and 'MM:SS' duration,
+                or None if the file could not be read
+        """
+        try:
+            id3tag: Optional[Any] = self.tag_reader.get(file_path)
+
+            if id3tag is None:
+                self._log_error(f"Could not read metadata from {file_path}")
+                return None
+
+            get_song_duration_seconds: str = "%f" % id3tag.duration
+            remove_song_duration_decimals: float = float(get_song_duration_seconds)
+            song_duration_decimals_removed: int = int(remove_song_duration_decimals)
+            song_duration_minutes_seconds: int = int(song_duration_decimals_removed)
+            song_duration: str = time.strftime("%M:%S", time.gmtime(song_duration_minutes_seconds))
+
+            return {
+                'title': "%s" % id3tag.title,
+                'artist': "%s" % id3tag.artist,
+                'album': "%s" % id3tag.album,
+                'year': "%s" % id3tag.year,
+                'comment': "%s" % id3tag.comment,
+                'duration': song_duration
+            }
+        except Exception as e:
+            self._log_error(f"Failed to extract metadata from {file_path}: {e}")
+            return None
+
     def generate_mp3_metadata(self) -> bool:
-        """Generate MP3 metadata from music directory
+        """Generate metadata for every music file under the music roots
+
+        Each root keeps its own cache and artist-sorted index (library_roots_module). Files
+        are streamed from the recursive scanner, tags are only read for new or changed files,
+        and an unchanged root is used as cached. The roots are then k-way merged into one
+        artist-sorted list, numbered in that order.
 
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            self._print_header("Generating MP3 Metadata")
+            self._print_header("Generating Music Metadata")
             print("Please Be Patient - Regenerating Your Songlist From Scratch")
             print("Music Will Start When Finished\n")
 
-            counter: int = 0
-
-            # Get music files using cross-platform path
-            try:
-                mp3_music_files: List[str] = glob.glob(os.path.join(self.music_dir, '*.mp3'))
-            except Exception as e:
-                self._log_error(f"Failed to search for MP3 files: {e}")
-                return False
-
-            if not mp3_music_files:
-                self._log_error("No MP3 files found in music directory")
+            files_found: int = 0
+            root_indexes: List[List[Dict[str, Any]]] = []
+            self.tag_reader = self._create_tag_reader()
+            for music_root in self.music_roots:
+                refreshed: Dict[str, Any] = refresh_root_index(music_root, self.library_cache_dir,
+                                                               self._scan_options(), self._read_song_tags)
+                files_found += refreshed['files']
+                root_indexes.append(refreshed['songs'])
+                state: str = "updated" if refreshed['changed'] else "unchanged"
+                self._print_success(f"{music_root}: {len(refreshed['songs'])} songs ({state}, "
+                                    f"{refreshed['tags_read']} read, {refreshed['reused']} cached, "
+                                    f"{refreshed['removed']} removed)")
+
+            if not files_found:
+                self._log_error("No music files found in music directory")
                 return False
 
-            print(f"Found {len(mp3_music_files)} MP3 files. Processing...\n")
-
-            for file_path in mp3_music_files:
-                try:
-                    id3tag: Optional[Any] = TinyTag.get(file_path)
-
-                    if id3tag is None:
-                        self._log_error(f"Could not read metadata from {file_path}")
-                        continue
-
-                    get_song_duration_seconds: str = "%f" % id3tag.duration
-                    remove_song_duration_decimals: float = float(get_song_duration_seconds)
-                    song_duration_decimals_removed: int = int(remove_song_duration_decimals)
-                    song_duration_minutes_seconds: int = int(song_duration_decimals_removed)
-                    song_duration: str = time.strftime("%M:%S", time.gmtime(song_duration_minutes_seconds))
-
-                    song_metadata: List[Any] = list((
-                        counter,
-                        file_path,
-                        "%s" % id3tag.title,
-                        "%s" % id3tag.artist,
-                        "%s" % id3tag.album,
-                        "%s" % id3tag.year,
-                        "%s" % id3tag.comment,
-                        song_duration
-                    ))
-                    self.music_id3_metadata_list.append(song_metadata)
-                    counter += 1
-                except Exception as e:
-                    self._log_error(f"Failed to extract metadata from {file_path}: {e}")
-                    continue
+            # Merge the per-root indexes into [number, location, title, artist, album, year, comment, duration]
+            for counter, song in enumerate(merge_root_indexes(root_indexes)):
+                self.music_id3_metadata_list.append([counter] + [song[field] for field in SONG_FIELDS])
 
             if not self.music_id3_metadata_list:
-                self._log_error("No valid metadata was extracted from MP3 files")
+                self._log_error("No valid metadata was extracted from music files")
                 return False
 
-            self._print_success(f"Extracted metadata from {counter} songs")
+            self._print_success(f"Extracted metadata from {len(self.music_id3_metadata_list)} of "
+                                f"{files_found} music files")
+            tag_stats: Dict[str, Any] = self.tag_reader.stats()
+            if tag_stats['files']:
+                print(f"Tags read: {tag_stats['fast_path']} fast path ({tag_stats['bytes_per_file']} bytes/file), "
+                      f"{tag_stats['fallbacks']} TinyTag {tag_stats['fallback_reasons']}")
+            self.log_writer.log('INFO', 'library_scanned', timestamp=self.clock.now(), files=files_found,
+                                songs=len(self.music_id3_metadata_list), tag_reader=tag_stats)
             return True
         except Exception as e:
             self._log_error(f"Unexpected error in generate_mp3_metadata: {e}")
@@ -757,12 +1500,16 @@ class JukeboxEngine:
             keys: List[str] = ['number', 'location', 'title', 'artist', 'album', 'year', 'comment', 'duration']
 
             # Build MusicMasterSongList Dictionary
-            self.music_master_song_list = [dict(zip(keys, sublst)) for sublst in self.music_id3_metadata_list]
+            song_rows: List[Dict[str, Any]] = [dict(zip(keys, sublst)) for sublst in self.music_id3_metadata_list]
+
+            # Stable ids from tags and file size, independent of the row number
+            assign_song_ids(song_rows, [self._file_size(song['location']) for song in song_rows])
+            self.music_master_song_list = Library(song_rows)
 
             # Save MusicMasterSongList Dictionary
             try:
                 with open(self.music_master_song_list_file, 'w') as master_list_file:
-                    json.dump(self.music_master_song_list, master_list_file)
+                    json.dump(self.music_master_song_list.to_list(), master_list_file)
                 self._print_success(f"Saved master song list to {os.path.basename(self.music_master_song_list_file)}")
             except (IOError, json.JSONDecodeError) as e:
                 self._log_error(f"Failed to save MusicMasterSongList.txt: {e}")
@@ -783,21 +1530,34 @@ class JukeboxEngine:
             self._log_error(f"Unexpected error in generate_music_master_song_list_dictionary: {e}")
             return False
 
-    def play_song(self, song_file_name: str) -> bool:
-        """Play a song using VLC media player
+    def play_song(self, song_file_name: str, song_id: Optional[int] = None) -> bool:
+        """Play a song through the configured audio backend
 
         Args:
             song_file_name (str): The full path to the song file to play
+            song_id (Optional[int]): The song's id, used to apply its cached gain and cue points
 
         Returns:
             bool: True if successful, False otherwise
         """
+        # A stop position belongs to the song stop() cut short, never to the next one
+        self._stopped_position = None
         try:
+            # Play the local copy of a song on a network share, copying it now if the mirror has not yet
+            if self.mirror is not None:
+                mirrored_file_name: Optional[str] = self.mirror.ensure(song_file_name)
+                self._mirror_upcoming(song_id)
+                if mirrored_file_name is None:
+                    self._log_error(f"Failed to mirror {song_file_name}, playing it from the library")
+                else:
+                    song_file_name = mirrored_file_name
+
             if not os.path.exists(song_file_name):
                 self._log_error(f"Song file not found: {song_file_name}")
                 return False
 
             if self.config['console']['show_system_info']:
+                import psutil  # deferred to the first song, and only when the system info is shown
                 print("\nSystem Info:")
                 print(psutil.virtual_memory())
                 print("Garbage collection thresholds:", gc.get_threshold())
@@ -807,22 +1567,52 @@ class JukeboxEngine:
             if self.config['console']['verbose']:
                 print(f"Garbage collector: collected {collected} objects.")
 
-            # VLC Song Playback Code Begin
+            # Note whether the prefetcher warmed this song, then start warming the ones after it
+            if self.prefetcher is not None:
+                prefetched: Optional[Dict[str, Any]] = self.prefetcher.take(song_file_name)
+                self.log_writer.log('INFO', 'song_prefetch', timestamp=self.clock.now(), song_id=song_id,
+                                    warmed=prefetched is not None,
+                                    bytes=prefetched['bytes'] if prefetched else 0,
+                                    latency_saved_ms=round(prefetched['first_read_seconds'] * 1000, 1)
+                                    if prefetched else 0.0)
+                self._prefetch_upcoming(song_id)
+
+            # Level the volume and skip leading/trailing silence from the offline analysis
+            analysis_config: Dict[str, Any] = self.config['analysis']
+            volume, start_time, stop_time = playback_settings(
+                self.track_analysis.get(song_id), self.config['audio']['volume'],
+                analysis_config['target_loudness'], analysis_config['max_volume'],
+                analysis_config['apply_gain'], analysis_config['skip_silence'])
+            # Pick up where the song was interrupted by a restart
+            start_time = max(start_time, self._resume_position(song_id))
+
+            # Song Playback Code Begin
             try:
-                p: vlc.MediaPlayer = vlc.MediaPlayer(song_file_name)
-                p.play()
+                self.audio_backend.set_volume(volume)
+                self.audio_backend.load(song_file_name, start_time, stop_time)
+                self.audio_backend.play()
+                self.current_song_id = song_id
+                self.save_snapshot()
                 if self.config['console']['verbose']:
-                    print('is_playing:', p.is_playing())  # 0 = False
-                time.sleep(self.SLEEP_TIME)  # sleep because it needs time to start playing
+                    print('is_playing:', self.audio_backend.is_playing())  # 0 = False
+                self.clock.sleep(self.SLEEP_TIME)  # sleep because it needs time to start playing
                 if self.config['console']['verbose']:
-                    print('is_playing:', p.is_playing())  # 1 = True
-
-                while p.is_playing():
-                    time.sleep(self.SLEEP_TIME)  # sleep to use less CPU
-                # VLC Song Playback Code End
+                    print('is_playing:', self.audio_backend.is_playing())  # 1 = True
+
+                while self.audio_backend.is_playing():
+                    self.clock.sleep(self.SLEEP_TIME)  # sleep to use less CPU
+                    if self.mirror is not None:
+                        self._mirror_new_paid_requests(song_id)
+                    if self.clock.now() - self._last_checkpoint >= self.config['snapshot']['interval']:
+                        self.save_snapshot()
+                # Song Playback Code End
+                # A song cut short by stop() stays current, so the snapshot resumes it
+                if self._stopped_position is None:
+                    self.current_song_id = None
                 return True
-            except Exception as vlc_error:
-                self._log_error(f"VLC playback error for {song_file_name}: {vlc_error}")
+            except Exception as playback_error:
+                self.current_song_id = None
+                self._log_error(f"Playback error for {song_file_name}: {playback_error}")
                 return False
         except Exception as e:
             self._log_error(f"Unexpected error in play_song: {e}")
@@ -898,6 +1688,10 @@ class JukeboxEngine:
             self._print_section("Generating Random Song Playlist...")
 
             counter: int = 0
+            hide_duplicates: bool = self.config['duplicates']['hide_from_random']
+            genre_flags: List[str] = [self.genre0, self.genre1, self.genre2, self.genre3]
+            self.song_genre_masks = bytearray(self.music_master_song_list.column_map(
+                'comment', lambda comment: genre_mask(comment if comment is not None else '', genre_flags)))
             for song in self.music_master_song_list:
                 try:
                     # Skip songs marked with 'norandom'
@@ -905,20 +1699,30 @@ class JukeboxEngine:
                         counter += 1
                         continue
 
+                    # Skip songs the health check found unplayable
+                    if song['id'] in self.quarantined_song_ids:
+                        counter += 1
+                        continue
+
+                    # Skip extra copies of a song when configured to
+                    if hide_duplicates and song['id'] in self.duplicate_song_ids:
+                        counter += 1
+                        continue
+
                     # Add all songs if no genre filters are set
                     if (self.genre0 == "null" and self.genre1 == "null" and
                         self.genre2 == "null" and self.genre3 == "null"):
-                        self.random_music_playlist.append(counter)
+                        self.random_music_playlist.append(song['id'])
                     else:
                         # Add songs matching any of the genre filters
                         if self.genre0 != "null" and self.genre0 in song['comment']:
-                            self.random_music_playlist.append(counter)
+                            self.random_music_playlist.append(song['id'])
                         elif self.genre1 != "null" and self.genre1 in song['comment']:
-                            self.random_music_playlist.append(counter)
+                            self.random_music_playlist.append(song['id'])
                         elif self.genre2 != "null" and self.genre2 in song['comment']:
-                            self.random_music_playlist.append(counter)
+                            self.random_music_playlist.append(song['id'])
                         elif self.genre3 != "null" and self.genre3 in song['comment']:
-                            self.random_music_playlist.append(counter)
+                            self.random_music_playlist.append(song['id'])
 
                     counter += 1
                 except KeyError as e:
@@ -933,21 +1737,19 @@ class JukeboxEngine:
             self._log_error(f"Unexpected error in generate_random_song_list: {e}")
             return False
 
-    def _log_song_play(self, artist: str, title: str, play_type: str) -> None:
+    def _log_song_play(self, artist: str, title: str, play_type: str, song_index: Optional[int] = None,
+                       song_id: Optional[int] = None) -> None:
         """Log a song play event to log file
 
         Args:
             artist (str): The artist name
             title (str): The song title
             play_type (str): Either 'Paid' or 'Random'
+            song_index (Optional[int]): Index of the song in the master song list
+            song_id (Optional[int]): Stable id of the song
         """
-        try:
-            if self.config['logging']['enabled']:
-                with open(self.log_file, 'a') as log:
-                    now: datetime = self._get_rounded_timestamp()
-                    log.write('\n' + str(now) + ', ' + str(artist) + ' - ' + str(title) + ', Played ' + play_type + ',')
-        except IOError as e:
-            self._log_error(f"Failed to log song play: {e}")
+        self.log_writer.log('INFO', 'song_played', timestamp=self.clock.now(), song_id=song_id,
+                            song_number=song_index, artist=artist, title=title, play_type=play_type)
 
     def _write_current_song_playing(self, song_location: str) -> None:
         """Write current playing song location to file
@@ -961,6 +1763,29 @@ class JukeboxEngine:
         except IOError as e:
             self._log_error(f"Failed to write CurrentSongPlaying.txt: {e}")
 
+    def _remove_from_paid_playlist(self, song_id: int) -> bool:
+        """Remove the first occurrence of song_id from PaidMusicPlayList.txt
+
+        The file is re-read first so selections the GUI added while the song played are kept.
+
+        Args:
+            song_id (int): Id of the song that was just played (or rejected)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with open(self.paid_music_playlist_file, 'r') as paid_list_file:
+                self.paid_music_playlist = json.load(paid_list_file)
+            if song_id in self.paid_music_playlist:
+                self.paid_music_playlist.remove(song_id)
+            with open(self.paid_music_playlist_file, 'w') as paid_list_file:
+                json.dump(self.paid_music_playlist, paid_list_file)
+            return True
+        except (IOError, json.JSONDecodeError) as e:
+            self._log_error(f"Failed to update PaidMusicPlayList.txt: {e}")
+            return False
+
     def jukebox_engine(self) -> bool:
         """
         Main jukebox engine - plays paid songs first, then alternates with random songs
@@ -976,7 +1801,11 @@ class JukeboxEngine:
             self._print_header("Jukebox Engine Starting")
 
             # Main loop: continuously check for paid songs, play them, then play one random song
-            while True:
+            while not self.stop_requested:
+                # Pick up the background health check's verdicts and rescanned songs between songs
+                self._apply_health_report()
+                self._apply_library_scan()
+
                 # Play all paid songs - reload file at each iteration to pick up new requests
                 while True:
                     # Reload paid music playlist from file at each iteration to enable real-time additions
@@ -988,14 +1817,20 @@ class JukeboxEngine:
                         break
 
                     # If no more paid songs, exit the inner loop
-                    if not self.paid_music_playlist:
+                    if not self.paid_music_playlist or self.stop_requested:
                         break
                     try:
-                        song_index: int = self.paid_music_playlist[0]
+                        song_id: int = self.paid_music_playlist[0]
+                        song_index: Optional[int] = self._song_row(song_id)
 
-                        if song_index >= len(self.music_master_song_list):
-                            self._log_error(f"Invalid song index in paid playlist: {song_index}")
-                            del self.paid_music_playlist[0]
+                        if song_index is None:
+                            self._log_error(f"Invalid song id in paid playlist: {song_id}")
+                            self._remove_from_paid_playlist(song_id)
+                            continue
+
+                        if song_id in self.quarantined_song_ids:
+                            self._log_error(f"Skipping unplayable song in paid playlist: {song_id}")
+                            self._remove_from_paid_playlist(song_id)
                             continue
 
                         song: Dict[str, str] = self.music_master_song_list[song_index]
@@ -1015,23 +1850,24 @@ class JukeboxEngine:
                         self._write_current_song_playing(song['location'])
 
                         # Log paid song play
-                        self._log_song_play(song['artist'], song['title'], 'Paid')
+                        self._log_song_play(song['artist'], song['title'], 'Paid', song_index, song_id)
 
-                        if not self.play_song(song['location']):
+                        if not self.play_song(song['location'], song_id):
                             self._log_error(f"Failed to play paid song: {song['title']}")
 
-                        # Delete song just played from paid playlist
-                        try:
-                            del self.paid_music_playlist[0]
-                            with open(self.paid_music_playlist_file, 'w') as paid_list_file:
-                                json.dump(self.paid_music_playlist, paid_list_file)
-                        except (IOError, json.JSONDecodeError) as e:
-                            self._log_error(f"Failed to update PaidMusicPlayList.txt: {e}")
+                        # Delete song just played from paid playlist, unless stopped part-way so a restart resumes it
+                        if self.current_song_id is not None:
+                            break
+                        if not self._remove_from_paid_playlist(song_id):
                             break
                     except (KeyError, IndexError, TypeError) as e:
                         self._log_error(f"Error processing paid song: {e}")
                         break
 
+                # Stopped during a paid song: return now, leaving it current for the snapshot
+                if self.stop_requested:
+                    break
+
                 # Play one random song, then loop back to check for paid songs again
                 if self.random_music_playlist:
                     try:
@@ -1051,18 +1887,20 @@ class JukeboxEngine:
                             print(f"Duration: {self.song_duration} | Genre: {self.song_genre}\n")
 
                         # Save current playing song to disk
-                        song_index: int = self.random_music_playlist[0]
+                        song_id: int = self.random_music_playlist[0]
+                        song_index: int = self.song_id_to_row[song_id]
                         self._write_current_song_playing(self.music_master_song_list[song_index]['location'])
 
                         # Log random song play
-                        self._log_song_play(self.artist_name, self.song_name, 'Random')
+                        self._log_song_play(self.artist_name, self.song_name, 'Random', song_index, song_id)
 
-                        if not self.play_song(self.music_master_song_list[song_index]['location']):
+                        if not self.play_song(self.music_master_song_list[song_index]['location'], song_id):
                             self._log_error(f"Failed to play random song: {self.song_name}")
 
-                        # Move song to end of RandomMusicPlaylist
-                        move_first_list_element: int = self.random_music_playlist.pop(0)
-                        self.random_music_playlist.append(move_first_list_element)
+                        # Move song to end of RandomMusicPlaylist, unless stopped part-way so a restart resumes it
+                        if self.current_song_id is None:
+                            move_first_list_element: int = self.random_music_playlist.pop(0)
+                            self.random_music_playlist.append(move_first_list_element)
                         # Loop continues, goes back to check for paid songs again
                     except (KeyError, IndexError, TypeError) as e:
                         self._log_error(f"Error processing random song: {e}")
@@ -1077,6 +1915,29 @@ class JukeboxEngine:
             self._log_error(f"Unexpected error in jukebox_engine: {e}")
             return False
 
+    def stop(self) -> None:
+        """Stop the current song and make jukebox_engine() return"""
+        self.stop_requested = True
+        if self.current_song_id is not None:
+            self._stopped_position = self.audio_backend.get_position()
+        self.audio_backend.stop()
+
+    def close(self) -> None:
+        """Checkpoint the engine, stop the background health check, prefetcher and mirror, flush queued
+        log records and stop the log writer thread"""
+        self.save_snapshot()
+        if self.health_scan is not None:
+            self.health_scan.cancel()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            prefetch_stats: Dict[str, Any] = self.prefetcher.stats()
+            if prefetch_stats['hits'] or prefetch_stats['misses']:
+                self.log_writer.log('INFO', 'prefetch_summary', timestamp=self.clock.now(), **prefetch_stats)
+        if self.mirror is not None:
+            self.mirror.close()
+            self.log_writer.log('INFO', 'mirror_summary', timestamp=self.clock.now(), **self.mirror.stats())
+        self.log_writer.close()
+
     def run(self) -> None:
         """Main execution method"""
         try:
@@ -1086,17 +1947,18 @@ class JukeboxEngine:
 
                 # Count number of files in music directory
                 try:
-                    current_file_count: int = len(glob.glob(os.path.join(self.music_dir, '*.mp3')))
-                    print(f"Current MP3 files in directory: {current_file_count}")
+                    current_file_count: int = sum(count_music_files(music_root, **self._scan_options())
+                                                  for music_root in self.music_roots)
+                    print(f"Current music files in directory: {current_file_count}")
                 except Exception as e:
-                    self._log_error(f"Failed to count MP3 files: {e}")
+                    self._log_error(f"Failed to count music files: {e}")
                     current_file_count: int = -1
 
                 # Open MusicMasterSongListCheck generated from previous run
                 try:
                     with open(self.music_master_song_list_check_file, 'r') as check_file:
                         stored_file_count: int = json.load(check_file)
-                        print(f"Stored MP3 file count: {stored_file_count}")
+                        print(f"Stored music file count: {stored_file_count}")
                 except (IOError, json.JSONDecodeError) as e:
                     self._log_error(f"Failed to load MusicMasterSongListCheck.txt: {e}")
                     stored_file_count: int = -1
@@ -1107,11 +1969,15 @@ class JukeboxEngine:
                     # Open MusicMasterSongList dictionary
                     try:
                         with open(self.music_master_song_list_file, 'r') as master_list_file:
-                            self.music_master_song_list = json.load(master_list_file)
+                            self.music_master_song_list = Library(json.load(master_list_file))
 
                         # MusicMasterSongList matches, run required functions
-                        if (self.assign_genres_to_random_play() and
-                            self.generate_random_song_list()):
+                        if (self.index_song_ids() and
+                            self.detect_duplicates() and
+                            self.check_library_health() and
+                            self.load_audio_analysis() and
+                            (self.restore_snapshot() or
+                             (self.assign_genres_to_random_play() and self.generate_random_song_list()))):
                             self.jukebox_engine()
                             return
                     except (IOError, json.JSONDecodeError) as e:
@@ -1119,9 +1985,17 @@ class JukeboxEngine:
                 else:
                     self._print_warning("Music database count mismatch - regenerating")
 
+            # Play from the last known-good library, or the first songs found, while it is regenerated
+            if self.config['startup']['progressive'] and self.start_progressively():
+                return
+
             # If no match or file doesn't exist, regenerate everything
             if (self.generate_mp3_metadata() and
                 self.generate_music_master_song_list_dictionary() and
+                self.index_song_ids() and
+                self.detect_duplicates() and
+                self.check_library_health() and
+                self.load_audio_analysis() and
                 self.assign_genres_to_random_play() and
                 self.generate_random_song_list()):
                 self.jukebox_engine()
@@ -1136,6 +2010,7 @@ if __name__ == "__main__":
     try:
         jukebox: JukeboxEngine = JukeboxEngine()
         jukebox.run()
+        jukebox.close()
     except Exception as e:
         print(f"CRITICAL: Failed to start Jukebox Engine: {e}")
         sys.exit(1)
@@ -0,0 +1,80 @@
+"""
+Song ID Module
+Stable, content-derived song IDs shared by the engine, the GUI and the tools.
+
+A song's 'number' is its row in MusicMasterSongList and changes whenever a rescan finds
+files in a different order. Its 'id' is derived from the normalised artist, title and album
+tags, the duration and the file size - never from the path - so it survives rescans, renames
+and moves. PaidMusicPlayList.txt and song_statistics.json are keyed by id.
+
+IDs are integers in [2**52, 2**53): exact in JSON (and JavaScript), and never confused with
+a row number, which lets older queue files and statistics be recognised and migrated.
+"""
+import hashlib
+import unicodedata
+from typing import Any, Container, Dict, List, Optional
+
+SONG_ID_MIN: int = 1 << 52
+SONG_ID_MAX: int = (1 << 53) - 1
+
+
+def normalise_tag(value: Any) -> str:
+    """Casefold, NFKC-normalise and collapse whitespace so cosmetic tag edits keep the ID"""
+    return ' '.join(unicodedata.normalize('NFKC', str(value)).casefold().split())
+
+
+def compute_song_id(artist: Any, title: Any, album: Any, duration: str, file_size: int,
+                    occurrence: int = 0) -> int:
+    """Derive a song ID from tags and file size
+
+    Args:
+        artist, title, album: Tag values
+        duration (str): 'MM:SS' duration as stored in MusicMasterSongList
+        file_size (int): Size of the file in bytes (-1 if unknown)
+        occurrence (int): 0 for the first file with these values; 1, 2 ... for identical copies
+
+    Returns:
+        int: ID in [SONG_ID_MIN, SONG_ID_MAX]
+    """
+    key = '\x1f'.join((normalise_tag(artist), normalise_tag(title), normalise_tag(album),
+                       str(duration), str(int(file_size)), str(occurrence)))
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return SONG_ID_MIN | (int.from_bytes(digest, 'big') & (SONG_ID_MIN - 1))
+
+
+def is_song_id(value: Any) -> bool:
+    """Return True for a song ID, False for a legacy row number or anything else"""
+    return isinstance(value, int) and not isinstance(value, bool) and SONG_ID_MIN <= value <= SONG_ID_MAX
+
+
+def assign_song_ids(songs: List[Dict[str, Any]], file_sizes: Optional[List[int]] = None,
+                    taken_ids: Optional[Container[int]] = None) -> None:
+    """Set 'id' on every song dictionary in place
+
+    Identical copies (same tags, duration and size) get distinct IDs in list order, so
+    callers should pass songs in a stable order (e.g. sorted by location).
+
+    Args:
+        songs (List[Dict[str, Any]]): MusicMasterSongList entries
+        file_sizes (Optional[List[int]]): Size of each song's file; -1 when omitted
+        taken_ids (Optional[Container[int]]): IDs already in use, e.g. by the library the songs
+            are being added to; a copy of one of those songs gets the next free occurrence
+    """
+    seen: Dict[int, int] = {}
+    for row, song in enumerate(songs):
+        file_size = file_sizes[row] if file_sizes is not None else -1
+        values = (song.get('artist', ''), song.get('title', ''), song.get('album', ''),
+                  song.get('duration', ''), file_size)
+        first_id = compute_song_id(*values)
+        occurrence = seen.get(first_id, 0)
+        song_id = first_id if occurrence == 0 else compute_song_id(*values, occurrence=occurrence)
+        while taken_ids is not None and song_id in taken_ids:
+            occurrence += 1
+            song_id = compute_song_id(*values, occurrence=occurrence)
+        seen[first_id] = occurrence + 1
+        song['id'] = song_id
+
+
+def build_song_id_index(songs: List[Dict[str, Any]]) -> Dict[int, int]:
+    """Return the id -> row map for a song list (O(1) lookups)"""
+    return {song['id']: row for row, song in enumerate(songs) if 'id' in song}
@@ -0,0 +1,664 @@
+"""
+Song Library Module
+Compact, column-oriented storage for MusicMasterSongList.
+
+A list of song dictionaries costs a dictionary and up to nine separate objects per song.
+Library keeps one column per field instead:
+    location, title         one value per song
+    artist, album, comment  interned: an array of codes into a table of distinct values, so an
+                            artist with forty songs or a genre comment shared by thousands is
+                            stored once
+    year, duration, number  arrays of integers ('duration' as seconds)
+    id                      array of 64-bit song ids
+Songs are read through SongRow, a __slots__ view that behaves like the dictionary it replaces
+(song['artist'], song.get('id'), 'id' in song, dict(song), {**song}), so code written against
+the list of dictionaries works unchanged. Values a typed column cannot hold exactly (a year
+such as '2001-05-01', a duration over 99:59, a missing id) are kept as they were in a small
+overflow table, so to_list() always gives back what was loaded.
+
+The engine also saves the library as MusicMasterSongList.bin, a snapshot other processes map
+into memory instead of parsing MusicMasterSongList.txt (see write_library_snapshot()). Songs
+are read from the mapped file on access, nothing is decoded up front, so opening a 200k song
+library costs about as much as opening a file. Layout (little-endian, sections 8-byte aligned):
+    header        magic 'JKLB', version, song count, string count, size and modification
+                  time of the MusicMasterSongList.txt it was made from, string heap size
+    string codes  for each of STRING_FIELDS, one uint32 per song: its index in the string table
+    number, id    uint32 and uint64 per song
+    sort orders   for each of SORT_KEYS, the rows in fold_sort_key() order (uint32 per song);
+                  the GUI's title search index is built from the title order
+    offsets       string count + 1 uint32 offsets into the heap
+    heap          the distinct strings, UTF-8, back to back
+"""
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate, repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from song_id_module import is_song_id
+
+FIELDS: Tuple[str, ...] = ('number', 'location', 'title', 'artist', 'album', 'year', 'comment', 'duration', 'id')
+INTERNED_FIELDS: Tuple[str, ...] = ('artist', 'album', 'comment')
+_FIELD_SET: frozenset = frozenset(FIELDS)
+STRING_FIELDS: Tuple[str, ...] = ('location', 'title', 'artist', 'album', 'year', 'comment', 'duration')
+# sort_order() field -> the fields rows are sorted by
+SORT_KEYS: Dict[str, Tuple[str, str]] = {'title': ('title', 'artist')}
+
+SNAPSHOT_MAGIC: bytes = b'JKLB'
+SNAPSHOT_VERSION: int = 2
+_SNAPSHOT_HEADER = struct.Struct('<4sHHIIQqQ')
+
+_MISSING: Any = object()  # stored for a field a song does not have
+
+
+def fold_sort_key(text: Any) -> str:
+    """The form titles and artists are sorted and searched in: casefolded, accents removed
+
+    Args:
+        text (Any): A title, artist or the keys entered on the search window (None is treated as '')
+
+    Returns:
+        str: e.g. 'beyonce' for 'Beyoncé', 'strasse' for 'Straße'
+    """
+    if not text:
+        return ''
+    if not isinstance(text, str):
+        text = str(text)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def _encode_year(value: Any) -> Optional[int]:
+    if isinstance(value, str) and len(value) == 4 and value.isdigit() and value[0] != '0':
+        return int(value)
+    return None
+
+
+def _encode_duration(value: Any) -> Optional[int]:
+    """'MM:SS' as seconds, or None for anything that would not format back identically"""
+    if (isinstance(value, str) and len(value) == 5 and value[2] == ':' and value[:2].isdigit()
+            and value[3:].isdigit() and int(value[3:]) < 60):
+        return int(value[:2]) * 60 + int(value[3:])
+    return None
+
+
+def _decode_duration(seconds: int) -> str:
+    return f'{seconds // 60:02d}:{seconds % 60:02d}'
+
+
+def _encode_number(value: Any) -> Optional[int]:
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 0xFFFFFFFF:
+        return value
+    return None
+
+
+def _encode_id(value: Any) -> Optional[int]:
+    return value if is_song_id(value) else None
+
+
+class _Column:
+    """One Python value per song"""
+    __slots__ = ('values',)
+    coded = False
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+
+    def extend(self, values: List[Any]) -> None:
+        self.values.extend(values)
+
+    def getter(self) -> Callable[[int], Any]:
+        return self.values.__getitem__
+
+    def set(self, row: int, value: Any) -> None:
+        self.values[row] = value
+
+    def all(self) -> List[Any]:
+        return list(self.values)
+
+
+class _InternedColumn:
+    """A code per song into a table of the distinct values"""
+    __slots__ = ('codes', 'values', '_codes_by_value')
+    coded = True
+
+    def __init__(self) -> None:
+        self.codes: array = array('I')
+        self.values: List[Any] = []
+        self._codes_by_value: Dict[Any, int] = {}
+
+    def _code(self, value: Any) -> int:
+        try:
+            code = self._codes_by_value.get(value)
+        except TypeError:  # unhashable: stored, not shared
+            self.values.append(value)
+            return len(self.values) - 1
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def extend(self, values: List[Any]) -> None:
+        try:
+            for value in dict.fromkeys(values):
+                if value not in self._codes_by_value:
+                    self._codes_by_value[value] = len(self.values)
+                    self.values.append(value)
+            self.codes.extend(map(self._codes_by_value.__getitem__, values))
+        except TypeError:
+            self.codes.extend([self._code(value) for value in values])
+
+    def getter(self) -> Callable[[int], Any]:
+        codes, values = self.codes, self.values
+        return lambda row: values[codes[row]]
+
+    def value(self, code: int) -> Any:
+        return self.values[code]
+
+    def set(self, row: int, value: Any) -> None:
+        self.codes[row] = self._code(value)
+
+    def all(self) -> List[Any]:
+        values = self.values
+        return [values[code] for code in self.codes]
+
+
+class _TypedColumn:
+    """An integer array, with an overflow table for values that do not encode exactly"""
+    __slots__ = ('codes', 'overflow', 'encode', 'decode', 'sentinel', 'shared')
+    coded = False
+
+    def __init__(self, typecode: str, encode: Callable[[Any], Optional[int]],
+                 decode: Optional[Callable[[int], Any]], sentinel: int, shared: bool = False) -> None:
+        self.codes: array = array(typecode)
+        self.overflow: Dict[int, Any] = {}
+        self.encode = encode
+        self.decode = decode
+        self.sentinel: int = sentinel
+        self.shared: bool = shared  # values repeat across songs
+
+    def extend(self, values: List[Any]) -> None:
+        first_row = len(self.codes)
+        codes: Optional[List[Optional[int]]] = None
+        if self.shared:
+            # Years and durations repeat a lot: encode each distinct value once
+            try:
+                encoded = {value: self.encode(value) for value in set(values)}
+                codes = list(map(encoded.__getitem__, values))
+            except TypeError:  # an unhashable value
+                codes = None
+        if codes is None:
+            codes = [self.encode(value) for value in values]
+        if None in codes:
+            for offset, code in enumerate(codes):
+                if code is None:
+                    codes[offset] = self.sentinel
+                    self.overflow[first_row + offset] = values[offset]
+        self.codes.extend(codes)
+
+    def getter(self) -> Callable[[int], Any]:
+        codes, overflow, decode, sentinel = self.codes, self.overflow, self.decode, self.sentinel
+        if decode is None:
+            return lambda row: codes[row] if codes[row] != sentinel else overflow[row]
+        return lambda row: decode(codes[row]) if codes[row] != sentinel else overflow[row]
+
+    def set(self, row: int, value: Any) -> None:
+        code = self.encode(value)
+        if code is None:
+            self.codes[row] = self.sentinel
+            self.overflow[row] = value
+        else:
+            self.codes[row] = code
+            self.overflow.pop(row, None)
+
+    def all(self) -> List[Any]:
+        get = self.getter()
+        return [get(row) for row in range(len(self.codes))]
+
+
+class _MappedStringColumn:
+    """A snapshot's string column: a uint32 per song into the mapped string table (read-only)"""
+    __slots__ = ('codes', 'value')
+    coded = True
+
+    def __init__(self, codes: Sequence[int], value: Callable[[int], str]) -> None:
+        self.codes = codes
+        self.value = value
+
+    def getter(self) -> Callable[[int], Any]:
+        codes, value = self.codes, self.value
+        return lambda row: value(codes[row])
+
+    def all(self) -> List[Any]:
+        values = {code: self.value(code) for code in set(self.codes)}
+        return list(map(values.__getitem__, self.codes))
+
+    def set(self, row: int, value: Any) -> None:
+        raise TypeError('a library snapshot is read-only')
+
+    def extend(self, values: List[Any]) -> None:
+        raise TypeError('a library snapshot is read-only')
+
+
+class _MappedIntColumn:
+    """A snapshot's integer column (read-only)"""
+    __slots__ = ('values',)
+    coded = False
+
+    def __init__(self, values: Sequence[int]) -> None:
+        self.values = values
+
+    def getter(self) -> Callable[[int], Any]:
+        return self.values.__getitem__
+
+    def all(self) -> List[Any]:
+        return list(self.values)
+
+    def set(self, row: int, value: Any) -> None:
+        raise TypeError('a library snapshot is read-only')
+
+    def extend(self, values: List[Any]) -> None:
+        raise TypeError('a library snapshot is read-only')
+
+
+class _SelectedColumn:
+    """Some rows of another library's column, in a given order (read-only)"""
+    __slots__ = ('base', 'rows', 'codes', 'value', 'coded')
+
+    def __init__(self, base: Any, rows: array) -> None:
+        self.base = base
+        self.rows: array = rows
+        self.coded: bool = base.coded
+        if self.coded:
+            self.codes: array = array('I', map(base.codes.__getitem__, rows))
+            self.value: Callable[[int], Any] = base.value
+
+    def getter(self) -> Callable[[int], Any]:
+        base_getter, rows = self.base.getter(), self.rows
+        return lambda row: base_getter(rows[row])
+
+    def all(self) -> List[Any]:
+        return list(map(self.base.all().__getitem__, self.rows))
+
+    def set(self, row: int, value: Any) -> None:
+        raise TypeError('a library selection is read-only')
+
+    def extend(self, values: List[Any]) -> None:
+        raise TypeError('a library selection is read-only')
+
+
+class SongRow(Mapping):
+    """Dictionary-like view of one song in a Library
+
+    Reads and writes go straight to the library's columns; a row holds no song data itself.
+    """
+    __slots__ = ('_library', '_row')
+
+    def __init__(self, library: 'Library', row: int) -> None:
+        self._library = library
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        getter = self._library._getters.get(key)
+        if getter is None:
+            return self._library._extra.get(self._row, {})[key]
+        value = getter(self._row)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        getter = self._library._getters.get(key)
+        if getter is None:
+            return self._library._extra.get(self._row, {}).get(key, default)
+        value = getter(self._row)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: Any) -> bool:
+        getter = self._library._getters.get(key)
+        if getter is None:
+            return key in self._library._extra.get(self._row, {})
+        return getter(self._row) is not _MISSING
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._library.set_value(self._row, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        getters = self._library._getters
+        for field in FIELDS:
+            if getters[field](self._row) is not _MISSING:
+                yield field
+        yield from self._library._extra.get(self._row, ())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'SongRow({dict(self)!r})'
+
+    @property
+    def row(self) -> int:
+        """Index of this song in its library"""
+        return self._row
+
+
+class Library:
+    """MusicMasterSongList held as columns, read and written through SongRow views
+
+    Args:
+        songs (Iterable[Mapping[str, Any]]): Song dictionaries (or rows of another Library)
+    """
+
+    def __init__(self, songs: Iterable[Mapping] = ()) -> None:
+        self._use_columns({
+            'number': _TypedColumn('I', _encode_number, None, 0xFFFFFFFF),
+            'location': _Column(),
+            'title': _Column(),
+            'artist': _InternedColumn(),
+            'album': _InternedColumn(),
+            'year': _TypedColumn('H', _encode_year, str, 0xFFFF, shared=True),
+            'comment': _InternedColumn(),
+            'duration': _TypedColumn('I', _encode_duration, _decode_duration, 0xFFFFFFFF, shared=True),
+            'id': _TypedColumn('Q', _encode_id, None, 0)
+        }, 0)
+        self.extend(songs)
+
+    def _use_columns(self, columns: Dict[str, Any], length: int,
+                     sort_orders: Optional[Dict[str, Sequence[int]]] = None) -> None:
+        self._columns: Dict[str, Any] = columns
+        self._getters: Dict[str, Callable[[int], Any]] = {field: column.getter() for field, column in columns.items()}
+        self._extra: Dict[int, Dict[str, Any]] = {}  # row -> fields outside FIELDS
+        self._length: int = length
+        self._sort_orders: Dict[str, Sequence[int]] = dict(sort_orders or {})
+        self._row_indexes: Dict[str, Dict[Any, int]] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [SongRow(self, row) for row in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('library row out of range')
+        return SongRow(self, index)
+
+    def __iter__(self) -> Iterator[SongRow]:
+        return map(SongRow, repeat(self, self._length), range(self._length))
+
+    def __repr__(self) -> str:
+        return f'<Library of {self._length} songs>'
+
+    def append(self, song: Mapping) -> None:
+        """Add a song at the end"""
+        self.extend([song])
+
+    def extend(self, songs: Iterable[Mapping]) -> None:
+        """Add songs at the end, a column at a time"""
+        songs = list(songs)
+        for field, column in self._columns.items():
+            column.extend([song.get(field, _MISSING) for song in songs])
+        for offset, song in enumerate(songs):
+            if not song.keys() <= _FIELD_SET:
+                self._extra[self._length + offset] = {key: value for key, value in song.items()
+                                                      if key not in self._columns}
+        self._length += len(songs)
+        self._sort_orders.clear()
+        self._row_indexes.clear()
+
+    def set_value(self, row: int, field: str, value: Any) -> None:
+        """Set one field of one song (what song[field] = value does)"""
+        column = self._columns.get(field)
+        if column is None:
+            self._extra.setdefault(row, {})[field] = value
+        else:
+            column.set(row, value)
+            self._sort_orders.clear()
+            self._row_indexes.clear()
+
+    def column_map(self, field: str, func: Callable[[Any], Any]) -> List[Any]:
+        """func(value) of one field for every song, by row, calling func once per distinct value
+        of an interned field (None is passed where a song does not have the field)"""
+        column = self._columns[field]
+        if not column.coded:
+            return [func(value) for value in self.column(field)]
+        results = {code: func(None if column.value(code) is _MISSING else column.value(code))
+                   for code in set(column.codes)}
+        return list(map(results.__getitem__, column.codes))
+
+    def column(self, field: str) -> List[Any]:
+        """Every song's value of one field, by row (None where a song does not have it)"""
+        return [None if value is _MISSING else value for value in self._columns[field].all()]
+
+    def distinct(self, field: str) -> List[Any]:
+        """Distinct values of an interned field (artist, album or comment), in first-seen order"""
+        column = self._columns[field]
+        if not column.coded:
+            raise ValueError(f"{field} is not an interned field")
+        return [column.value(code) for code in dict.fromkeys(column.codes) if column.value(code) is not _MISSING]
+
+    def sort_order(self, field: str) -> Sequence[int]:
+        """Rows sorted by the fold_sort_key() of title then artist ('title')
+
+        Read from the snapshot for a mapped library, otherwise sorted once and kept until the
+        library changes.
+        """
+        order = self._sort_orders.get(field)
+        if order is None:
+            first, second = (self.column_map(key, fold_sort_key) for key in SORT_KEYS[field])
+            order = self._sort_orders[field] = array('I', sorted(range(self._length),
+                                                                 key=lambda row: (first[row], second[row])))
+        return order
+
+    def row_index(self, field: str) -> Dict[Any, int]:
+        """value -> row map of one field, e.g. location or id (the first row when a value repeats)
+
+        Built once and kept until the library changes.
+        """
+        index = self._row_indexes.get(field)
+        if index is None:
+            values = self.column(field)
+            index = self._row_indexes[field] = dict(zip(reversed(values), range(len(values) - 1, -1, -1)))
+            index.pop(None, None)
+        return index
+
+    def select(self, rows: Iterable[int]) -> 'Library':
+        """A read-only Library of some of these songs, in the given order, sharing this library's data"""
+        rows = array('I', rows)
+        selection = Library.__new__(Library)
+        selection._use_columns({field: _SelectedColumn(column, rows) for field, column in self._columns.items()},
+                               len(rows), self._selected_sort_orders(rows))
+        selection._extra = {new_row: self._extra[row] for new_row, row in enumerate(rows) if row in self._extra}
+        return selection
+
+    def _selected_sort_orders(self, rows: Sequence[int]) -> Dict[str, Sequence[int]]:
+        """The sort orders already known, carried over to a selection of distinct rows"""
+        if not self._sort_orders:
+            return {}
+        new_rows = array('i', repeat(-1, self._length))
+        for new_row, row in enumerate(rows):
+            if new_rows[row] != -1:
+                return {}
+            new_rows[row] = new_row
+        return {field: array('I', [new_rows[row] for row in order if new_rows[row] != -1])
+                for field, order in self._sort_orders.items()}
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """The library as a list of song dictionaries, e.g. for json.dump()"""
+        columns = [(field, self._columns[field].all()) for field in FIELDS]
+        songs: List[Dict[str, Any]] = []
+        for row in range(self._length):
+            song = {field: values[row] for field, values in columns if values[row] is not _MISSING}
+            if row in self._extra:
+                song.update(self._extra[row])
+            songs.append(song)
+        return songs
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _snapshot_layout(song_count: int, string_count: int) -> Dict[str, int]:
+    """Byte offset of each snapshot section, and the file size"""
+    layout: Dict[str, int] = {'codes': _aligned(_SNAPSHOT_HEADER.size)}
+    layout['number'] = _aligned(layout['codes'] + 4 * song_count * len(STRING_FIELDS))
+    layout['id'] = _aligned(layout['number'] + 4 * song_count)
+    layout['sort_orders'] = _aligned(layout['id'] + 8 * song_count)
+    layout['offsets'] = _aligned(layout['sort_orders'] + 4 * song_count * len(SORT_KEYS))
+    layout['heap'] = _aligned(layout['offsets'] + 4 * (string_count + 1))
+    return layout
+
+
+def _source_stamp(source_file: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(source_file)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_library_snapshot(file_path: str, library: Library, source_file: str) -> bool:
+    """Save a library as a snapshot for open_library_snapshot(), atomically
+
+    Every song must have all of FIELDS and no others, string fields must be strings, 'number'
+    a row number and 'id' a song id - the engine's MusicMasterSongList after index_song_ids().
+
+    Args:
+        file_path (str): Snapshot file
+        library (Library): The songs
+        source_file (str): The MusicMasterSongList.txt the library was saved to; a snapshot is
+            current only while that file is unchanged
+
+    Returns:
+        bool: True if written, False if the library does not fit the format or the file could
+            not be written (e.g. a reader holds the old one open on Windows)
+    """
+    stamp = _source_stamp(source_file)
+    if stamp is None or library._extra:
+        return False
+    columns = {field: library.column(field) for field in FIELDS}
+    if not (all(isinstance(value, str) for field in STRING_FIELDS for value in columns[field])
+            and all(_encode_number(value) is not None for value in columns['number'])
+            and all(is_song_id(value) for value in columns['id'])):
+        return False
+    string_codes: Dict[str, int] = {}
+    code_arrays = [array('I', [string_codes.setdefault(value, len(string_codes)) for value in columns[field]])
+                   for field in STRING_FIELDS]
+    encoded = [string.encode('utf-8') for string in string_codes]
+    song_count, string_count = len(library), len(string_codes)
+    layout = _snapshot_layout(song_count, string_count)
+    sections: List[Tuple[str, bytes]] = [
+        ('codes', b''.join(_le_bytes(codes) for codes in code_arrays)),
+        ('number', _le_bytes(array('I', columns['number']))),
+        ('id', _le_bytes(array('Q', columns['id']))),
+        ('sort_orders', b''.join(_le_bytes(array('I', library.sort_order(field))) for field in SORT_KEYS)),
+        ('offsets', _le_bytes(array('I', accumulate(map(len, encoded), initial=0)))),
+        ('heap', b''.join(encoded))
+    ]
+    temp_file = file_path + '.tmp'
+    try:
+        with open(temp_file, 'wb') as snapshot_file:
+            snapshot_file.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, song_count, string_count,
+                                                      stamp[0], stamp[1], len(sections[-1][1])))
+            for name, data in sections:
+                snapshot_file.write(b'\0' * (layout[name] - snapshot_file.tell()))
+                snapshot_file.write(data)
+        os.replace(temp_file, file_path)
+        return True
+    except OSError:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        return False
+
+
+def _read_header(data: Any) -> Optional[Tuple[int, int, Tuple[int, int], int]]:
+    if len(data) < _SNAPSHOT_HEADER.size:
+        return None
+    magic, version, _, song_count, string_count, source_size, source_mtime_ns, heap_size = \
+        _SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    return song_count, string_count, (source_size, source_mtime_ns), heap_size
+
+
+def library_snapshot_current(file_path: str, source_file: str) -> bool:
+    """True if the snapshot exists and was made from source_file as it is now"""
+    try:
+        with open(file_path, 'rb') as snapshot_file:
+            header = _read_header(snapshot_file.read(_SNAPSHOT_HEADER.size))
+    except OSError:
+        return False
+    return header is not None and header[2] == _source_stamp(source_file)
+
+
+def open_library_snapshot(file_path: str, source_file: Optional[str] = None) -> Optional[Library]:
+    """Map a snapshot written by write_library_snapshot() as a read-only Library
+
+    Args:
+        file_path (str): Snapshot file
+        source_file (Optional[str]): When given, the snapshot is only used if it was made from
+            this MusicMasterSongList.txt as it is now
+
+    Returns:
+        Optional[Library]: The library, reading the mapped file on access, or None if the
+            snapshot is missing, damaged, from another version or out of date
+    """
+    try:
+        with open(file_path, 'rb') as snapshot_file:
+            mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: an empty file cannot be mapped
+        return None
+    header = _read_header(mapped)
+    if header is None or (source_file is not None and header[2] != _source_stamp(source_file)):
+        mapped.close()
+        return None
+    song_count, string_count, _, heap_size = header
+    layout = _snapshot_layout(song_count, string_count)
+    if len(mapped) != layout['heap'] + heap_size:
+        mapped.close()
+        return None
+    view = memoryview(mapped)
+
+    def integers(offset: int, count: int, typecode: str) -> Sequence[int]:
+        size = count * (8 if typecode == 'Q' else 4)
+        if sys.byteorder == 'big':
+            values = array(typecode, view[offset:offset + size].tobytes())
+            values.byteswap()
+            return values
+        return view[offset:offset + size].cast(typecode)
+
+    offsets = integers(layout['offsets'], string_count + 1, 'I')
+    heap_start = layout['heap']
+
+    def string(code: int) -> str:
+        return str(mapped[heap_start + offsets[code]:heap_start + offsets[code + 1]], 'utf-8')
+
+    columns: Dict[str, Any] = {
+        'number': _MappedIntColumn(integers(layout['number'], song_count, 'I')),
+        'id': _MappedIntColumn(integers(layout['id'], song_count, 'Q'))
+    }
+    for index, field in enumerate(STRING_FIELDS):
+        columns[field] = _MappedStringColumn(integers(layout['codes'] + 4 * song_count * index, song_count, 'I'),
+                                             string)
+    sort_orders = {field: integers(layout['sort_orders'] + 4 * song_count * index, song_count, 'I')
+                   for index, field in enumerate(SORT_KEYS)}
+    library = Library.__new__(Library)
+    library._use_columns({field: columns[field] for field in FIELDS}, song_count, sort_orders)
+    return library
@@ -0,0 +1,108 @@
+"""
+Library Rescan Tests
+Songs merged into the running library by the background rescan (progressive startup) keep
+ids of their own, even when a file is a byte-identical copy of a song already in the library.
+
+Usage:
+    python -m pytest tests
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+TESTS_DIR: str = os.path.dirname(os.path.realpath(__file__))
+REPO_ROOT: str = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'convergence_jukebox_2026_player_renewal'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+from audio_backend_module import FakeAudioBackend  # noqa: E402
+from main_jukebox_engine_2026 import JukeboxEngine  # noqa: E402
+from song_id_module import assign_song_ids  # noqa: E402
+from song_library_module import Library  # noqa: E402
+from synthetic_library import write_library  # noqa: E402
+
+TEST_CONFIG: Dict[str, Any] = {
+    "audio": {"backend": "fake"},
+    "console": {"colors_enabled": False, "show_system_info": False, "verbose": False},
+    "health": {"check": False}
+}
+
+
+class PendingScan:
+    """A background rescan that has found some songs and is still running"""
+
+    def __init__(self, songs: List[Dict[str, Any]]) -> None:
+        self.songs = songs
+
+    def take_batches(self) -> List[Dict[str, Any]]:
+        songs, self.songs = self.songs, []
+        return songs
+
+    def done(self) -> bool:
+        return False
+
+
+class LibraryRescanTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.base_dir = tempfile.mkdtemp(prefix='jukebox_test_')
+        self.songs = write_library(self.base_dir, 6)
+        with open(os.path.join(self.base_dir, 'jukebox_config.json'), 'w') as config_file:
+            json.dump(TEST_CONFIG, config_file)
+        # the library already holds a byte-identical copy of its first song
+        self.songs.append(self._copy_of(self.songs[0], 'copy_one'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.engine = JukeboxEngine(audio_backend=FakeAudioBackend(), dir_path=self.base_dir)
+            self.engine.music_master_song_list = Library(self.songs)
+            self.engine.index_song_ids()
+            self.engine.assign_genres_to_random_play()
+            self.engine.generate_random_song_list()
+
+    def tearDown(self) -> None:
+        self.engine.close()
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def _copy_of(self, song: Dict[str, Any], folder: str) -> Dict[str, Any]:
+        copy_dir = os.path.join(self.base_dir, 'music', folder)
+        os.makedirs(copy_dir, exist_ok=True)
+        location = os.path.join(copy_dir, os.path.basename(song['location']))
+        shutil.copyfile(song['location'], location)
+        return {**{field: value for field, value in song.items() if field not in ('id', 'number')},
+                'location': location, 'size': os.path.getsize(location)}
+
+    def test_identical_copies_get_distinct_ids(self) -> None:
+        ids = self.engine.music_master_song_list.column('id')
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_rescanned_copy_gets_a_free_id(self) -> None:
+        library = self.engine.music_master_song_list
+        existing_ids = set(library.column('id'))
+        self.engine.library_scan = PendingScan([self._copy_of(self.songs[0], 'copy_two')])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.engine._apply_library_scan()
+
+        new_row = len(library) - 1
+        new_id = library[new_row]['id']
+        self.assertNotIn(new_id, existing_ids)
+        self.assertEqual(self.engine.song_id_to_row[new_id], new_row)
+        self.assertEqual(library[self.engine.song_id_to_row[new_id]]['location'], library[new_row]['location'])
+        ids = library.column('id')
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(self.engine.song_id_to_row, {song_id: row for row, song_id in enumerate(ids)})
+
+    def test_taken_ids_are_skipped(self) -> None:
+        first = [{'artist': 'A', 'title': 'T', 'album': 'L', 'duration': '3:00'} for _ in range(2)]
+        assign_song_ids(first)
+        later = [{'artist': 'A', 'title': 'T', 'album': 'L', 'duration': '3:00'}]
+        assign_song_ids(later, taken_ids={song['id'] for song in first})
+        self.assertNotIn(later[0]['id'], {song['id'] for song in first})
+
+
+if __name__ == '__main__':
+    unittest.main()